@@ -27,6 +27,7 @@ def analyze(
     merge_consecutive: int = 1,
     threads: int = 8,
     locale: str = "en",
+    journal: bool = False,
 ):
     """
     Analyzes audio files for bird species detection using the BirdNET-Analyzer.
@@ -54,6 +55,8 @@ def analyze(
         merge_consecutive (int, optional): Merge consecutive detections within this time window in seconds. Defaults to 1.
         threads (int, optional): Number of CPU threads to use for analysis. Defaults to 8.
         locale (str, optional): Locale for species names and output. Defaults to "en".
+        journal (bool, optional): Whether to keep a journal of completed files and windows, so that an interrupted
+            analysis resumes where it stopped when it is run again. Defaults to False.
     Returns:
         None
     Raises:
@@ -62,11 +65,18 @@ def analyze(
         - The function ensures the BirdNET model is available before analysis.
         - Results can be combined into a single file if `combine_results` is True.
         - Analysis parameters are saved to a file in the output directory.
+        - The journal is removed once all files have been analyzed successfully.
     """
     from multiprocessing import Pool
 
     import birdnet_analyzer.config as cfg
-    from birdnet_analyzer.analyze.utils import analyze_file, save_analysis_params
+    from birdnet_analyzer.analyze.utils import (
+        analyze_file,
+        analyze_shard,
+        clear_journal,
+        get_result_file_names,
+        save_analysis_params,
+    )
     from birdnet_analyzer.analyze.utils import combine_results as combine
     from birdnet_analyzer.utils import ensure_model_exists
 
@@ -95,6 +105,7 @@ def analyze(
         merge_consecutive=merge_consecutive,
         skip_existing_results=skip_existing_results,
         threads=threads,
+        journal=journal,
         labels_file=cfg.LABELS_FILE,
     )
 
@@ -108,16 +119,26 @@ def analyze(
     result_files = []
 
     # Analyze files
-    if cfg.CPU_THREADS < 2 or len(flist) < 2:
+    if cfg.CPU_THREADS < 2:
         for entry in flist:
             result_files.append(analyze_file(entry))
     else:
-        with Pool(cfg.CPU_THREADS) as p:
-            # Map analyzeFile function to each entry in flist
-            results = p.map_async(analyze_file, flist)
-            # Wait for all tasks to complete
-            results.wait()
-            result_files = results.get()
+        files, shards = _plan_tasks(flist)
+
+        if len(files) + len(shards) < 2:
+            for entry in flist:
+                result_files.append(analyze_file(entry))
+        else:
+            with Pool(cfg.CPU_THREADS) as p:
+                # Shards of long files first, so that they don't end up on a single worker at the end
+                shard_results = p.map_async(analyze_shard, shards)
+                # Map analyzeFile function to each remaining entry
+                file_results = p.map_async(analyze_file, files)
+                # Wait for all tasks to complete
+                shard_results.wait()
+                file_results.wait()
+
+            result_files = _stitch_results(flist, files, file_results.get(), shard_results.get())
 
     # Combine results?
     if cfg.COMBINE_RESULTS:
@@ -127,6 +148,88 @@ def analyze(
 
     save_analysis_params(os.path.join(cfg.OUTPUT_PATH, cfg.ANALYSIS_PARAMS_FILENAME))
 
+    # Job is complete, no need to resume it
+    # Failed files keep their completed windows for the next run
+    if cfg.USE_JOURNAL and all(
+        r is not None
+        or (cfg.SKIP_EXISTING_RESULTS and all(os.path.exists(f) for f in get_result_file_names(fpath).values()))
+        for (fpath, _), r in zip(flist, result_files)
+    ):
+        clear_journal()
+
+
+def _plan_tasks(flist):
+    """Splits the file list into whole-file tasks and shard tasks for long files.
+
+    Args:
+        flist: List of (file path, config) tuples.
+
+    Returns:
+        A tuple of (files, shards), where files is a list of (file path, config) tuples
+        and shards is a list of (file path, window offsets, config) tuples.
+    """
+    import birdnet_analyzer.config as cfg
+    from birdnet_analyzer.analyze.utils import get_file_shards, get_result_file_names, is_journaled
+
+    files, shards = [], []
+
+    for fpath, config in flist:
+        if cfg.SKIP_EXISTING_RESULTS and all(os.path.exists(f) for f in get_result_file_names(fpath).values()):
+            files.append((fpath, config))
+            continue
+
+        try:
+            # Completed files are picked up from the journal by analyze_file
+            if cfg.USE_JOURNAL and is_journaled(fpath):
+                files.append((fpath, config))
+                continue
+
+            file_shards = get_file_shards(fpath)
+        except Exception:
+            # Corrupt files are reported by analyze_file
+            file_shards = []
+
+        if len(file_shards) > 1:
+            print(f"Analyzing {fpath} in {len(file_shards)} shards", flush=True)
+            shards.extend((fpath, offsets, config) for offsets in file_shards)
+        else:
+            files.append((fpath, config))
+
+    return files, shards
+
+
+def _stitch_results(flist, files, file_results, shard_results):
+    """Stitches shard results back together and saves them.
+
+    Args:
+        flist: List of (file path, config) tuples in original order.
+        files: List of (file path, config) tuples that were analyzed as a whole.
+        file_results: Result file names for each entry in files.
+        shard_results: List of (file path, results) tuples for each shard.
+
+    Returns:
+        The result file names for each entry in flist.
+    """
+    from birdnet_analyzer.analyze.utils import save_file_results
+
+    result_files = {fpath: r for (fpath, _), r in zip(files, file_results)}
+    stitched = {}
+
+    for fpath, results in shard_results:
+        # A single failed shard invalidates the whole file
+        if results is None or stitched.get(fpath, {}) is None:
+            stitched[fpath] = None
+        else:
+            stitched.setdefault(fpath, {}).update(results)
+
+    for fpath, results in stitched.items():
+        result_files[fpath] = save_file_results(fpath, results) if results is not None else None
+
+        if result_files[fpath] is not None:
+            print(f"Finished {fpath}", flush=True)
+
+    return [result_files[fpath] for fpath, _ in flist]
+
 
 def _set_params(
     input,
@@ -151,6 +254,7 @@ def _set_params(
     top_n,
     merge_consecutive,
     threads,
+    journal=False,
     labels_file=None,
 ):
     import birdnet_analyzer.config as cfg
@@ -174,6 +278,7 @@ def _set_params(
     cfg.RESULT_TYPES = rtype
     cfg.COMBINE_RESULTS = combine_results
     cfg.BATCH_SIZE = bs
+    cfg.USE_JOURNAL = journal
 
     if not output:
         if os.path.isfile(cfg.INPUT_PATH):
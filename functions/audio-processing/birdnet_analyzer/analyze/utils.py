@@ -1,9 +1,11 @@
 """Module to analyze audio samples."""
 
 import datetime
+import hashlib
 import json
 import operator
 import os
+import shutil
 
 import numpy as np
 
@@ -580,6 +582,344 @@ def get_result_file_names(fpath: str):
     return result_names
 
 
+def get_journal_path(fpath: str):
+    """Returns the journal path prefix for an audio file.
+
+    The key covers the file path, its size and modification time and all settings
+    that affect the results, so that a journal is never reused for a changed file
+    or a different analysis setup.
+
+    Args:
+        fpath: Path to the audio file.
+
+    Returns:
+        The path prefix of all journal files of the audio file.
+    """
+    stat = os.stat(fpath)
+    key = json.dumps(
+        [
+            os.path.abspath(fpath),
+            stat.st_size,
+            stat.st_mtime_ns,
+            cfg.FILE_SPLITTING_DURATION,
+            cfg.SAMPLE_RATE,
+            cfg.SIG_LENGTH,
+            cfg.SIG_OVERLAP,
+            cfg.SIG_MINLEN,
+            cfg.BANDPASS_FMIN,
+            cfg.BANDPASS_FMAX,
+            cfg.AUDIO_SPEED,
+            cfg.MIN_CONFIDENCE,
+            cfg.SIGMOID_SENSITIVITY,
+            cfg.TOP_N,
+            cfg.CUSTOM_CLASSIFIER,
+            cfg.MODEL_PATH,
+            cfg.LABELS_FILE,
+            sorted(cfg.SPECIES_LIST),
+            sorted(cfg.RESULT_TYPES),
+        ]
+    )
+
+    return os.path.join(cfg.OUTPUT_PATH, cfg.JOURNAL_DIRNAME, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+
+def is_journaled(fpath: str):
+    """Checks whether an audio file has been completed in the current job.
+
+    Only reads the completion entry of the file, the window entries are not touched.
+
+    Args:
+        fpath: Path to the audio file.
+
+    Returns:
+        True if the file has been completed and all of its result files still exist.
+    """
+    done_path = get_journal_path(fpath) + ".done.json"
+
+    if not os.path.isfile(done_path):
+        return False
+
+    with open(done_path, "r", encoding="utf-8") as f:
+        result_file_names = json.load(f)
+
+    # Results have been written for other settings or removed in the meantime
+    return result_file_names == get_result_file_names(fpath) and all(
+        os.path.exists(f) for f in result_file_names.values()
+    )
+
+
+def load_journal(fpath: str):
+    """Loads the journaled analysis windows of an audio file.
+
+    Args:
+        fpath: Path to the audio file.
+
+    Returns:
+        A dictionary that maps completed window offsets to their results.
+    """
+    window_dir = get_journal_path(fpath)
+    windows = {}
+
+    if not os.path.isdir(window_dir):
+        return windows
+
+    for jfile in os.listdir(window_dir):
+        if not jfile.endswith(".jsonl"):
+            continue
+
+        with open(os.path.join(window_dir, jfile), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Incomplete line of an interrupted write
+                    continue
+
+                windows[entry["offset"]] = {ts: [tuple(c) for c in scores] for ts, scores in entry["results"].items()}
+
+    return windows
+
+
+def journal_window(fpath: str, offset: int, results: dict[str, list]):
+    """Records a completed analysis window in the journal.
+
+    The windows of each file are kept in a directory of their own and every process
+    appends to its own journal file, so shards of the same file never write
+    concurrently to one file.
+
+    Args:
+        fpath: Path to the audio file.
+        offset: Offset of the window in seconds.
+        results: The dictionary with {segment: scores} of the window.
+    """
+    window_dir = get_journal_path(fpath)
+    os.makedirs(window_dir, exist_ok=True)
+
+    entry = {
+        "offset": offset,
+        "results": {ts: [(c[0], float(c[1])) for c in scores] for ts, scores in results.items()},
+    }
+
+    with open(os.path.join(window_dir, f"{os.getpid()}.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def journal_file(fpath: str, result_file_names: dict[str, str]):
+    """Records a completed audio file in the journal.
+
+    Args:
+        fpath: Path to the audio file.
+        result_file_names: The result files written for the audio file.
+    """
+    prefix = get_journal_path(fpath)
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+
+    with open(prefix + ".done.tmp", "w", encoding="utf-8") as f:
+        json.dump(result_file_names, f)
+
+    os.replace(prefix + ".done.tmp", prefix + ".done.json")
+
+
+def clear_journal():
+    """Removes the journal of the current analysis job."""
+    shutil.rmtree(os.path.join(cfg.OUTPUT_PATH, cfg.JOURNAL_DIRNAME), ignore_errors=True)
+
+
+def get_file_windows(fpath: str):
+    """Returns the offsets at which an audio file is loaded for analysis.
+
+    Files are loaded in windows of cfg.FILE_SPLITTING_DURATION seconds,
+    each window is split into segments and predicted independently.
+
+    Args:
+        fpath: Path to the audio file.
+
+    Returns:
+        A list of window offsets in seconds.
+    """
+    file_length = int(audio.get_audio_file_length(fpath) / cfg.AUDIO_SPEED)
+    duration = int(cfg.FILE_SPLITTING_DURATION / cfg.AUDIO_SPEED)
+
+    return list(range(0, file_length, duration))
+
+
+def get_file_shards(fpath: str):
+    """Splits the analysis windows of a file into shards.
+
+    Each shard holds up to cfg.FILE_SHARDING_DURATION seconds worth of
+    consecutive windows, so that long recordings can be distributed across
+    multiple worker processes. Shard boundaries always coincide with window
+    boundaries, hence sharded results are identical to a sequential run.
+
+    Args:
+        fpath: Path to the audio file.
+
+    Returns:
+        A list of shards, each a list of window offsets.
+    """
+    windows = get_file_windows(fpath)
+
+    if not cfg.FILE_SHARDING_DURATION:
+        return [windows]
+
+    windows_per_shard = max(1, cfg.FILE_SHARDING_DURATION // cfg.FILE_SPLITTING_DURATION)
+
+    return [windows[i : i + windows_per_shard] for i in range(0, len(windows), windows_per_shard)]
+
+
+def analyze_window(fpath: str, offset: int):
+    """Predicts all segments of a single analysis window.
+
+    Args:
+        fpath: Path to the audio file.
+        offset: Offset of the window in seconds.
+
+    Returns:
+        A dictionary with {segment: scores} for the window.
+    """
+    duration = int(cfg.FILE_SPLITTING_DURATION / cfg.AUDIO_SPEED)
+    start = offset / cfg.AUDIO_SPEED
+    end = start + cfg.SIG_LENGTH
+    results = {}
+
+    chunks = get_raw_audio_from_file(fpath, offset, duration)
+    samples = []
+    timestamps = []
+
+    for chunk_index, chunk in enumerate(chunks):
+        # Add to batch
+        samples.append(chunk)
+        timestamps.append([round(start * cfg.AUDIO_SPEED, 1), round(end * cfg.AUDIO_SPEED, 1)])
+
+        # Advance start and end
+        start += cfg.SIG_LENGTH - cfg.SIG_OVERLAP
+        end = start + cfg.SIG_LENGTH
+
+        # Check if batch is full or last chunk
+        if len(samples) < cfg.BATCH_SIZE and chunk_index < len(chunks) - 1:
+            continue
+
+        # Predict
+        p = predict(samples)
+
+        # Add to results
+        for i in range(len(samples)):
+            # Get timestamp
+            s_start, s_end = timestamps[i]
+
+            # Get prediction
+            pred = p[i]
+
+            # Assign scores to labels
+            p_labels = [
+                p
+                for p in zip(cfg.LABELS, pred, strict=True)
+                if (cfg.TOP_N or p[1] >= cfg.MIN_CONFIDENCE)
+                and (not cfg.SPECIES_LIST or p[0] in cfg.SPECIES_LIST)
+            ]
+
+            # Sort by score
+            p_sorted = sorted(p_labels, key=operator.itemgetter(1), reverse=True)
+
+            if cfg.TOP_N:
+                p_sorted = p_sorted[: cfg.TOP_N]
+
+            # TODO hier schon top n oder min conf raussortieren
+            # Store top 5 results and advance indices
+            results[str(s_start) + "-" + str(s_end)] = p_sorted
+
+        # Clear batch
+        samples = []
+        timestamps = []
+
+    return results
+
+
+def analyze_windows(fpath: str, offsets: list[int]):
+    """Predicts all segments of the given analysis windows.
+
+    Args:
+        fpath: Path to the audio file.
+        offsets: Offsets of the windows in seconds.
+
+    Returns:
+        A dictionary with {segment: scores} for all windows.
+    """
+    results = {}
+    journaled = load_journal(fpath) if cfg.USE_JOURNAL else {}
+
+    for offset in offsets:
+        if offset in journaled:
+            results.update(journaled[offset])
+            continue
+
+        window_results = analyze_window(fpath, offset)
+
+        if cfg.USE_JOURNAL:
+            journal_window(fpath, offset, window_results)
+
+        results.update(window_results)
+
+    return results
+
+
+def save_file_results(fpath: str, results: dict[str, list]):
+    """Saves the results of an analyzed file in all configured formats.
+
+    Args:
+        fpath: Path to the audio file.
+        results: The dictionary with {segment: scores}.
+
+    Returns:
+        dict or None: A dictionary of result file names if saving was successful, None otherwise.
+    """
+    result_file_names = get_result_file_names(fpath)
+
+    try:
+        save_result_files(results, result_file_names, fpath)
+
+    except Exception as ex:
+        # Write error log
+        print(f"Error: Cannot save result for {fpath}.\n", flush=True)
+        utils.write_error_log(ex)
+
+        return None
+
+    if cfg.USE_JOURNAL:
+        journal_file(fpath, result_file_names)
+
+    return result_file_names
+
+
+def analyze_shard(item):
+    """
+    Analyzes a shard of an audio file, i.e. a range of consecutive analysis windows.
+
+    Args:
+        item (tuple): A tuple containing the file path (str), the window offsets (list[int])
+                      and configuration settings.
+
+    Returns:
+        tuple: The file path and the dictionary with {segment: scores} of the shard,
+               or None instead of the dictionary if an error occurs.
+    """
+    fpath: str = item[0]
+    offsets: list[int] = item[1]
+    cfg.set_config(item[2])
+
+    try:
+        return fpath, analyze_windows(fpath, offsets)
+
+    except Exception as ex:
+        # Write error log
+        print(f"Error: Cannot analyze audio file {fpath}.\n", flush=True)
+        utils.write_error_log(ex)
+
+        return fpath, None
+
+
 def analyze_file(item):
     """
     Analyzes an audio file and generates prediction results.
@@ -604,18 +944,18 @@ def analyze_file(item):
             print(f"Skipping {fpath} as it has already been analyzed", flush=True)
             return None  # or return path to combine later? TODO
 
+    if cfg.USE_JOURNAL and is_journaled(fpath):
+        print(f"Skipping {fpath} as it has already been analyzed in this job", flush=True)
+        return result_file_names
+
     # Start time
     start_time = datetime.datetime.now()
-    offset = 0
-    duration = int(cfg.FILE_SPLITTING_DURATION / cfg.AUDIO_SPEED)
-    start, end = 0, cfg.SIG_LENGTH
-    results = {}
 
     # Status
     print(f"Analyzing {fpath}", flush=True)
 
     try:
-        fileLengthSeconds = int(audio.get_audio_file_length(fpath) / cfg.AUDIO_SPEED)
+        offsets = get_file_windows(fpath)
     except Exception as ex:
         # Write error log
         print(f"Error: Cannot analyze audio file {fpath}. File corrupt?\n", flush=True)
@@ -623,59 +963,9 @@ def analyze_file(item):
 
         return None
 
-    # Process each chunk
+    # Process each window
     try:
-        while offset < fileLengthSeconds:
-            chunks = get_raw_audio_from_file(fpath, offset, duration)
-            samples = []
-            timestamps = []
-
-            for chunk_index, chunk in enumerate(chunks):
-                # Add to batch
-                samples.append(chunk)
-                timestamps.append([round(start * cfg.AUDIO_SPEED, 1), round(end * cfg.AUDIO_SPEED, 1)])
-
-                # Advance start and end
-                start += cfg.SIG_LENGTH - cfg.SIG_OVERLAP
-                end = start + cfg.SIG_LENGTH
-
-                # Check if batch is full or last chunk
-                if len(samples) < cfg.BATCH_SIZE and chunk_index < len(chunks) - 1:
-                    continue
-
-                # Predict
-                p = predict(samples)
-
-                # Add to results
-                for i in range(len(samples)):
-                    # Get timestamp
-                    s_start, s_end = timestamps[i]
-
-                    # Get prediction
-                    pred = p[i]
-
-                    # Assign scores to labels
-                    p_labels = [
-                        p
-                        for p in zip(cfg.LABELS, pred, strict=True)
-                        if (cfg.TOP_N or p[1] >= cfg.MIN_CONFIDENCE)
-                        and (not cfg.SPECIES_LIST or p[0] in cfg.SPECIES_LIST)
-                    ]
-
-                    # Sort by score
-                    p_sorted = sorted(p_labels, key=operator.itemgetter(1), reverse=True)
-
-                    if cfg.TOP_N:
-                        p_sorted = p_sorted[: cfg.TOP_N]
-
-                    # TODO hier schon top n oder min conf raussortieren
-                    # Store top 5 results and advance indices
-                    results[str(s_start) + "-" + str(s_end)] = p_sorted
-
-                # Clear batch
-                samples = []
-                timestamps = []
-            offset = offset + duration
+        results = analyze_windows(fpath, offsets)
 
     except Exception as ex:
         # Write error log
@@ -685,14 +975,9 @@ def analyze_file(item):
         return None
 
     # Save as selection table
-    try:
-        save_result_files(results, result_file_names, fpath)
-
-    except Exception as ex:
-        # Write error log
-        print(f"Error: Cannot save result for {fpath}.\n", flush=True)
-        utils.write_error_log(ex)
+    result_file_names = save_file_results(fpath, results)
 
+    if result_file_names is None:
         return None
 
     delta_time = (datetime.datetime.now() - start_time).total_seconds()
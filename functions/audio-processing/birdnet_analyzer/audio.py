@@ -64,6 +64,25 @@ def get_audio_file_length(path):
     return librosa.get_duration(filename=path, sr=None)
 
 
+def get_seekable_duration(path: str):
+    """
+    Get the length of an audio file that can be read at any offset without decoding it from the start.
+
+    librosa reads the formats supported by soundfile with seeking. All other formats (e.g. m4a or aac)
+    are decoded by audioread from the start of the file on every call, regardless of the offset.
+
+    Args:
+        path (str): The file path to the audio file.
+
+    Returns:
+        float | None: The duration of the audio file in seconds, None if it cannot be read with seeking.
+    """
+    try:
+        return sf.info(path).duration
+    except Exception:
+        return None
+
+
 def get_sample_rate(path: str):
     """
     Get the sample rate of an audio file.
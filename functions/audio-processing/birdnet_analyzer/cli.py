@@ -303,6 +303,7 @@ def analyzer_parser():
         --combine_results: Outputs a combined file for all selected result types if set.
         -c, --classifier: Path to a custom trained classifier. Overrides --lat, --lon, and --locale if set.
         --skip_existing_results: Skips files that have already been analyzed if set.
+        --journal: Keeps a journal of analyzed files and windows to resume interrupted analyses if set.
         --top_n: Saves only the top N predictions for each segment. Threshold will be ignored.
         --merge_consecutive: Maximum number of consecutive detections to merge for each species.
     Returns:
@@ -357,6 +358,12 @@ def analyzer_parser():
         help="Skip files that have already been analyzed.",
     )
 
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="Keep a journal of analyzed files and windows in the output folder, so that an interrupted analysis resumes where it stopped when started again.",
+    )
+
     parser.add_argument(
         "--top_n",
         type=lambda a: max(1, int(a)),
@@ -385,6 +392,11 @@ def embeddings_parser():
     - threads_args(): Handles threading arguments.
     - bs_args(): Handles batch size arguments.
 
+    The parser also includes the following arguments:
+    - --index_precision: Precision of the embeddings in the search index.
+    - --payload_precision: Precision of the copy of the embeddings used for re-ranking search results.
+    - --incremental: Only embed new and changed files, and remove embeddings of changed and deleted files.
+
     Returns:
         argparse.ArgumentParser: Configured argument parser for extracting feature embeddings.
     """
@@ -402,6 +414,26 @@ def embeddings_parser():
         help="Path to input file or folder.",
     )
 
+    parser.add_argument(
+        "--index_precision",
+        default=cfg.EMBEDDINGS_INDEX_PRECISION,
+        choices=["float32", "float16", "int8"],
+        help="Precision of the embeddings in the search index. Only used when a new database is created.",
+    )
+
+    parser.add_argument(
+        "--payload_precision",
+        default=cfg.EMBEDDINGS_PAYLOAD_PRECISION,
+        choices=["float32", "float16"],
+        help="Also stores a copy of the embeddings with this precision, used to re-rank search results. Only used when a new database is created.",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only embed new and changed files. Embeddings of changed files and of files deleted from the input folder are removed.",
+    )
+
     return parser
 
 
@@ -415,16 +447,25 @@ def search_parser():
     - --n_results: Number of results to return.
     - --score_function: Scoring function to use. Choose 'cosine', 'euclidean' or 'dot'. Defaults to 'cosine'.
     - --crop_mode: Crop mode for the query sample. Can be 'center', 'first' or 'segments'.
+    - --rerank: Re-rank the results with the full precision embeddings stored in the database.
+    - --exact: Score every embedding instead of using the nearest neighbour index.
+    - --expansion_search: Size of the candidate list of the nearest neighbour index.
+    - --fusion: How the scores of multiple query embeddings are combined. Can be 'mean', 'max' or 'topk_mean'.
+    - --fusion_top_k: Number of best query scores averaged by the 'topk_mean' fusion.
+    - --audio_format: Format of the saved audio files. Can be 'wav' or 'flac'.
 
     The parser also includes arguments from the following parent parsers:
     - overlap_args(): Handles overlap arguments if segments is selected as crop mode.
     - db_args(): Handles database arguments.
+    - threads_args(): Handles threading arguments for saving the results.
     """
 
-    parents = [overlap_args(), db_args()]
+    parents = [overlap_args(), db_args(), threads_args()]
 
     parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter, parents=parents)
-    parser.add_argument("-q", "--queryfile", help="Path to the query file.")
+    parser.add_argument(
+        "-q", "--queryfile", nargs="+", help="Path to the query file. Multiple query files are searched together."
+    )
     parser.add_argument("-o", "--output", help="Path to the output folder.")
     parser.add_argument("--n_results", default=10, help="Number of results to return.")
 
@@ -441,6 +482,40 @@ def search_parser():
         choices=["center", "first", "segments"],
         help="Crop mode for the query sample. Can be 'center', 'first' or 'segments'.",
     )
+    parser.add_argument(
+        "--rerank",
+        action="store_true",
+        help="Re-rank the results with the full precision embeddings stored in the database. Requires a database created with --payload_precision.",
+    )
+    parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="Score every embedding in the database instead of using the approximate nearest neighbour index. Always used for the euclidean score function.",
+    )
+    parser.add_argument(
+        "--expansion_search",
+        type=int,
+        default=cfg.EMBEDDINGS_SEARCH_EXPANSION,
+        help="Size of the candidate list of the nearest neighbour index. Higher values are more accurate, but slower.",
+    )
+    parser.add_argument(
+        "--fusion",
+        default="mean",
+        choices=["mean", "max", "topk_mean"],
+        help="How the scores of multiple query embeddings (segments crop mode or multiple query files) are combined.",
+    )
+    parser.add_argument(
+        "--fusion_top_k",
+        type=int,
+        default=3,
+        help="Number of best query scores averaged by the 'topk_mean' fusion.",
+    )
+    parser.add_argument(
+        "--audio_format",
+        default="wav",
+        choices=["wav", "flac"],
+        help="Format of the saved audio files.",
+    )
 
     return parser
 
@@ -686,6 +761,26 @@ def train_parser():
     )
     parser.add_argument("--cache_mode", choices=["load", "save"], help="Cache mode. Can be 'load' or 'save'.")
     parser.add_argument("--cache_file", default=cfg.TRAIN_CACHE_FILE, help="Path to cache file.")
+    parser.add_argument(
+        "--embeddings_db",
+        default=cfg.TRAIN_EMBEDDINGS_DATABASE,
+        help="Path to an embeddings database. Stored embeddings of training files are reused instead of computing them again.",
+    )
+    parser.add_argument(
+        "--embeddings_cache",
+        default=cfg.TRAIN_EMBEDDINGS_CACHE,
+        help="Path to a folder that caches the embeddings of every training file. Only new or changed files are processed.",
+    )
+    parser.add_argument(
+        "--memmap_dir",
+        default=cfg.TRAIN_MEMMAP_DIR,
+        help="Path to a folder for memory-mapped training data. Embeddings are streamed to disk, so the training set can exceed RAM.",
+    )
+    parser.add_argument(
+        "--data_pipeline",
+        action="store_true",
+        help="Whether to stream the training data in batches. Batches are shuffled, upsampled and augmented anew in every epoch.",
+    )
     parser.add_argument(
         "--autotune",
         action="store_true",
@@ -703,5 +798,17 @@ def train_parser():
         default=cfg.AUTOTUNE_EXECUTIONS_PER_TRIAL,
         help="The number of times a training run with a set of hyperparameters is repeated during hyperparameter tuning (this reduces the variance).",
     )
+    parser.add_argument(
+        "--autotune_parallel_trials",
+        type=int,
+        default=cfg.AUTOTUNE_PARALLEL_TRIALS,
+        help="Number of hyperparameter tuning runs that are executed at the same time. The threads are split between them.",
+    )
+    parser.add_argument(
+        "--autotune_pruning_epochs",
+        type=int,
+        default=cfg.AUTOTUNE_PRUNING_EPOCHS,
+        help="Epoch after which hyperparameter tuning runs with a validation AUPRC below the median of earlier runs are stopped. 0 disables pruning.",
+    )
 
     return parser
@@ -106,6 +106,12 @@ BATCH_SIZE: int = 1
 # Lowering this value results in lower memory usage
 FILE_SPLITTING_DURATION: int = 600
 
+# Number of seconds of a file that are analyzed by one worker process
+# Longer files are split into shards of this length, which are distributed
+# across all worker processes and stitched back together before saving.
+# Should be a multiple of FILE_SPLITTING_DURATION, set to 0 to disable sharding.
+FILE_SHARDING_DURATION: int = 3600
+
 # Whether to use noise to pad the signal
 # If set to False, the signal will be padded with zeros
 USE_NOISE: bool = False
@@ -127,6 +133,36 @@ ANALYSIS_PARAMS_FILENAME: str = "BirdNET_analysis_params.csv"
 SKIP_EXISTING_RESULTS: bool = False
 
 COMBINE_RESULTS: bool = False
+
+# Whether to keep a journal of completed files and analysis windows in the output path
+# An interrupted analysis will resume from the journal when it is started again
+USE_JOURNAL: bool = False
+JOURNAL_DIRNAME: str = ".BirdNET_journal"
+
+#######################
+# Embeddings settings #
+#######################
+
+# Number of embeddings that are inserted into the database in one transaction
+# Embeddings are committed at least once per file
+EMBEDDINGS_COMMIT_INTERVAL: int = 10000
+
+# Precision of the vectors in the search index ('float32', 'float16' or 'int8')
+# int8 vectors are scaled by EMBEDDINGS_INT8_SCALE, which is calibrated on the first inserted batch
+EMBEDDINGS_INDEX_PRECISION: str = "float16"
+EMBEDDINGS_INT8_SCALE: float | None = None
+
+# Precision of an additional copy of the vectors in SQLite ('float32', 'float16' or None)
+# The copy is used to re-rank approximate search results with exact scores
+EMBEDDINGS_PAYLOAD_PRECISION: str | None = None
+
+# Number of candidates per requested search result that are re-scored with exact scores
+EMBEDDINGS_RERANK_FACTOR: int = 4
+
+# Size of the candidate list of the nearest neighbour index during search (ef)
+# Higher values are more accurate, but slower
+EMBEDDINGS_SEARCH_EXPANSION: int = 128
+
 #####################
 # Training settings #
 #####################
@@ -185,6 +221,23 @@ TRAINED_MODEL_SAVE_MODE: str = "replace"
 TRAIN_CACHE_MODE: str | None = None
 TRAIN_CACHE_FILE: str = "train_cache.npz"
 
+# Folder of the per-file embedding cache, not used if None
+# Entries are keyed by file content and preprocessing settings, so only new or changed files are processed
+TRAIN_EMBEDDINGS_CACHE: str | None = None
+
+# Embeddings database created with the embeddings command
+# If set, stored embeddings of training files are reused instead of computing them again
+TRAIN_EMBEDDINGS_DATABASE: str | None = None
+
+# Folder for memory-mapped training data, not used if None
+# If set, embeddings are streamed to disk while they are extracted, so training data can exceed RAM
+TRAIN_MEMMAP_DIR: str | None = None
+
+# Whether to stream training data through an input pipeline instead of passing whole arrays to the model
+# Batches are shuffled, upsampled (repeat mode) and augmented anew in every epoch
+# Memory-mapped training data is always streamed
+TRAIN_DATA_PIPELINE: bool = False
+
 # Use automatic Hyperparameter tuning
 AUTOTUNE: bool = False
 
@@ -195,6 +248,14 @@ AUTOTUNE_TRIALS: int = 50
 # Mutliple executions will be averaged, so the evaluation is more consistent
 AUTOTUNE_EXECUTIONS_PER_TRIAL: int = 1
 
+# Number of trials that are run at the same time in separate processes
+# The CPU threads are split evenly between the trials
+AUTOTUNE_PARALLEL_TRIALS: int = 1
+
+# Epoch after which trials with a lower validation AUPRC than the median of earlier trials are stopped
+# If set to 0, trials are not pruned
+AUTOTUNE_PRUNING_EPOCHS: int = 0
+
 # If a binary classification model is trained.
 # This value will be detected automatically in the training script, if only one class and a non-event class is used.
 BINARY_CLASSIFICATION: bool = False
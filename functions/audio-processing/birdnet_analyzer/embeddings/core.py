@@ -1,3 +1,6 @@
+from typing import Literal
+
+
 def embeddings(
     input: str,
     database: str,
@@ -8,6 +11,9 @@ def embeddings(
     fmax: int = 15000,
     threads: int = 8,
     batch_size: int = 1,
+    index_precision: Literal["float32", "float16", "int8"] = "float16",
+    payload_precision: Literal["float32", "float16"] | None = None,
+    incremental: bool = False,
 ):
     """
     Generates embeddings for audio files using the BirdNET-Analyzer.
@@ -23,6 +29,13 @@ def embeddings(
         fmax (int, optional): Maximum frequency (in Hz) for audio analysis. Defaults to 15000.
         threads (int, optional): Number of threads to use for processing. Defaults to 8.
         batch_size (int, optional): Number of audio segments to process in a single batch. Defaults to 1.
+        index_precision (Literal["float32", "float16", "int8"], optional): Precision of the vectors in the
+            search index. Only used when a new database is created. Defaults to "float16".
+        payload_precision (Literal["float32", "float16"] | None, optional): Precision of an additional copy of the
+            vectors stored in SQLite, used for exact re-ranking of search results. Only used when a new database
+            is created. Defaults to None (no copy).
+        incremental (bool, optional): Only embed new and changed files, and remove the embeddings of changed
+            and deleted files. Files are tracked by size, modification time and hash. Defaults to False.
     Raises:
         FileNotFoundError: If the input path or database path does not exist.
         ValueError: If any of the parameters are invalid.
@@ -46,13 +59,44 @@ def embeddings(
     from birdnet_analyzer.utils import ensure_model_exists
 
     ensure_model_exists()
-    run(input, database, overlap, audio_speed, fmin, fmax, threads, batch_size)
+    run(
+        input,
+        database,
+        overlap,
+        audio_speed,
+        fmin,
+        fmax,
+        threads,
+        batch_size,
+        index_precision,
+        payload_precision,
+        incremental,
+    )
+
+
+def register_index_precisions():
+    """Makes all supported index precisions known to hoplite, which only ships with float16.
+
+    Has to be called before a database with a different precision is opened.
+    """
+    from perch_hoplite.db import sqlite_usearch_impl
+    from usearch import index as uindex
+
+    sqlite_usearch_impl.USEARCH_DTYPES.update(
+        {
+            "float32": uindex.ScalarKind.F32,
+            "float16": uindex.ScalarKind.F16,
+            "int8": uindex.ScalarKind.I8,
+        }
+    )
 
 
-def get_database(db_path: str):
+def get_database(db_path: str, embedding_dim: int = 1024, index_precision: str = "float16"):
     """Get the database object. Creates or opens the databse.
     Args:
         db: The path to the database.
+        embedding_dim: The dimension of the embeddings, only used when a new database is created.
+        index_precision: Precision of the vectors in the search index, only used when a new database is created.
     Returns:
         The database object.
     """
@@ -60,11 +104,12 @@ def get_database(db_path: str):
 
     from perch_hoplite.db import sqlite_usearch_impl
 
+    register_index_precisions()
+
     if not os.path.exists(db_path):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        db = sqlite_usearch_impl.SQLiteUsearchDB.create(
-            db_path=db_path,
-            usearch_cfg=sqlite_usearch_impl.get_default_usearch_config(embedding_dim=1024),  # TODO dont hardcode this
-        )
+        usearch_cfg = sqlite_usearch_impl.get_default_usearch_config(embedding_dim=embedding_dim)
+        usearch_cfg.dtype = index_precision
+        db = sqlite_usearch_impl.SQLiteUsearchDB.create(db_path=db_path, usearch_cfg=usearch_cfg)
         return db
     return sqlite_usearch_impl.SQLiteUsearchDB.create(db_path=db_path)
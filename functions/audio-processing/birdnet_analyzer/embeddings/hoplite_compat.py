@@ -0,0 +1,156 @@
+"""Compatibility shim for the hoplite internals used by the embeddings database.
+
+hoplite releases before 1.0 have no public API for removing embeddings, for
+listing the sources of a dataset or for reading the offsets of many embeddings
+at once. So these work on the SQLite tables and the usearch index of
+SQLiteUsearchDB directly, and only in this module. They were written against
+the pre-1.0 schema. hoplite 1.0 replaced the hoplite_sources,
+hoplite_embeddings and hoplite_labels tables, so other versions are rejected
+instead of silently corrupting the database.
+"""
+
+import functools
+import importlib.metadata
+
+import numpy as np
+from perch_hoplite.db import sqlite_usearch_impl
+
+HOPLITE_REQUIREMENT: str = "perch-hoplite<1.0"
+HOPLITE_ATTRIBUTES: tuple[str, ...] = ("db", "ui", "offset_dtype", "_ui_loaded", "_ui_updated")
+HOPLITE_TABLES: dict[str, set[str]] = {
+    "hoplite_sources": {"id", "dataset", "source"},
+    "hoplite_embeddings": {"id", "source_idx", "offsets"},
+    "hoplite_labels": {"embedding_id"},
+}
+
+
+@functools.cache
+def _installed_version():
+    try:
+        return importlib.metadata.version("perch-hoplite")
+    except importlib.metadata.PackageNotFoundError:
+        # Source checkouts have no distribution metadata, the database checks still apply
+        return None
+
+
+def check_compatibility(db: sqlite_usearch_impl.SQLiteUsearchDB):
+    """Checks that the database exposes the hoplite internals used by this module.
+
+    Args:
+        db: The database.
+
+    Raises:
+        RuntimeError: If the installed hoplite version or the database does not match.
+    """
+    version = _installed_version()
+
+    if version is not None and int(version.split(".")[0]) >= 1:
+        raise RuntimeError(f"The embeddings database requires {HOPLITE_REQUIREMENT}, found perch-hoplite {version}.")
+
+    missing = [attribute for attribute in HOPLITE_ATTRIBUTES if not hasattr(db, attribute)]
+
+    for table, columns in HOPLITE_TABLES.items():
+        existing = {row[1] for row in db.db.execute(f"PRAGMA table_info({table})")}
+        missing.extend(f"{table}.{column}" for column in sorted(columns - existing))
+
+    if missing:
+        raise RuntimeError(
+            f"Incompatible hoplite database, missing {', '.join(missing)}. "
+            f"The embeddings database requires {HOPLITE_REQUIREMENT}."
+        )
+
+
+def get_sources(db: sqlite_usearch_impl.SQLiteUsearchDB, dataset_name: str):
+    """Returns the source ids of all files of a dataset.
+
+    Args:
+        db: The database.
+        dataset_name: The dataset.
+
+    Returns:
+        A list of source ids.
+    """
+    check_compatibility(db)
+
+    return [row[0] for row in db.db.execute("SELECT source FROM hoplite_sources WHERE dataset = ?", (dataset_name,))]
+
+
+def get_source_offsets(db: sqlite_usearch_impl.SQLiteUsearchDB, dataset_name: str, source_id: str):
+    """Reads the offsets of all embeddings of a source file with a single query.
+
+    The first row is compared with db.get_embedding_source, so that a changed
+    serialization of the offsets is detected instead of returning wrong offsets.
+
+    Args:
+        db: The database.
+        dataset_name: The dataset of the source.
+        source_id: The source file.
+
+    Returns:
+        A dict of embedding id to its offsets.
+
+    Raises:
+        RuntimeError: If the stored offsets cannot be read.
+    """
+    check_compatibility(db)
+
+    rows = db.db.execute(
+        "SELECT he.id, he.offsets FROM hoplite_embeddings he JOIN hoplite_sources hs ON hs.id = he.source_idx "
+        "WHERE hs.dataset = ? AND hs.source = ?",
+        (dataset_name, source_id),
+    )
+    # Offsets are serialized with their own dtype, independent of the precision of the embeddings
+    offsets = {
+        embedding_id: sqlite_usearch_impl.deserialize_embedding(blob, db.offset_dtype) for embedding_id, blob in rows
+    }
+
+    if offsets:
+        embedding_id = next(iter(offsets))
+
+        if not np.array_equal(offsets[embedding_id], db.get_embedding_source(embedding_id).offsets):
+            raise RuntimeError(
+                f"Cannot read the stored offsets, the embeddings database requires {HOPLITE_REQUIREMENT}."
+            )
+
+    return offsets
+
+
+def remove_embeddings(db: sqlite_usearch_impl.SQLiteUsearchDB, embedding_ids: list[int], batch_size: int = 500):
+    """Removes embeddings and their labels from the index and the SQLite tables. Not committed.
+
+    Args:
+        db: The database.
+        embedding_ids: The ids of the embeddings.
+        batch_size: Number of ids per statement, stays below the SQLite limit of host parameters.
+    """
+    check_compatibility(db)
+
+    if not embedding_ids:
+        return
+
+    # An existing index is only memory-mapped until it is loaded
+    if not db._ui_loaded:
+        db.ui.load()
+        db._ui_loaded = True
+
+    db.ui.remove(np.array(embedding_ids, dtype=np.uint64))
+    db._ui_updated = True
+
+    for i in range(0, len(embedding_ids), batch_size):
+        batch = embedding_ids[i : i + batch_size]
+        placeholders = ",".join("?" * len(batch))
+        db.db.execute(f"DELETE FROM hoplite_labels WHERE embedding_id IN ({placeholders})", batch)
+        db.db.execute(f"DELETE FROM hoplite_embeddings WHERE id IN ({placeholders})", batch)
+
+
+def remove_source(db: sqlite_usearch_impl.SQLiteUsearchDB, dataset_name: str, source_id: str):
+    """Removes the source entry of a file. Its embeddings have to be removed first. Not committed.
+
+    Args:
+        db: The database.
+        dataset_name: The dataset of the source.
+        source_id: The source file.
+    """
+    check_compatibility(db)
+
+    db.db.execute("DELETE FROM hoplite_sources WHERE dataset = ? AND source = ?", (dataset_name, source_id))
@@ -1,6 +1,7 @@
 """Module used to extract embeddings for samples."""
 
 import datetime
+import hashlib
 import os
 
 import numpy as np
@@ -10,18 +11,479 @@ import birdnet_analyzer.config as cfg
 import birdnet_analyzer.model as model
 import birdnet_analyzer.utils as utils
 from birdnet_analyzer.analyze.utils import get_raw_audio_from_file
+from birdnet_analyzer.embeddings import hoplite_compat
 from birdnet_analyzer.embeddings.core import get_database
 
 
 from perch_hoplite.db import sqlite_usearch_impl
 from perch_hoplite.db import interface as hoplite
 from ml_collections import ConfigDict
-from functools import partial
 from tqdm import tqdm
 from multiprocessing import Pool
 
 
 DATASET_NAME: str = "birdnet_analyzer_dataset"
+PAYLOAD_TABLE: str = "birdnet_embeddings_payload"
+SOURCES_TABLE: str = "birdnet_source_files"
+
+
+def _offset_key(start, end):
+    # Offsets may be stored with reduced precision
+    return round(float(start), 3), round(float(end), 3)
+
+
+def _batches(values: list, size: int = 500):
+    # Stay below the SQLite limit of host parameters
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+def get_existing_offsets(db: sqlite_usearch_impl.SQLiteUsearchDB, source_id: str):
+    """Returns the offsets of all embeddings stored for a source file.
+
+    Args:
+        db: The database.
+        source_id: The source file.
+
+    Returns:
+        A set of rounded (start, end) tuples.
+    """
+    offsets = hoplite_compat.get_source_offsets(db, DATASET_NAME, source_id)
+
+    return {_offset_key(*o) for o in offsets.values()}
+
+
+def quantize_embeddings(embeddings: np.ndarray):
+    """Converts embeddings to the precision of the search index.
+
+    int8 embeddings are scaled by cfg.EMBEDDINGS_INT8_SCALE, all other
+    precisions are converted by the index itself.
+
+    Args:
+        embeddings: The float embeddings.
+
+    Returns:
+        The converted embeddings.
+    """
+    embeddings = np.asarray(embeddings, dtype="float32")
+
+    if cfg.EMBEDDINGS_INDEX_PRECISION != "int8":
+        return embeddings
+
+    return np.clip(np.round(embeddings * (127 / cfg.EMBEDDINGS_INT8_SCALE)), -127, 127).astype("int8")
+
+
+def dequantize_embeddings(embeddings: np.ndarray):
+    """Converts embeddings read from the search index back to float32.
+
+    Args:
+        embeddings: The embeddings as stored in the index.
+
+    Returns:
+        The float32 embeddings.
+    """
+    if cfg.EMBEDDINGS_INDEX_PRECISION != "int8":
+        return np.asarray(embeddings, dtype="float32")
+
+    return np.asarray(embeddings, dtype="float32") * (cfg.EMBEDDINGS_INT8_SCALE / 127)
+
+
+def calibrate_int8_scale(db: sqlite_usearch_impl.SQLiteUsearchDB, embeddings: np.ndarray):
+    """Sets the int8 scale from the first inserted embeddings and stores it in the database.
+
+    The scale leaves some headroom above the largest value, since later
+    embeddings are clipped to it.
+
+    Args:
+        db: The database.
+        embeddings: The embeddings that are about to be inserted.
+    """
+    cfg.EMBEDDINGS_INT8_SCALE = float(np.max(np.abs(embeddings))) * 2 or 1.0
+
+    settings = db.get_metadata("birdnet_analyzer_settings").to_dict()
+    settings["EMBEDDINGS_INT8_SCALE"] = cfg.EMBEDDINGS_INT8_SCALE
+    db.insert_metadata("birdnet_analyzer_settings", ConfigDict(settings))
+
+
+def create_payload_table(db: sqlite_usearch_impl.SQLiteUsearchDB):
+    """Creates the table holding a copy of the embeddings for exact re-ranking.
+
+    Args:
+        db: The database.
+    """
+    db.db.execute(
+        f"CREATE TABLE IF NOT EXISTS {PAYLOAD_TABLE} (embedding_id INTEGER PRIMARY KEY, embedding BLOB NOT NULL)"
+    )
+
+
+def get_payload_embeddings(db: sqlite_usearch_impl.SQLiteUsearchDB, embedding_ids):
+    """Reads the stored copies of the given embeddings.
+
+    Args:
+        db: The database.
+        embedding_ids: The ids of the embeddings.
+
+    Returns:
+        A dict of embedding id to float32 embedding. Embeddings without a copy are omitted.
+    """
+    if not cfg.EMBEDDINGS_PAYLOAD_PRECISION:
+        return {}
+
+    embedding_ids = [int(i) for i in embedding_ids]
+    payload = {}
+
+    for batch in _batches(embedding_ids):
+        rows = db.db.execute(
+            f"SELECT embedding_id, embedding FROM {PAYLOAD_TABLE} WHERE embedding_id IN ({','.join('?' * len(batch))})",
+            batch,
+        )
+
+        for embedding_id, blob in rows:
+            payload[embedding_id] = sqlite_usearch_impl.deserialize_embedding(
+                blob, cfg.EMBEDDINGS_PAYLOAD_PRECISION
+            ).astype("float32")
+
+    return payload
+
+
+def get_source_ids(db: sqlite_usearch_impl.SQLiteUsearchDB):
+    """Returns the source ids of all files in the database.
+
+    Args:
+        db: The database.
+
+    Returns:
+        A dict of absolute file path to source id.
+    """
+    return {os.path.abspath(source_id): source_id for source_id in hoplite_compat.get_sources(db, DATASET_NAME)}
+
+
+def get_stored_embeddings(db: sqlite_usearch_impl.SQLiteUsearchDB, source_id: str):
+    """Reads all embeddings of a source file.
+
+    The full precision copies are used if the database has them.
+
+    Args:
+        db: The database.
+        source_id: The source file.
+
+    Returns:
+        A dict of rounded (start, end) offsets to float32 embeddings.
+    """
+    offsets = hoplite_compat.get_source_offsets(db, DATASET_NAME, source_id)
+
+    if not offsets:
+        return {}
+
+    embedding_ids, embeddings = db.get_embeddings(np.array(list(offsets.keys())))
+    embeddings = dequantize_embeddings(embeddings)
+    payload = get_payload_embeddings(db, embedding_ids)
+
+    return {
+        _offset_key(*offsets[int(embedding_id)]): payload.get(int(embedding_id), embedding)
+        for embedding_id, embedding in zip(embedding_ids, embeddings)
+    }
+
+
+def create_sources_table(db: sqlite_usearch_impl.SQLiteUsearchDB):
+    """Creates the table holding the size, modification time and hash of every embedded file.
+
+    Args:
+        db: The database.
+    """
+    db.db.execute(
+        f"CREATE TABLE IF NOT EXISTS {SOURCES_TABLE} "
+        "(source_id TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, hash TEXT NOT NULL)"
+    )
+
+
+def hash_file(fpath: str):
+    """Computes the SHA-1 hash of a file.
+
+    Args:
+        fpath: Path to the file.
+
+    Returns:
+        The hex digest.
+    """
+    h = hashlib.sha1()
+
+    with open(fpath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def remove_source_embeddings(db: sqlite_usearch_impl.SQLiteUsearchDB, source_id: str):
+    """Removes all embeddings of a source file from the database.
+
+    hoplite has no API for removing embeddings, see hoplite_compat. Not committed.
+
+    Args:
+        db: The database.
+        source_id: The source file.
+
+    Returns:
+        The number of removed embeddings.
+    """
+    embedding_ids = [int(i) for i in db.get_embeddings_by_source(DATASET_NAME, source_id)]
+
+    hoplite_compat.remove_embeddings(db, embedding_ids)
+
+    if cfg.EMBEDDINGS_PAYLOAD_PRECISION:
+        for batch in _batches(embedding_ids):
+            db.db.execute(f"DELETE FROM {PAYLOAD_TABLE} WHERE embedding_id IN ({','.join('?' * len(batch))})", batch)
+
+    hoplite_compat.remove_source(db, DATASET_NAME, source_id)
+    db.db.execute(f"DELETE FROM {SOURCES_TABLE} WHERE source_id = ?", (source_id,))
+
+    return len(embedding_ids)
+
+
+def sync_sources(db: sqlite_usearch_impl.SQLiteUsearchDB, files: list[str]):
+    """Compares the input files with the files already embedded in the database.
+
+    Unchanged files are skipped without decoding them. A file is only hashed if its
+    size or modification time changed. Embeddings of modified files are removed, as
+    are the embeddings of files that were deleted from the input folder.
+
+    Args:
+        db: The database.
+        files: The input files.
+
+    Returns:
+        A tuple of (files that have to be embedded, dict of file to (size, mtime_ns, hash)).
+    """
+    create_sources_table(db)
+    known = {row[0]: row[1:] for row in db.db.execute(f"SELECT source_id, size, mtime_ns, hash FROM {SOURCES_TABLE}")}
+    pending = []
+    states = {}
+
+    for fpath in files:
+        try:
+            stat = os.stat(fpath)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+
+            if fpath in known and known[fpath][:2] == (size, mtime_ns):
+                continue
+
+            file_hash = hash_file(fpath)
+        except Exception as ex:
+            # Let the analysis report the error
+            utils.write_error_log(ex)
+            pending.append(fpath)
+
+            continue
+
+        if fpath in known and known[fpath][2] == file_hash:
+            # Only touched, remember the new modification time
+            db.db.execute(
+                f"UPDATE {SOURCES_TABLE} SET size = ?, mtime_ns = ? WHERE source_id = ?", (size, mtime_ns, fpath)
+            )
+
+            continue
+
+        if fpath in known:
+            print(f"File changed, replacing embeddings of {fpath}", flush=True)
+            remove_source_embeddings(db, fpath)
+
+        pending.append(fpath)
+        states[fpath] = (size, mtime_ns, file_hash)
+
+    # Only remove files below the input path, the database may contain other folders
+    input_path = os.path.abspath(cfg.INPUT_PATH)
+    files = set(files)
+
+    for fpath in known:
+        inside = fpath == cfg.INPUT_PATH or os.path.abspath(fpath).startswith(input_path + os.sep)
+
+        if fpath not in files and inside and not os.path.exists(fpath):
+            print(f"File removed, deleting embeddings of {fpath}", flush=True)
+            remove_source_embeddings(db, fpath)
+
+    db.commit()
+
+    print(
+        f"Found {len(pending)} new or changed files, skipping {len(files) - len(pending)} unchanged files.", flush=True
+    )
+
+    return pending, states
+
+
+def save_source_states(db: sqlite_usearch_impl.SQLiteUsearchDB, states: dict):
+    """Stores the size, modification time and hash of embedded files.
+
+    Args:
+        db: The database.
+        states: Dict of file to (size, mtime_ns, hash).
+    """
+    db.db.executemany(
+        f"INSERT OR REPLACE INTO {SOURCES_TABLE} (source_id, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+        [(fpath, *state) for fpath, state in states.items()],
+    )
+    db.commit()
+
+
+def insert_embeddings(
+    db: sqlite_usearch_impl.SQLiteUsearchDB, source_id: str, offsets: list, embeddings: np.ndarray, existing: set
+):
+    """Inserts the embeddings of a source file, skipping existing ones.
+
+    The embeddings are not committed, so that the caller can commit many of them
+    in a single transaction.
+
+    Args:
+        db: The database.
+        source_id: The source file.
+        offsets: List of (start, end) offsets of the embeddings.
+        embeddings: The embeddings.
+        existing: Set of offsets already stored for this source, will be updated.
+
+    Returns:
+        The number of inserted embeddings.
+    """
+    new = [i for i, (s_start, s_end) in enumerate(offsets) if _offset_key(s_start, s_end) not in existing]
+
+    if not new:
+        return 0
+
+    embeddings = np.asarray(embeddings, dtype="float32")[new]
+
+    if cfg.EMBEDDINGS_INDEX_PRECISION == "int8" and not cfg.EMBEDDINGS_INT8_SCALE:
+        calibrate_int8_scale(db, embeddings)
+
+    quantized = quantize_embeddings(embeddings)
+    payload = []
+
+    for i, embedding, stored in zip(new, embeddings, quantized):
+        s_start, s_end = offsets[i]
+        embeddings_source = hoplite.EmbeddingSource(DATASET_NAME, source_id, np.array([s_start, s_end]))
+        embedding_id = db.insert_embedding(stored, embeddings_source)
+        existing.add(_offset_key(s_start, s_end))
+
+        if cfg.EMBEDDINGS_PAYLOAD_PRECISION:
+            payload.append(
+                (embedding_id, sqlite_usearch_impl.serialize_embedding(embedding, cfg.EMBEDDINGS_PAYLOAD_PRECISION))
+            )
+
+    if payload:
+        db.db.executemany(f"INSERT OR REPLACE INTO {PAYLOAD_TABLE} (embedding_id, embedding) VALUES (?, ?)", payload)
+
+    return len(new)
+
+
+def extract_embeddings(fpath: str, offset: int, existing: set):
+    """Extracts the embeddings of all segments of one window of a file.
+
+    Does not access the database, so it can run in any worker process.
+
+    Args:
+        fpath: Path to the audio file.
+        offset: Offset of the window in seconds.
+        existing: Set of offsets already stored for this source, these segments are skipped.
+
+    Returns:
+        A tuple of (offsets, embeddings) for all new segments.
+    """
+    chunks = get_raw_audio_from_file(fpath, offset, cfg.FILE_SPLITTING_DURATION)
+    start, end = offset, cfg.SIG_LENGTH + offset
+    samples = []
+    timestamps = []
+    offsets = []
+    embeddings = []
+
+    for c in range(len(chunks)):
+        # Add to batch, unless the embedding already exists
+        if _offset_key(start, end) not in existing:
+            samples.append(chunks[c])
+            timestamps.append((start, end))
+
+        # Advance start and end
+        start += cfg.SIG_LENGTH - cfg.SIG_OVERLAP
+        end = start + cfg.SIG_LENGTH
+
+        # Check if batch is full or last chunk
+        if len(samples) < cfg.BATCH_SIZE and c < len(chunks) - 1:
+            continue
+
+        if samples:
+            # Prepare sample and pass through model
+            data = np.array(samples, dtype="float32")
+            e = model.embeddings(data)
+
+            offsets.extend(timestamps)
+            embeddings.extend(e)
+
+        # Reset batch
+        samples = []
+        timestamps = []
+
+    return offsets, embeddings
+
+
+def extract_window(item):
+    """Extracts the embeddings of one window of a file in a worker process.
+
+    Args:
+        item: (filepath, offset, existing offsets, config)
+
+    Returns:
+        A tuple of (source_id, offsets, embeddings). Offsets and embeddings are None if the window failed.
+    """
+    fpath: str = item[0]
+    offset: int = item[1]
+    cfg.set_config(item[3])
+
+    try:
+        offsets, embeddings = extract_embeddings(fpath, offset, item[2])
+    except Exception as ex:
+        # Write error log
+        print(f"Error: Cannot analyze audio file {fpath}.", flush=True)
+        utils.write_error_log(ex)
+
+        return fpath, None, None
+
+    return fpath, offsets, embeddings
+
+
+def get_window_tasks(flist: list, db: sqlite_usearch_impl.SQLiteUsearchDB):
+    """Splits all files into windows that can be processed independently.
+
+    Args:
+        flist: List of (filepath, config).
+        db: The database.
+
+    Returns:
+        A list of (filepath, offset, existing offsets, config) tuples.
+    """
+    tasks = []
+    duration = cfg.FILE_SPLITTING_DURATION
+
+    for fpath, config in flist:
+        try:
+            fileLengthSeconds = int(audio.get_audio_file_length(fpath))
+        except Exception as ex:
+            # Write error log
+            print(f"Error: Cannot analyze audio file {fpath}. File corrupt?\n", flush=True)
+            utils.write_error_log(ex)
+
+            continue
+
+        try:
+            existing = get_existing_offsets(db, fpath)
+        except Exception as ex:
+            # Write error log
+            print(f"Error: Cannot read existing embeddings of {fpath}.\n", flush=True)
+            utils.write_error_log(ex)
+
+            continue
+
+        for offset in range(0, fileLengthSeconds, duration):
+            window_existing = {k for k in existing if offset <= k[0] < offset + duration}
+            tasks.append((fpath, offset, window_existing, config))
+
+    return tasks
 
 
 def analyze_file(item, db: sqlite_usearch_impl.SQLiteUsearchDB):
@@ -29,6 +491,9 @@ def analyze_file(item, db: sqlite_usearch_impl.SQLiteUsearchDB):
 
     Args:
         item: (filepath, config)
+
+    Returns:
+        True if the file was analyzed successfully.
     """
     # Get file path and restore cfg
     fpath: str = item[0]
@@ -44,7 +509,7 @@ def analyze_file(item, db: sqlite_usearch_impl.SQLiteUsearchDB):
         print(f"Error: Cannot analyze audio file {fpath}. File corrupt?\n", flush=True)
         utils.write_error_log(ex)
 
-        return None
+        return False
 
     # Start time
     start_time = datetime.datetime.now()
@@ -56,65 +521,95 @@ def analyze_file(item, db: sqlite_usearch_impl.SQLiteUsearchDB):
 
     # Process each chunk
     try:
+        # Check for existing embeddings once per file
+        existing = get_existing_offsets(db, source_id)
+        pending = 0
+
         while offset < fileLengthSeconds:
-            chunks = get_raw_audio_from_file(fpath, offset, duration)
-            start, end = offset, cfg.SIG_LENGTH + offset
-            samples = []
-            timestamps = []
+            offsets, embeddings = extract_embeddings(fpath, offset, existing)
 
-            for c in range(len(chunks)):
-                # Add to batch
-                samples.append(chunks[c])
-                timestamps.append([start, end])
+            # Insert into database
+            pending += insert_embeddings(db, source_id, offsets, embeddings, existing)
 
-                # Advance start and end
-                start += cfg.SIG_LENGTH - cfg.SIG_OVERLAP
-                end = start + cfg.SIG_LENGTH
+            # Commit in large transactions
+            if pending >= cfg.EMBEDDINGS_COMMIT_INTERVAL:
+                db.commit()
+                pending = 0
 
-                # Check if batch is full or last chunk
-                if len(samples) < cfg.BATCH_SIZE and c < len(chunks) - 1:
-                    continue
+            offset = offset + duration
 
-                # Prepare sample and pass through model
-                data = np.array(samples, dtype="float32")
-                e = model.embeddings(data)
+        if pending:
+            db.commit()
 
-                # Add to results
-                for i in range(len(samples)):
-                    # Get timestamp
-                    s_start, s_end = timestamps[i]
+    except Exception as ex:
+        # Write error log
+        print(f"Error: Cannot analyze audio file {fpath}.", flush=True)
+        utils.write_error_log(ex)
 
-                    # Check if embedding already exists
-                    existing_embedding = db.get_embeddings_by_source(
-                        DATASET_NAME, source_id, np.array([s_start, s_end])
-                    )
+        return False
 
-                    if existing_embedding.size == 0:
-                        # Get prediction
-                        embeddings = e[i]
+    delta_time = (datetime.datetime.now() - start_time).total_seconds()
+    print("Finished {} in {:.2f} seconds".format(fpath, delta_time), flush=True)
 
-                        # Store embeddings
-                        embeddings_source = hoplite.EmbeddingSource(DATASET_NAME, source_id, np.array([s_start, s_end]))
+    return True
 
-                        # Insert into database
-                        db.insert_embedding(embeddings, embeddings_source)
-                        db.commit()
 
-                # Reset batch
-                samples = []
-                timestamps = []
+def analyze_files_parallel(flist: list, db: sqlite_usearch_impl.SQLiteUsearchDB):
+    """Extracts the embeddings for all files with multiple worker processes.
 
-            offset = offset + duration
+    Workers only decode audio and run the model, the calling process is the single
+    writer that owns the database and inserts the results as they arrive.
 
-    except Exception as ex:
-        # Write error log
-        print(f"Error: Cannot analyze audio file {fpath}.", flush=True)
-        utils.write_error_log(ex)
+    Args:
+        flist: List of (filepath, config).
+        db: The database.
+
+    Returns:
+        The set of files that could not be analyzed.
+    """
+    tasks = get_window_tasks(flist, db)
+    pending = 0
+
+    # Files without any window could not be opened
+    failed = {fpath for fpath, _ in flist} - {task[0] for task in tasks}
+
+    with Pool(cfg.CPU_THREADS) as p:
+        for source_id, offsets, embeddings in tqdm(p.imap_unordered(extract_window, tasks), total=len(tasks)):
+            if offsets is None:
+                failed.add(source_id)
+
+                continue
 
+            # Workers already skipped existing embeddings
+            pending += insert_embeddings(db, source_id, offsets, embeddings, set())
+
+            # Commit in large transactions
+            if pending >= cfg.EMBEDDINGS_COMMIT_INTERVAL:
+                db.commit()
+                pending = 0
+
+    if pending:
+        db.commit()
+
+    return failed
+
+
+def load_storage_settings(db: sqlite_usearch_impl.SQLiteUsearchDB):
+    """Sets the storage precision settings from an existing database.
+
+    Args:
+        db: The database.
+    """
+    cfg.EMBEDDINGS_INDEX_PRECISION = np.dtype(db.embedding_dtype).name
+
+    try:
+        settings = db.get_metadata("birdnet_analyzer_settings")
+    except KeyError:
         return
 
-    delta_time = (datetime.datetime.now() - start_time).total_seconds()
-    print("Finished {} in {:.2f} seconds".format(fpath, delta_time), flush=True)
+    # Databases created before these settings existed have no payload and no int8 index
+    cfg.EMBEDDINGS_PAYLOAD_PRECISION = settings.get("EMBEDDINGS_PAYLOAD_PRECISION", None)
+    cfg.EMBEDDINGS_INT8_SCALE = settings.get("EMBEDDINGS_INT8_SCALE", None)
 
 
 def check_database_settings(db: sqlite_usearch_impl.SQLiteUsearchDB):
@@ -130,15 +625,41 @@ def check_database_settings(db: sqlite_usearch_impl.SQLiteUsearchDB):
                     settings["BANDPASS_FMIN"], settings["BANDPASS_FMAX"], settings["AUDIO_SPEED"]
                 )
             )
+
+        # The storage precision is fixed when the database is created
+        load_storage_settings(db)
     except KeyError:
         settings = ConfigDict(
-            {"BANDPASS_FMIN": cfg.BANDPASS_FMIN, "BANDPASS_FMAX": cfg.BANDPASS_FMAX, "AUDIO_SPEED": cfg.AUDIO_SPEED}
+            {
+                "BANDPASS_FMIN": cfg.BANDPASS_FMIN,
+                "BANDPASS_FMAX": cfg.BANDPASS_FMAX,
+                "AUDIO_SPEED": cfg.AUDIO_SPEED,
+                "EMBEDDINGS_PAYLOAD_PRECISION": cfg.EMBEDDINGS_PAYLOAD_PRECISION,
+                "EMBEDDINGS_INT8_SCALE": None,
+            }
         )
         db.insert_metadata("birdnet_analyzer_settings", settings)
+
+        if cfg.EMBEDDINGS_PAYLOAD_PRECISION:
+            create_payload_table(db)
+
+        cfg.EMBEDDINGS_INT8_SCALE = None
         db.commit()
 
 
-def run(input, database, overlap, audio_speed, fmin, fmax, threads, batchsize):
+def run(
+    input,
+    database,
+    overlap,
+    audio_speed,
+    fmin,
+    fmax,
+    threads,
+    batchsize,
+    index_precision="float16",
+    payload_precision=None,
+    incremental=False,
+):
     ### Make sure to comment out appropriately if you are not using args. ###
 
     # Set input and output path
@@ -168,26 +689,34 @@ def run(input, database, overlap, audio_speed, fmin, fmax, threads, batchsize):
         cfg.CPU_THREADS = 1
         cfg.TFLITE_THREADS = max(1, int(threads))
 
-    cfg.CPU_THREADS = 1  # TODO: with the current implementation, we can't use more than 1 thread
-
     # Set batch size
     cfg.BATCH_SIZE = max(1, int(batchsize))
 
+    # Set storage precision, only used for new databases
+    cfg.EMBEDDINGS_INDEX_PRECISION = index_precision
+    cfg.EMBEDDINGS_PAYLOAD_PRECISION = payload_precision
+
+    db = get_database(database, index_precision=cfg.EMBEDDINGS_INDEX_PRECISION)
+    check_database_settings(db)
+
+    # Skip unchanged files and clean up changed and deleted ones
+    if incremental:
+        cfg.FILE_LIST, states = sync_sources(db, cfg.FILE_LIST)
+
     # Add config items to each file list entry.
     # We have to do this for Windows which does not
     # support fork() and thus each process has to
     # have its own config. USE LINUX!
     flist = [(f, cfg.get_config()) for f in cfg.FILE_LIST]
 
-    db = get_database(database)
-    check_database_settings(db)
-
     # Analyze files
     if cfg.CPU_THREADS < 2:
-        for entry in tqdm(flist):
-            analyze_file(entry, db)
+        failed = {entry[0] for entry in tqdm(flist) if not analyze_file(entry, db)}
     else:
-        with Pool(cfg.CPU_THREADS) as p:
-            tqdm(p.imap(partial(analyze_file, db=db), flist))
+        failed = analyze_files_parallel(flist, db)
+
+    # Remember the embedded files, failed files are retried in the next run
+    if incremental:
+        save_source_states(db, {f: state for f, state in states.items() if f not in failed})
 
     db.db.close()
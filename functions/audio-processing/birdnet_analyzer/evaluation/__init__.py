@@ -11,6 +11,8 @@ import json
 import os
 from typing import Optional, Dict, List, Tuple
 
+import pandas as pd
+
 from birdnet_analyzer.evaluation.preprocessing.data_processor import DataProcessor
 from birdnet_analyzer.evaluation.assessment.performance_assessor import PerformanceAssessor
 
@@ -29,6 +31,10 @@ def process_data(
     metrics_list: Tuple[str, ...] = ("accuracy", "precision", "recall"),
     threshold: float = 0.1,
     class_wise: bool = False,
+    threads: int = 1,
+    chunk_size: Optional[int] = None,
+    bootstrap_resamples: int = 0,
+    confidence_level: float = 0.95,
 ):
     """
     Processes data, computes metrics, and prepares the performance assessment pipeline.
@@ -47,9 +53,16 @@ def process_data(
         metrics_list (Tuple[str, ...]): Metrics to compute for performance assessment.
         threshold (float): Confidence threshold for predictions.
         class_wise (bool): Whether to calculate metrics on a per-class basis.
+        threads (int): Number of processes used to process the recordings.
+        chunk_size (Optional[int]): Number of rows per chunk when reading text files, whole files are read if None.
+        bootstrap_resamples (int): Number of bootstrap resamples of the recordings for confidence intervals.
+            If 0, only point estimates are computed.
+        confidence_level (float): Confidence level of the bootstrap confidence intervals.
 
     Returns:
         Tuple: Metrics DataFrame, `PerformanceAssessor` object, predictions tensor, labels tensor.
+        With bootstrapping, the metrics DataFrame has a '<column> (lower)' and '<column> (upper)'
+        column after each column.
     """
     # Load class mapping if provided
     if mapping_path:
@@ -82,6 +95,8 @@ def process_data(
         columns_predictions=columns_predictions,
         columns_annotations=columns_annotations,
         recording_duration=recording_duration,
+        threads=threads,
+        chunk_size=chunk_size,
     )
 
     # Get the available classes and recordings
@@ -112,6 +127,31 @@ def process_data(
     # Compute performance metrics
     metrics_df = pa.calculate_metrics(predictions, labels, per_class_metrics=class_wise)
 
+    # Add confidence intervals next to each column of point estimates
+    if bootstrap_resamples > 0:
+        lower_df, upper_df = pa.calculate_confidence_intervals(
+            predictions,
+            labels,
+            processor.get_filtered_recordings(selected_recordings),
+            per_class_metrics=class_wise,
+            num_resamples=bootstrap_resamples,
+            confidence_level=confidence_level,
+            threads=threads,
+        )
+
+        metrics_df = pd.concat(
+            [
+                df
+                for column in metrics_df.columns
+                for df in (
+                    metrics_df[[column]],
+                    lower_df[[column]].rename(columns={column: f"{column} (lower)"}),
+                    upper_df[[column]].rename(columns={column: f"{column} (upper)"}),
+                )
+            ],
+            axis=1,
+        )
+
     return metrics_df, pa, predictions, labels
 
 
@@ -138,6 +178,15 @@ def main():
     parser.add_argument("--plot_confusion_matrix", action="store_true", help="Plot confusion matrix")
     parser.add_argument("--plot_metrics_all_thresholds", action="store_true", help="Plot metrics for all thresholds")
     parser.add_argument("--output_dir", help="Directory to save plots")
+    parser.add_argument("--threads", type=int, default=1, help="Number of processes used to process the recordings")
+    parser.add_argument("--chunk_size", type=int, help="Number of rows per chunk when reading text files (optional)")
+    parser.add_argument(
+        "--bootstrap_resamples",
+        type=int,
+        default=0,
+        help="Number of bootstrap resamples of the recordings for confidence intervals (0 = disabled)",
+    )
+    parser.add_argument("--confidence_level", type=float, default=0.95, help="Confidence level of the intervals")
 
     # Parse arguments
     args = parser.parse_args()
@@ -157,6 +206,10 @@ def main():
         metrics_list=args.metrics,
         threshold=args.threshold,
         class_wise=args.class_wise,
+        threads=args.threads,
+        chunk_size=args.chunk_size,
+        bootstrap_resamples=args.bootstrap_resamples,
+        confidence_level=args.confidence_level,
     )
 
     # Display the computed metrics
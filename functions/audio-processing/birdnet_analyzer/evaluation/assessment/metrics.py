@@ -12,9 +12,12 @@ Functions:
     - calculate_f1_score: Computes the F1 score for binary or multilabel classification.
     - calculate_average_precision: Computes the average precision score (AP).
     - calculate_auroc: Computes the Area Under the Receiver Operating Characteristic curve (AUROC).
+    - calculate_confusion_counts: Computes confusion counts of all classes for many thresholds at once.
+    - calculate_threshold_metrics: Computes all metrics for many thresholds from a single sort of the scores.
+    - calculate_bootstrap_metrics: Computes all metrics for many resamples of the recordings at once.
 """
 
-from typing import Literal, Optional
+from typing import Dict, Literal, Optional, Sequence, Tuple
 
 import numpy as np
 from sklearn.metrics import (
@@ -393,3 +396,381 @@ def calculate_auroc(
     if isinstance(auroc, np.ndarray):
         return auroc
     return np.array([auroc])
+
+
+# Maximum number of scores that are sorted at once, classes are processed in blocks of this size
+SORT_BLOCK_SIZE = 1 << 24
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """
+    Divides element-wise, with 0 where the denominator is 0 (like zero_division=0 in scikit-learn).
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+# Metrics computed from the true positives, false positives and false negatives of a label
+_COUNT_METRICS = {
+    "precision": lambda tp, fp, fn: _divide(tp, tp + fp),
+    "recall": lambda tp, fp, fn: _divide(tp, tp + fn),
+    "f1": lambda tp, fp, fn: _divide(2 * tp, 2 * tp + fp + fn),
+}
+
+
+def _sort_scores(predictions: np.ndarray, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorts the scores of each class in descending order, together with their labels.
+
+    Args:
+        predictions (np.ndarray): Scores of shape (samples, classes).
+        labels (np.ndarray): True labels of shape (samples, classes).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The sorted scores and whether each sorted sample is a positive.
+    """
+    order = np.argsort(-predictions, axis=0)
+
+    return np.take_along_axis(predictions, order, axis=0), np.take_along_axis(labels.astype(int) == 1, order, axis=0)
+
+
+def _confusion_counts(
+    scores: np.ndarray, positives: np.ndarray, thresholds: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Counts true and false positives and negatives of scores sorted by `_sort_scores`.
+
+    A sample is predicted positive if its score is greater than or equal to the threshold, so the
+    number of predicted positives is found with a binary search and the true positives are read
+    from the cumulative sum of the sorted labels.
+
+    Args:
+        scores (np.ndarray): Scores of each class, sorted in descending order.
+        positives (np.ndarray): Whether each sorted sample is a positive.
+        thresholds (np.ndarray): Thresholds to binarize the scores.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: True positives, false positives,
+        false negatives and true negatives, each of shape (thresholds, classes).
+    """
+    num_samples, num_classes = scores.shape
+
+    # Number of scores greater than or equal to each threshold
+    predicted = np.stack(
+        [num_samples - np.searchsorted(column[::-1], thresholds, side="left") for column in scores.T], axis=1
+    )
+
+    cumulative_positives = np.zeros((num_samples + 1, num_classes), dtype=np.int64)
+    np.cumsum(positives, axis=0, out=cumulative_positives[1:])
+
+    tp = np.take_along_axis(cumulative_positives, predicted, axis=0)
+    fp = predicted - tp
+    fn = cumulative_positives[-1] - tp
+    tn = num_samples - tp - fp - fn
+
+    return tp, fp, fn, tn
+
+
+def _ranking_metrics(
+    scores: np.ndarray, positives: np.ndarray, weights: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the average precision and AUROC from scores sorted by `_sort_scores`.
+
+    Tied scores are handled like in scikit-learn: every positive contributes the precision at the
+    lowest of its tied scores to the average precision, and the AUROC is computed as the Mann-Whitney
+    U statistic, counting tied negatives as half. Samples can be weighted, a weight of k counts a
+    sample k times.
+
+    Args:
+        scores (np.ndarray): Scores sorted in descending order along the first axis.
+        positives (np.ndarray): Whether each sorted sample is a positive.
+        weights (Optional[np.ndarray]): Weights of the sorted samples, broadcast against the scores.
+            All samples count once if None.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Average precision (0 without positives) and AUROC (NaN if only
+        one label is present), with the trailing shape of the broadcast inputs.
+    """
+    if weights is None:
+        weights = np.ones(scores.shape, dtype=np.int64)
+
+    shape = np.broadcast_shapes(scores.shape, positives.shape, weights.shape)
+    num_samples = shape[0]
+    index = np.broadcast_to(np.arange(num_samples).reshape((-1,) + (1,) * (len(shape) - 1)), scores.shape)
+
+    # First and last position of each group of tied scores
+    group_start = np.ones(scores.shape, dtype=bool)
+    group_start[1:] = scores[1:] != scores[:-1]
+    group_end = np.ones(scores.shape, dtype=bool)
+    group_end[:-1] = group_start[1:]
+
+    first = np.broadcast_to(np.maximum.accumulate(np.where(group_start, index, 0), axis=0), shape)
+    last = np.broadcast_to(np.minimum.accumulate(np.where(group_end, index, num_samples)[::-1], axis=0)[::-1], shape)
+
+    # Weighted positives and negatives, cumulated with a leading zero
+    positive_weights = np.where(positives, weights, 0)
+    negative_weights = np.where(positives, 0, weights)
+    tps = np.concatenate([np.zeros((1,) + shape[1:]), np.cumsum(positive_weights, axis=0)])
+    fps = np.concatenate([np.zeros((1,) + shape[1:]), np.cumsum(negative_weights, axis=0)])
+    num_positives = tps[-1]
+    num_negatives = fps[-1]
+
+    # Precision at the end of each group of tied scores
+    tps_at_end = np.take_along_axis(tps, last + 1, axis=0)
+    fps_at_end = np.take_along_axis(fps, last + 1, axis=0)
+    precision = _divide(tps_at_end, tps_at_end + fps_at_end)
+    ap = _divide((positive_weights * precision).sum(axis=0), num_positives)
+
+    # Negatives with lower scores count fully, tied negatives half
+    fps_before_start = np.take_along_axis(fps, first, axis=0)
+    u_statistic = (positive_weights * (num_negatives - (fps_at_end + fps_before_start) / 2)).sum(axis=0)
+    auroc = _divide(u_statistic, num_positives * num_negatives)
+    auroc[(num_positives == 0) | (num_negatives == 0)] = np.nan
+
+    return ap, auroc
+
+
+def _class_blocks(predictions: np.ndarray, labels: np.ndarray):
+    """
+    Yields the sorted scores and labels of blocks of classes, limiting the memory used for sorting.
+    """
+    block_size = max(1, SORT_BLOCK_SIZE // max(len(predictions), 1))
+
+    for start in range(0, predictions.shape[1], block_size):
+        yield _sort_scores(predictions[:, start : start + block_size], labels[:, start : start + block_size])
+
+
+def calculate_confusion_counts(
+    predictions: np.ndarray,
+    labels: np.ndarray,
+    thresholds: Sequence[float],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calculate the confusion counts of all classes for all thresholds at once.
+
+    The scores of each class are sorted once, the counts for every threshold are then read from
+    cumulative sums instead of binarizing the predictions again for each threshold.
+
+    Args:
+        predictions (np.ndarray): Model predictions as probabilities, of shape (samples, classes).
+        labels (np.ndarray): True labels, of shape (samples, classes).
+        thresholds (Sequence[float]): Thresholds to binarize probabilities.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: True positives, false positives,
+        false negatives and true negatives, each of shape (thresholds, classes).
+
+    Raises:
+        ValueError: If inputs are invalid.
+    """
+    if predictions.size == 0 or labels.size == 0:
+        raise ValueError("Predictions and labels must not be empty.")
+    if predictions.shape != labels.shape or predictions.ndim != 2:
+        raise ValueError("Predictions and labels must be 2-dimensional arrays with the same shape.")
+
+    thresholds = np.atleast_1d(thresholds)
+    counts = [
+        _confusion_counts(scores, positives, thresholds) for scores, positives in _class_blocks(predictions, labels)
+    ]
+
+    return tuple(np.concatenate(count, axis=1) for count in zip(*counts))
+
+
+def calculate_threshold_metrics(
+    predictions: np.ndarray,
+    labels: np.ndarray,
+    thresholds: Sequence[float],
+    task: Literal["binary", "multilabel"],
+    averaging_method: Optional[Literal["macro", "none"]] = "macro",
+    metrics_list: Sequence[str] = ("recall", "precision", "f1", "ap", "auroc", "accuracy"),
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate all metrics for many thresholds from a single sort of the scores of each class.
+
+    Accuracy, precision, recall and F1 score are derived from the confusion counts at each threshold,
+    average precision and AUROC from the same sorted scores. The results match the `calculate_*`
+    functions of this module (and scikit-learn) with zero_division=0. For binary tasks, "macro"
+    averages over the negative and positive label like scikit-learn does. The AUROC of classes with
+    only one label present is NaN, and so is the macro average of such classes.
+
+    Args:
+        predictions (np.ndarray): Model predictions as probabilities, of shape (samples, classes).
+        labels (np.ndarray): True labels, of shape (samples, classes).
+        thresholds (Sequence[float]): Thresholds to binarize probabilities.
+        task (Literal["binary", "multilabel"]): Type of classification task.
+        averaging_method (Optional[Literal["macro", "none"]], optional): Averaging method across classes,
+            None or "none" returns the metrics of each class. Defaults to "macro".
+        metrics_list (Sequence[str], optional): Metrics to compute.
+
+    Returns:
+        Dict[str, np.ndarray]: Values of each metric. Threshold-dependent metrics have shape (thresholds, classes),
+        average precision and AUROC shape (classes,), with a single class if averaged.
+
+    Raises:
+        ValueError: If inputs are invalid or unsupported task type or averaging method is specified.
+    """
+    if task not in ("binary", "multilabel"):
+        raise ValueError(f"Unsupported task type: {task}")
+    if averaging_method not in (None, "none", "macro"):
+        raise ValueError(f"Invalid averaging method: {averaging_method}")
+
+    thresholds = np.atleast_1d(thresholds)
+
+    if np.any((thresholds < 0) | (thresholds > 1)):
+        raise ValueError(f"Invalid thresholds: {thresholds}. Must be between 0 and 1.")
+
+    tp, fp, fn, tn = calculate_confusion_counts(predictions, labels, thresholds)
+    average = averaging_method == "macro"
+    results = _count_metrics(tp, fp, fn, tn, task, average, metrics_list)
+
+    if "ap" in metrics_list or "auroc" in metrics_list:
+        ranking = [_ranking_metrics(scores, positives) for scores, positives in _class_blocks(predictions, labels)]
+        ap, auroc = (np.concatenate(values) for values in zip(*ranking))
+
+        for metric_name, values in (("ap", ap), ("auroc", auroc)):
+            if metric_name in metrics_list:
+                results[metric_name] = np.atleast_1d(values.mean()) if average else values
+
+    # Keep the order of the metrics list
+    return {metric_name: results[metric_name] for metric_name in metrics_list}
+
+
+def _count_metrics(
+    tp: np.ndarray,
+    fp: np.ndarray,
+    fn: np.ndarray,
+    tn: np.ndarray,
+    task: Literal["binary", "multilabel"],
+    average: bool,
+    metrics_list: Sequence[str],
+) -> Dict[str, np.ndarray]:
+    """
+    Derives the threshold-dependent metrics from confusion counts of shape (..., classes).
+
+    Args:
+        tp (np.ndarray): True positives.
+        fp (np.ndarray): False positives.
+        fn (np.ndarray): False negatives.
+        tn (np.ndarray): True negatives.
+        task (Literal["binary", "multilabel"]): Type of classification task.
+        average (bool): Whether to compute the macro average across classes.
+        metrics_list (Sequence[str]): Metrics to compute, AP and AUROC are skipped.
+
+    Returns:
+        Dict[str, np.ndarray]: Values of each metric, with a single class if averaged.
+
+    Raises:
+        ValueError: If an unsupported metric is specified.
+    """
+    results = {}
+
+    for metric_name in metrics_list:
+        if metric_name == "accuracy":
+            values = _divide(tp + tn, tp + fp + fn + tn)
+        elif metric_name in _COUNT_METRICS:
+            values = _COUNT_METRICS[metric_name](tp, fp, fn)
+
+            if task == "binary" and average:
+                # scikit-learn averages binary targets over the positive and negative label, if present
+                negative_values = _COUNT_METRICS[metric_name](tn, fn, fp)
+                has_positive = ((tp + fp + fn) > 0).astype(int)
+                has_negative = ((tn + fp + fn) > 0).astype(int)
+                values = (values * has_positive + negative_values * has_negative) / (has_positive + has_negative)
+        elif metric_name in ("ap", "auroc"):
+            continue
+        else:
+            raise ValueError(f"Unsupported metric: {metric_name}")
+
+        results[metric_name] = values.mean(axis=-1, keepdims=True) if average else values
+
+    return results
+
+
+def calculate_bootstrap_metrics(
+    predictions: np.ndarray,
+    labels: np.ndarray,
+    groups: np.ndarray,
+    resample_counts: np.ndarray,
+    threshold: float,
+    task: Literal["binary", "multilabel"],
+    averaging_method: Optional[Literal["macro", "none"]] = "macro",
+    metrics_list: Sequence[str] = ("recall", "precision", "f1", "ap", "auroc", "accuracy"),
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate all metrics for many resamples of groups of samples (e.g. recordings) at once.
+
+    Each resample is given by how often each group is drawn, so the samples of a group are weighted
+    by its count instead of being copied. Accuracy, precision, recall and F1 score are derived from
+    confusion counts per group, which are combined for all resamples with a single matrix product.
+    Average precision and AUROC are computed from the sorted scores of each class with the weights
+    of a batch of resamples at once.
+
+    Args:
+        predictions (np.ndarray): Model predictions as probabilities, of shape (samples, classes).
+        labels (np.ndarray): True labels, of shape (samples, classes).
+        groups (np.ndarray): Index of the group of each sample, from 0 to the number of groups - 1.
+        resample_counts (np.ndarray): Number of times each group is drawn, of shape (resamples, groups).
+        threshold (float): Threshold to binarize probabilities.
+        task (Literal["binary", "multilabel"]): Type of classification task.
+        averaging_method (Optional[Literal["macro", "none"]], optional): Averaging method across classes,
+            None or "none" returns the metrics of each class. Defaults to "macro".
+        metrics_list (Sequence[str], optional): Metrics to compute.
+
+    Returns:
+        Dict[str, np.ndarray]: Values of each metric, of shape (resamples, classes), with a single class if averaged.
+
+    Raises:
+        ValueError: If inputs are invalid or unsupported task type or averaging method is specified.
+    """
+    if predictions.size == 0 or labels.size == 0:
+        raise ValueError("Predictions and labels must not be empty.")
+    if predictions.shape != labels.shape or predictions.ndim != 2:
+        raise ValueError("Predictions and labels must be 2-dimensional arrays with the same shape.")
+    if groups.shape != (len(predictions),):
+        raise ValueError("groups must contain one group index per sample.")
+    if task not in ("binary", "multilabel"):
+        raise ValueError(f"Unsupported task type: {task}")
+    if averaging_method not in (None, "none", "macro"):
+        raise ValueError(f"Invalid averaging method: {averaging_method}")
+
+    average = averaging_method == "macro"
+    positives = labels.astype(int) == 1
+    predicted = predictions >= threshold
+
+    # Confusion counts of each group, combined for all resamples at once
+    num_groups = resample_counts.shape[1]
+    group_counts = np.zeros((3, num_groups, predictions.shape[1]))
+
+    for counts, values in zip(group_counts, (predicted & positives, predicted, positives)):
+        np.add.at(counts, groups, values)
+
+    tp, num_predicted, num_positives = (resample_counts @ counts for counts in group_counts)
+    num_samples = (resample_counts @ np.bincount(groups, minlength=num_groups))[:, None]
+    fp = num_predicted - tp
+    fn = num_positives - tp
+    results = _count_metrics(tp, fp, fn, num_samples - tp - fp - fn, task, average, metrics_list)
+
+    if "ap" in metrics_list or "auroc" in metrics_list:
+        batch_size = max(1, SORT_BLOCK_SIZE // len(predictions))
+        ap = np.empty((len(resample_counts), predictions.shape[1]))
+        auroc = np.empty_like(ap)
+
+        # Sort the scores of each class once, the weights of a batch of resamples are broadcast against them
+        for i in range(predictions.shape[1]):
+            order = np.argsort(-predictions[:, i])
+            scores = predictions[order, i : i + 1]
+            sorted_positives = positives[order, i : i + 1]
+
+            for start in range(0, len(resample_counts), batch_size):
+                batch = slice(start, start + batch_size)
+                weights = resample_counts[batch][:, groups[order]].T
+                ap[batch, i], auroc[batch, i] = _ranking_metrics(scores, sorted_positives, weights)
+
+        for metric_name, values in (("ap", ap), ("auroc", auroc)):
+            if metric_name in metrics_list:
+                results[metric_name] = values.mean(axis=1, keepdims=True) if average else values
+
+    # Keep the order of the metrics list
+    return {metric_name: results[metric_name] for metric_name in metrics_list}
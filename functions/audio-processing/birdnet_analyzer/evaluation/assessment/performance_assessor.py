@@ -3,10 +3,12 @@ PerformanceAssessor Module
 
 This module defines the `PerformanceAssessor` class to evaluate classification model performance.
 It includes methods to compute metrics like precision, recall, F1 score, AUROC, and accuracy,
-as well as utilities for generating related plots.
+bootstrap confidence intervals of these metrics, as well as utilities for generating related plots.
 """
 
-from typing import Literal, Optional, Tuple
+import warnings
+from multiprocessing import Pool
+from typing import Literal, Optional, Sequence, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -16,6 +18,46 @@ from sklearn.metrics import confusion_matrix, ConfusionMatrixDisplay
 from birdnet_analyzer.evaluation.assessment import metrics
 from birdnet_analyzer.evaluation.assessment import plotting
 
+# Row labels of the metrics in the metrics DataFrame
+METRIC_LABELS = {
+    "recall": "Recall",
+    "precision": "Precision",
+    "f1": "F1",
+    "ap": "AP",
+    "auroc": "AUROC",
+    "accuracy": "Accuracy",
+}
+
+# Metrics that do not depend on the threshold
+RANKING_METRICS = ("ap", "auroc")
+
+# Arguments of metrics.calculate_bootstrap_metrics used by the worker processes of bootstrap_metrics
+_BOOTSTRAP_ARGS = None
+
+
+def _init_bootstrap_worker(args: dict) -> None:
+    """
+    Initializes a worker process with the arrays and settings shared by all resamples.
+
+    Args:
+        args (dict): Arguments of `metrics.calculate_bootstrap_metrics` except the resample counts.
+    """
+    global _BOOTSTRAP_ARGS
+    _BOOTSTRAP_ARGS = args
+
+
+def _bootstrap_worker(resample_counts: np.ndarray) -> dict:
+    """
+    Calculates the metrics of a batch of resamples in a worker process.
+
+    Args:
+        resample_counts (np.ndarray): Number of times each recording is drawn, of shape (resamples, recordings).
+
+    Returns:
+        dict: Values of each metric, of shape (resamples, classes).
+    """
+    return metrics.calculate_bootstrap_metrics(resample_counts=resample_counts, **_BOOTSTRAP_ARGS)
+
 
 class PerformanceAssessor:
     """
@@ -89,22 +131,13 @@ class PerformanceAssessor:
         # Set default colors for plotting
         self.colors = ["#3A50B1", "#61A83E", "#D74C4C", "#A13FA1", "#D9A544", "#F3A6E0"]
 
-    def calculate_metrics(
-        self,
-        predictions: np.ndarray,
-        labels: np.ndarray,
-        per_class_metrics: bool = False,
-    ) -> pd.DataFrame:
+    def _validate_inputs(self, predictions: np.ndarray, labels: np.ndarray) -> None:
         """
-        Calculate multiple performance metrics for the given predictions and labels.
+        Validates predictions and labels.
 
         Args:
             predictions (np.ndarray): Model predictions as a 2D NumPy array (probabilities or logits).
             labels (np.ndarray): Ground truth labels as a 2D NumPy array.
-            per_class_metrics (bool): If True, compute metrics for each class individually.
-
-        Returns:
-            pd.DataFrame: A DataFrame containing the computed metrics.
 
         Raises:
             TypeError: If predictions or labels are not NumPy arrays.
@@ -126,71 +159,64 @@ class PerformanceAssessor:
                 f"The number of columns in predictions ({predictions.shape[1]}) must match num_classes ({self.num_classes})."
             )
 
-        # Determine the averaging method for metrics
+    def _get_averaging_method(self, per_class_metrics: bool) -> Optional[str]:
+        """
+        Returns the averaging method for overall or per-class metrics.
+        """
         if per_class_metrics and self.num_classes == 1:
-            averaging_method = "macro"
-        else:
-            averaging_method = None if per_class_metrics else "macro"
-
-        # Dictionary to store the results of each metric
-        metrics_results = {}
-
-        # Compute each metric in the metrics list
-        for metric_name in self.metrics_list:
-            if metric_name == "recall":
-                result = metrics.calculate_recall(
-                    predictions=predictions,
-                    labels=labels,
-                    task=self.task,
-                    threshold=self.threshold,
-                    averaging_method=averaging_method,
-                )
-                metrics_results["Recall"] = np.atleast_1d(result)
-            elif metric_name == "precision":
-                result = metrics.calculate_precision(
-                    predictions=predictions,
-                    labels=labels,
-                    task=self.task,
-                    threshold=self.threshold,
-                    averaging_method=averaging_method,
-                )
-                metrics_results["Precision"] = np.atleast_1d(result)
-            elif metric_name == "f1":
-                result = metrics.calculate_f1_score(
-                    predictions=predictions,
-                    labels=labels,
-                    task=self.task,
-                    threshold=self.threshold,
-                    averaging_method=averaging_method,
-                )
-                metrics_results["F1"] = np.atleast_1d(result)
-            elif metric_name == "ap":
-                result = metrics.calculate_average_precision(
-                    predictions=predictions,
-                    labels=labels,
-                    task=self.task,
-                    averaging_method=averaging_method,
-                )
-                metrics_results["AP"] = np.atleast_1d(result)
-            elif metric_name == "auroc":
-                result = metrics.calculate_auroc(
-                    predictions=predictions,
-                    labels=labels,
-                    task=self.task,
-                    averaging_method=averaging_method,
-                )
-                metrics_results["AUROC"] = np.atleast_1d(result)
-            elif metric_name == "accuracy":
-                result = metrics.calculate_accuracy(
-                    predictions=predictions,
-                    labels=labels,
-                    task=self.task,
-                    num_classes=self.num_classes,
-                    threshold=self.threshold,
-                    averaging_method=averaging_method,
-                )
-                metrics_results["Accuracy"] = np.atleast_1d(result)
+            return "macro"
+
+        return None if per_class_metrics else "macro"
+
+    def calculate_metrics(
+        self,
+        predictions: np.ndarray,
+        labels: np.ndarray,
+        per_class_metrics: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Calculate multiple performance metrics for the given predictions and labels.
+
+        All metrics are computed together from a single sort of the scores of each class,
+        see `metrics.calculate_threshold_metrics`.
+
+        Args:
+            predictions (np.ndarray): Model predictions as a 2D NumPy array (probabilities or logits).
+            labels (np.ndarray): Ground truth labels as a 2D NumPy array.
+            per_class_metrics (bool): If True, compute metrics for each class individually.
+
+        Returns:
+            pd.DataFrame: A DataFrame containing the computed metrics.
 
+        Raises:
+            TypeError: If predictions or labels are not NumPy arrays.
+            ValueError: If predictions and labels have mismatched dimensions or invalid shapes.
+        """
+        self._validate_inputs(predictions, labels)
+
+        # Scores are compared at the precision of the predictions, like with a Python float threshold
+        dtype = predictions.dtype if np.issubdtype(predictions.dtype, np.floating) else np.float64
+        results = metrics.calculate_threshold_metrics(
+            predictions=predictions,
+            labels=labels,
+            thresholds=np.array([self.threshold], dtype=dtype),
+            task=self.task,
+            averaging_method=self._get_averaging_method(per_class_metrics),
+            metrics_list=self.metrics_list,
+        )
+
+        # Select the results at the threshold, ranking metrics do not depend on it
+        metrics_results = {
+            METRIC_LABELS[metric_name]: values if metric_name in RANKING_METRICS else values[0]
+            for metric_name, values in results.items()
+        }
+
+        return self._to_dataframe(metrics_results, per_class_metrics)
+
+    def _to_dataframe(self, metrics_results: dict, per_class_metrics: bool) -> pd.DataFrame:
+        """
+        Organizes metric values in a DataFrame with one row per metric and one column per class, or an 'Overall' column.
+        """
         # Define column names for the DataFrame
         if per_class_metrics:
             columns = self.classes if self.classes else [f"Class {i}" for i in range(self.num_classes)]
@@ -201,6 +227,95 @@ class PerformanceAssessor:
         metrics_data = {key: np.atleast_1d(value) for key, value in metrics_results.items()}
         return pd.DataFrame.from_dict(metrics_data, orient="index", columns=columns)
 
+    def calculate_confidence_intervals(
+        self,
+        predictions: np.ndarray,
+        labels: np.ndarray,
+        recordings: Sequence[str],
+        per_class_metrics: bool = False,
+        num_resamples: int = 1000,
+        confidence_level: float = 0.95,
+        threads: int = 1,
+        seed: Optional[int] = None,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Calculate bootstrap confidence intervals of the metrics by resampling recordings.
+
+        Samples of the same recording are not independent, so whole recordings are drawn with
+        replacement. Each resample only assigns a count to each recording, the metrics of all
+        resamples are computed from the precomputed scores and labels with
+        `metrics.calculate_bootstrap_metrics`, in batches that are distributed across processes.
+        The intervals are the percentiles of the resampled metric values, resamples where a metric
+        is undefined (e.g. AUROC without positives) are ignored.
+
+        Args:
+            predictions (np.ndarray): Model predictions as a 2D NumPy array (probabilities or logits).
+            labels (np.ndarray): Ground truth labels as a 2D NumPy array.
+            recordings (Sequence[str]): Recording of each sample.
+            per_class_metrics (bool): If True, compute intervals for each class individually.
+            num_resamples (int): Number of bootstrap resamples.
+            confidence_level (float): Confidence level of the intervals.
+            threads (int): Number of processes used to compute the resamples.
+            seed (Optional[int]): Random seed for drawing the resamples.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: Lower and upper bounds, in the format of `calculate_metrics`.
+
+        Raises:
+            TypeError: If predictions or labels are not NumPy arrays.
+            ValueError: If inputs are invalid.
+        """
+        self._validate_inputs(predictions, labels)
+
+        if len(recordings) != len(predictions):
+            raise ValueError("recordings must contain the recording of each sample.")
+        if num_resamples <= 0:
+            raise ValueError("num_resamples must be a positive integer.")
+        if not 0 < confidence_level < 1:
+            raise ValueError("confidence_level must be between 0 and 1 (exclusive).")
+
+        # Draw how often each recording is included in each resample
+        groups, recording_names = pd.factorize(np.asarray(recordings))
+        num_recordings = len(recording_names)
+        rng = np.random.default_rng(seed)
+        resample_counts = rng.multinomial(
+            num_recordings, np.full(num_recordings, 1 / num_recordings), size=num_resamples
+        )
+
+        args = {
+            "predictions": predictions,
+            "labels": labels,
+            "groups": groups,
+            "threshold": self.threshold,
+            "task": self.task,
+            "averaging_method": self._get_averaging_method(per_class_metrics),
+            "metrics_list": self.metrics_list,
+        }
+
+        if threads > 1:
+            batches = np.array_split(resample_counts, min(num_resamples, threads * 4))
+
+            with Pool(threads, initializer=_init_bootstrap_worker, initargs=(args,)) as pool:
+                results = pool.map(_bootstrap_worker, batches)
+
+            results = {key: np.concatenate([result[key] for result in results]) for key in results[0]}
+        else:
+            results = metrics.calculate_bootstrap_metrics(resample_counts=resample_counts, **args)
+
+        # Percentiles of the resampled values, metrics undefined in all resamples stay NaN
+        percentiles = [(1 - confidence_level) / 2 * 100, (1 + confidence_level) / 2 * 100]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            bounds = {
+                METRIC_LABELS[key]: np.nanpercentile(values, percentiles, axis=0) for key, values in results.items()
+            }
+
+        lower = self._to_dataframe({key: values[0] for key, values in bounds.items()}, per_class_metrics)
+        upper = self._to_dataframe({key: values[1] for key, values in bounds.items()}, per_class_metrics)
+
+        return lower, upper
+
     def plot_metrics(
         self,
         predictions: np.ndarray,
@@ -243,48 +358,48 @@ class PerformanceAssessor:
         """
         Plot performance metrics across thresholds for the given predictions and labels.
 
+        The metrics for all thresholds are computed at once from the confusion counts of each threshold.
+
         Args:
             predictions (np.ndarray): Model output predictions as a 2D NumPy array (probabilities or logits).
             labels (np.ndarray): Ground truth labels as a 2D NumPy array.
             per_class_metrics (bool): If True, plots metrics for each class individually.
 
         Raises:
+            TypeError: If predictions or labels are not NumPy arrays.
             ValueError: If metrics calculation or plotting fails.
 
         Returns:
             None
         """
-        # Save the original threshold value to restore it later
-        original_threshold = self.threshold
+        self._validate_inputs(predictions, labels)
 
         # Define a range of thresholds for analysis
         thresholds = np.arange(0.05, 1.0, 0.05)
 
         # Exclude metrics that are not threshold-dependent
-        metrics_to_plot = [m for m in self.metrics_list if m not in ["auroc", "ap"]]
+        metrics_to_plot = [m for m in self.metrics_list if m not in RANKING_METRICS]
+
+        # Compute the metrics for all thresholds at once
+        results = metrics.calculate_threshold_metrics(
+            predictions=predictions,
+            labels=labels,
+            thresholds=thresholds,
+            task=self.task,
+            averaging_method=self._get_averaging_method(per_class_metrics),
+            metrics_list=metrics_to_plot,
+        )
 
         if per_class_metrics:
             # Define class names for plotting
             class_names = list(self.classes) if self.classes else [f"Class {i}" for i in range(self.num_classes)]
 
-            # Initialize a dictionary to store metric values per class
+            # Metric values per class, one value per threshold
             metric_values_dict_per_class = {
-                class_name: {metric: [] for metric in metrics_to_plot} for class_name in class_names
+                class_name: {metric: results[metric][:, i].tolist() for metric in metrics_to_plot}
+                for i, class_name in enumerate(class_names)
             }
 
-            # Compute metrics for each threshold
-            for thresh in thresholds:
-                self.threshold = thresh
-                metrics_df = self.calculate_metrics(predictions, labels, per_class_metrics=True)
-                for metric_name in metrics_to_plot:
-                    metric_label = metric_name.capitalize() if metric_name != "f1" else "F1"
-                    for class_name in class_names:
-                        value = metrics_df.loc[metric_label, class_name]
-                        metric_values_dict_per_class[class_name][metric_name].append(value)
-
-            # Restore the original threshold
-            self.threshold = original_threshold
-
             # Plot metrics across thresholds per class
             fig = plotting.plot_metrics_across_thresholds_per_class(
                 thresholds,
@@ -294,20 +409,8 @@ class PerformanceAssessor:
                 self.colors,
             )
         else:
-            # Initialize a dictionary to store overall metric values
-            metric_values_dict = {metric_name: [] for metric_name in metrics_to_plot}
-
-            # Compute metrics for each threshold
-            for thresh in thresholds:
-                self.threshold = thresh
-                metrics_df = self.calculate_metrics(predictions, labels, per_class_metrics=False)
-                for metric_name in metrics_to_plot:
-                    metric_label = metric_name.capitalize() if metric_name != "f1" else "F1"
-                    value = metrics_df.loc[metric_label, "Overall"]
-                    metric_values_dict[metric_name].append(value)
-
-            # Restore the original threshold
-            self.threshold = original_threshold
+            # Overall metric values, one value per threshold
+            metric_values_dict = {metric_name: results[metric_name][:, 0].tolist() for metric_name in metrics_to_plot}
 
             # Plot metrics across thresholds
             fig = plotting.plot_metrics_across_thresholds(
@@ -339,18 +442,7 @@ class PerformanceAssessor:
             None
         """
         # Validate that predictions and labels are NumPy arrays and match in shape
-        if not isinstance(predictions, np.ndarray):
-            raise TypeError("predictions must be a NumPy array.")
-        if not isinstance(labels, np.ndarray):
-            raise TypeError("labels must be a NumPy array.")
-        if predictions.shape != labels.shape:
-            raise ValueError("predictions and labels must have the same shape.")
-        if predictions.ndim != 2:
-            raise ValueError("predictions and labels must be 2-dimensional arrays.")
-        if predictions.shape[1] != self.num_classes:
-            raise ValueError(
-                f"The number of columns in predictions ({predictions.shape[1]}) must match num_classes ({self.num_classes})."
-            )
+        self._validate_inputs(predictions, labels)
 
         if self.task == "binary":
             # Binarize predictions using the threshold
@@ -3,11 +3,15 @@ DataProcessor class for handling and transforming sample data with annotations a
 
 This module defines the DataProcessor class, which processes prediction and annotation data,
 aligns them with sampled time intervals, and generates tensors for further model training or evaluation.
+Sample metadata is kept in a narrow DataFrame, while confidence scores and annotations are stored
+in dense arrays with one row per sample and one column per class.
 """
 
+import copy
 import os
 import warnings
-from typing import Dict, List, Optional, Tuple
+from multiprocessing import Pool
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -16,8 +20,39 @@ from birdnet_analyzer.evaluation.preprocessing.utils import (
     extract_recording_filename,
     extract_recording_filename_from_filename,
     read_and_concatenate_files_in_directory,
+    read_file,
 )
 
+# Processor used by the worker processes of DataProcessor.process_data
+_WORKER_PROCESSOR = None
+
+
+def _init_worker(processor: "DataProcessor") -> None:
+    """
+    Initializes a worker process with the processor that handles its recordings.
+
+    Args:
+        processor (DataProcessor): Processor without loaded data, only its settings are used.
+    """
+    global _WORKER_PROCESSOR
+    _WORKER_PROCESSOR = processor
+
+
+def _process_recording_worker(
+    item: Tuple[str, pd.DataFrame, pd.DataFrame],
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Processes a single recording in a worker process.
+
+    Args:
+        item (Tuple[str, pd.DataFrame, pd.DataFrame]): Recording filename, its predictions and its annotations.
+
+    Returns:
+        Tuple[pd.DataFrame, np.ndarray, np.ndarray]: The sample intervals, confidence scores and annotations
+        of the recording.
+    """
+    return _WORKER_PROCESSOR.process_recording(*item)
+
 
 class DataProcessor:
     """
@@ -45,6 +80,9 @@ class DataProcessor:
         "Duration": "Duration",
     }
 
+    # Column of Raven selection tables with the start time of a selection within its recording
+    RAVEN_FILE_OFFSET_COLUMN = "File Offset (s)"
+
     def __init__(
         self,
         prediction_directory_path: str,
@@ -57,6 +95,8 @@ class DataProcessor:
         columns_predictions: Optional[Dict[str, str]] = None,
         columns_annotations: Optional[Dict[str, str]] = None,
         recording_duration: Optional[float] = None,
+        threads: int = 1,
+        chunk_size: Optional[int] = None,
     ) -> None:
         """
         Initializes the DataProcessor by loading prediction and annotation data.
@@ -72,6 +112,9 @@ class DataProcessor:
             columns_predictions (Optional[Dict[str, str]], optional): Column name mappings for prediction files.
             columns_annotations (Optional[Dict[str, str]], optional): Column name mappings for annotation files.
             recording_duration (Optional[float], optional): User-specified recording duration in seconds. Defaults to None.
+            threads (int, optional): Number of processes used to process the recordings. Defaults to 1.
+            chunk_size (Optional[int], optional): Number of rows per chunk when reading text files. Defaults to None,
+                which reads whole files at once.
 
         Raises:
             ValueError: If any parameter is invalid (e.g., negative sample duration).
@@ -90,6 +133,8 @@ class DataProcessor:
         )
 
         self.recording_duration: Optional[float] = recording_duration
+        self.threads: int = threads
+        self.chunk_size: Optional[int] = chunk_size
 
         # Paths and filenames
         self.prediction_directory_path: str = prediction_directory_path
@@ -105,6 +150,7 @@ class DataProcessor:
         self.classes: Tuple[str, ...] = ()
 
         # Placeholder for samples DataFrame and tensors
+        # Row i of the tensors holds the confidence scores and annotations of row i of samples_df
         self.samples_df: pd.DataFrame = pd.DataFrame()
         self.prediction_tensors: np.ndarray = np.array([])
         self.label_tensors: np.ndarray = np.array([])
@@ -176,16 +222,21 @@ class DataProcessor:
         Loads the prediction and annotation data into DataFrames.
 
         Depending on whether specific files are provided, this method either reads all files
-        in the given directories or reads the specified files. The method also applies any
-        specified class mapping and prepares the data for further processing.
+        in the given directories or reads the specified files. Tab-separated text files as well as
+        Parquet and Arrow files are supported, only the mapped columns are read. The method also
+        applies any specified class mapping and prepares the data for further processing.
 
         Raises:
             ValueError: If file reading fails or data preparation encounters issues.
         """
         if self.prediction_file_name is None or self.annotation_file_name is None:
             # Case: No specific files provided; load all files in directories.
-            self.predictions_df = read_and_concatenate_files_in_directory(self.prediction_directory_path)
-            self.annotations_df = read_and_concatenate_files_in_directory(self.annotation_directory_path)
+            self.predictions_df = read_and_concatenate_files_in_directory(
+                self.prediction_directory_path, *self._get_read_options(prediction=True), self.chunk_size
+            )
+            self.annotations_df = read_and_concatenate_files_in_directory(
+                self.annotation_directory_path, *self._get_read_options(prediction=False), self.chunk_size
+            )
 
             # Ensure 'source_file' column exists for traceability
             if "source_file" not in self.predictions_df.columns:
@@ -217,8 +268,8 @@ class DataProcessor:
             annotation_file = os.path.join(self.annotation_directory_path, self.annotation_file_name)
 
             # Load files into DataFrames
-            self.predictions_df = pd.read_csv(prediction_file, sep="\t")
-            self.annotations_df = pd.read_csv(annotation_file, sep="\t")
+            self.predictions_df = read_file(prediction_file, *self._get_read_options(prediction=True), self.chunk_size)
+            self.annotations_df = read_file(annotation_file, *self._get_read_options(prediction=False), self.chunk_size)
 
             # Add 'source_file' column to identify origins
             self.predictions_df["source_file"] = self.prediction_file_name
@@ -246,12 +297,71 @@ class DataProcessor:
         all_classes = {cls for cls in pred_classes.union(annot_classes) if pd.notna(cls)}
         self.classes = tuple(sorted(all_classes))
 
+    def _get_read_options(self, prediction: bool) -> Tuple[Callable[[str], bool], Dict[str, type]]:
+        """
+        Returns which columns of the prediction or annotation files are read, and their data types.
+
+        Only the mapped columns (and the file offset of Raven selection tables) are read. Times, durations
+        and confidence scores are parsed as floats, classes and recordings as strings.
+
+        Args:
+            prediction (bool): Whether the options are for predictions or annotations.
+
+        Returns:
+            Tuple[Callable[[str], bool], Dict[str, type]]: The column filter and the data types of the columns.
+        """
+        mapping = self.DEFAULT_COLUMNS_PREDICTIONS if prediction else self.DEFAULT_COLUMNS_ANNOTATIONS
+        dtype = {self.get_column_name(field, prediction=prediction): float for field in mapping}
+        dtype[self.get_column_name("Class", prediction=prediction)] = str
+        dtype[self.get_column_name("Recording", prediction=prediction)] = str
+
+        columns = set(dtype) | {self.RAVEN_FILE_OFFSET_COLUMN}
+
+        return columns.__contains__, dtype
+
+    def _align_file_offsets(self, df: pd.DataFrame, prediction: bool) -> pd.DataFrame:
+        """
+        Converts the times of a combined Raven selection table to times within each recording.
+
+        In a combined table, begin and end times continue across all recordings, while the file
+        offset column holds the begin time within the recording. For tables of a single recording
+        both are equal, and the times are not changed.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to align.
+            prediction (bool): Whether the DataFrame is for predictions or annotations.
+
+        Returns:
+            pd.DataFrame: The DataFrame with start and end times relative to their recording.
+        """
+        start_time_col = self.get_column_name("Start Time", prediction=prediction)
+        end_time_col = self.get_column_name("End Time", prediction=prediction)
+
+        if (
+            self.RAVEN_FILE_OFFSET_COLUMN not in df.columns
+            or start_time_col == self.RAVEN_FILE_OFFSET_COLUMN
+            or start_time_col not in df.columns
+        ):
+            return df
+
+        # Rows without a file offset are kept as they are
+        shift = (df[self.RAVEN_FILE_OFFSET_COLUMN] - df[start_time_col]).fillna(0)
+
+        if shift.any():
+            df[start_time_col] = df[start_time_col] + shift
+
+            if end_time_col in df.columns:
+                df[end_time_col] = df[end_time_col] + shift
+
+        return df
+
     def _prepare_dataframe(self, df: pd.DataFrame, prediction: bool) -> pd.DataFrame:
         """
         Prepares a DataFrame by adding a 'recording_filename' column.
 
         This method extracts the recording filename from either a specified 'Recording' column
-        or from the 'source_file' column to ensure traceability.
+        or from the 'source_file' column to ensure traceability. Times of combined Raven selection
+        tables are converted to times within each recording.
 
         Args:
             df (pd.DataFrame): The DataFrame to prepare.
@@ -260,6 +370,8 @@ class DataProcessor:
         Returns:
             pd.DataFrame: The prepared DataFrame with the added 'recording_filename' column.
         """
+        df = self._align_file_offsets(df, prediction)
+
         # Determine the relevant column for extracting recording filenames
         recording_col = self.get_column_name("Recording", prediction=prediction)
 
@@ -281,32 +393,59 @@ class DataProcessor:
         Processes the loaded data, aligns predictions and annotations with sample intervals,
         and updates the samples DataFrame.
 
-        This method iterates through all recording filenames, processes each recording,
-        and aggregates the results into the `samples_df` attribute.
+        This method splits predictions and annotations by recording filename in a single pass,
+        processes each recording (in parallel if `threads` > 1), and concatenates the results
+        into the `samples_df`, `prediction_tensors` and `label_tensors` attributes once.
         """
-        self.samples_df = pd.DataFrame()  # Initialize the samples DataFrame
+        # Split predictions and annotations by recording in one pass each
+        pred_groups = dict(tuple(self.predictions_df.groupby("recording_filename", sort=False)))
+        annot_groups = dict(tuple(self.annotations_df.groupby("recording_filename", sort=False)))
 
-        # Get the unique set of recording filenames from both predictions and annotations
-        recording_filenames = set(self.predictions_df["recording_filename"].unique()).union(
-            set(self.annotations_df["recording_filename"].unique())
-        )
+        # Recordings without predictions or annotations get an empty DataFrame for the missing side
+        empty_pred_df = self.predictions_df.iloc[:0]
+        empty_annot_df = self.annotations_df.iloc[:0]
 
-        # Process each recording
-        for recording_filename in recording_filenames:
-            # Filter predictions and annotations for the current recording
-            pred_df = self.predictions_df[self.predictions_df["recording_filename"] == recording_filename]
-            annot_df = self.annotations_df[self.annotations_df["recording_filename"] == recording_filename]
+        items = [
+            (recording_filename, pred_groups.get(recording_filename, empty_pred_df), annot_df)
+            for recording_filename, annot_df in annot_groups.items()
+        ]
+        items += [
+            (recording_filename, pred_df, empty_annot_df)
+            for recording_filename, pred_df in pred_groups.items()
+            if recording_filename not in annot_groups
+        ]
 
-            # Generate sample intervals and annotations for the recording
-            samples_df = self.process_recording(recording_filename, pred_df, annot_df)
+        # Generate sample intervals and annotations for each recording
+        if self.threads > 1 and len(items) > 1:
+            # Workers only need the settings, not the loaded data
+            processor = copy.copy(self)
+            processor.predictions_df = processor.annotations_df = processor.samples_df = pd.DataFrame()
 
-            # Append the processed DataFrame to the overall samples DataFrame
-            self.samples_df = pd.concat([self.samples_df, samples_df], ignore_index=True)
+            chunksize = max(1, len(items) // (4 * self.threads))
+
+            with Pool(min(self.threads, len(items)), initializer=_init_worker, initargs=(processor,)) as pool:
+                results = pool.map(_process_recording_worker, items, chunksize=chunksize)
+        else:
+            results = [self.process_recording(*item) for item in items]
 
-    def process_recording(self, recording_filename: str, pred_df: pd.DataFrame, annot_df: pd.DataFrame) -> pd.DataFrame:
+        # Concatenate all processed recordings at once
+        results = [result for result in results if not result[0].empty]
+
+        if results:
+            self.samples_df = pd.concat([result[0] for result in results], ignore_index=True)
+            self.prediction_tensors = np.concatenate([result[1] for result in results])
+            self.label_tensors = np.concatenate([result[2] for result in results])
+        else:
+            self.samples_df = pd.DataFrame()
+            self.prediction_tensors = np.empty((0, len(self.classes)), dtype=np.float32)
+            self.label_tensors = np.empty((0, len(self.classes)), dtype=np.uint8)
+
+    def process_recording(
+        self, recording_filename: str, pred_df: pd.DataFrame, annot_df: pd.DataFrame
+    ) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
         """
         Processes a single recording by determining its duration, initializing sample intervals,
-        and updating the intervals with predictions and annotations.
+        and filling the confidence scores and annotations of the intervals.
 
         Args:
             recording_filename (str): The name of the recording.
@@ -314,25 +453,26 @@ class DataProcessor:
             annot_df (pd.DataFrame): Annotations DataFrame specific to the recording.
 
         Returns:
-            pd.DataFrame: A DataFrame containing sample intervals with prediction and annotation data.
+            Tuple[pd.DataFrame, np.ndarray, np.ndarray]: A DataFrame containing the sample intervals, and
+            arrays of shape (samples, classes) with their confidence scores and annotations.
         """
         # Determine the duration of the recording
         file_duration = self.determine_file_duration(pred_df, annot_df)
 
-        if file_duration <= 0:
-            # Return an empty DataFrame if the duration is invalid
-            return pd.DataFrame()
-
-        # Initialize sample intervals for the recording
+        # Initialize sample intervals for the recording, empty if the duration is invalid
         samples_df = self.initialize_samples(recording_filename=recording_filename, file_duration=file_duration)
+        predictions, labels = self.initialize_tensors(len(samples_df))
+
+        if samples_df.empty:
+            return samples_df, predictions, labels
 
-        # Update the samples DataFrame with prediction data
-        self.update_samples_with_predictions(pred_df, samples_df)
+        # Update the confidence scores with prediction data
+        self.update_samples_with_predictions(pred_df, samples_df, predictions)
 
-        # Update the samples DataFrame with annotation data
-        self.update_samples_with_annotations(annot_df, samples_df)
+        # Update the annotations with annotation data
+        self.update_samples_with_annotations(annot_df, samples_df, labels)
 
-        return samples_df
+        return samples_df, predictions, labels
 
     def determine_file_duration(self, pred_df: pd.DataFrame, annot_df: pd.DataFrame) -> float:
         """
@@ -389,15 +529,15 @@ class DataProcessor:
         Initializes a DataFrame of time-based sample intervals for the specified recording.
 
         Samples are evenly spaced time intervals of length `sample_duration` that cover the
-        entire recording duration. Each sample is initialized with confidence scores and
-        annotation values for all classes.
+        entire recording duration. Confidence scores and annotations are not part of the
+        DataFrame, see `initialize_tensors`.
 
         Args:
             recording_filename (str): The name of the recording.
             file_duration (float): The total duration of the recording in seconds.
 
         Returns:
-            pd.DataFrame: A DataFrame containing initialized sample intervals, confidence scores, and annotations.
+            pd.DataFrame: A DataFrame containing the filename, index, start and end time of each sample.
                          Returns an empty DataFrame if the file duration is less than or equal to 0.
         """
         if file_duration <= 0:
@@ -409,37 +549,85 @@ class DataProcessor:
         if len(intervals) == 0:
             intervals = np.array([0])
 
-        # Prepare sample structure
-        samples = {
-            "filename": recording_filename,
-            "sample_index": [],
-            "start_time": [],
-            "end_time": [],
-        }
+        return pd.DataFrame(
+            {
+                "filename": recording_filename,
+                "sample_index": np.arange(len(intervals)),
+                "start_time": intervals,
+                "end_time": np.minimum(intervals + self.sample_duration, file_duration),
+            }
+        )
 
-        for idx, start in enumerate(intervals):
-            samples["sample_index"].append(idx)
-            samples["start_time"].append(start)
-            samples["end_time"].append(min(start + self.sample_duration, file_duration))
+    def initialize_tensors(self, num_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Initializes the confidence scores and annotations of a number of samples with zeros.
+
+        Args:
+            num_samples (int): The number of samples.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Confidence scores (float32) and annotations (uint8),
+            both of shape (num_samples, number of classes).
+        """
+        shape = (num_samples, len(self.classes))
+
+        return np.zeros(shape, dtype=np.float32), np.zeros(shape, dtype=np.uint8)
+
+    def _find_overlapping_samples(
+        self, samples_df: pd.DataFrame, begin_times: np.ndarray, end_times: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the samples that overlap with each interval by at least `min_overlap`.
+
+        The samples are expected in the order created by `initialize_samples`, so their start and
+        end times are sorted and the overlapping samples of an interval form a contiguous range,
+        which is located with a binary search.
+
+        Args:
+            samples_df (pd.DataFrame): DataFrame of samples with 'start_time' and 'end_time' columns.
+            begin_times (np.ndarray): Begin times of the intervals.
+            end_times (np.ndarray): End times of the intervals.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The interval index and the sample position of each
+            overlapping (interval, sample) pair.
+        """
+        sample_starts = samples_df["start_time"].to_numpy(dtype=np.float64)
+        sample_ends = samples_df["end_time"].to_numpy(dtype=np.float64)
+
+        # Range of samples with end_time >= begin + min_overlap and start_time <= end - min_overlap
+        first = np.searchsorted(sample_ends, begin_times + self.min_overlap, side="left")
+        last = np.searchsorted(sample_starts, end_times - self.min_overlap, side="right")
+
+        # Intervals with missing times do not overlap any sample
+        counts = np.where(np.isnan(begin_times) | np.isnan(end_times), 0, np.maximum(last - first, 0))
 
-        # Initialize confidence scores and annotations for each class
-        for label in self.classes:
-            samples[f"{label}_confidence"] = [0.0] * len(samples["sample_index"])  # Float values
-            samples[f"{label}_annotation"] = [0] * len(samples["sample_index"])  # Integer values
+        intervals = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
 
-        return pd.DataFrame(samples)
+        return intervals, first[intervals] + offsets
 
-    def update_samples_with_predictions(self, pred_df: pd.DataFrame, samples_df: pd.DataFrame) -> None:
+    def _get_class_indices(self, class_names: pd.Series) -> np.ndarray:
         """
-        Updates the samples DataFrame with prediction confidence scores.
+        Maps class names to their index in `self.classes`, or -1 for classes that are not included.
+        """
+        return pd.Index(self.classes).get_indexer(class_names)
+
+    def update_samples_with_predictions(
+        self, pred_df: pd.DataFrame, samples_df: pd.DataFrame, predictions: np.ndarray
+    ) -> None:
+        """
+        Updates the confidence scores of the samples with predictions.
 
         For each prediction in the predictions DataFrame, this method identifies overlapping
         samples based on the specified `min_overlap`. It then updates the confidence scores
         for those samples, retaining the maximum confidence value if multiple predictions overlap.
+        All predictions are assigned to samples at once.
 
         Args:
             pred_df (pd.DataFrame): DataFrame containing prediction information.
-            samples_df (pd.DataFrame): DataFrame of samples to be updated with confidence scores.
+            samples_df (pd.DataFrame): DataFrame of samples to match the predictions with.
+            predictions (np.ndarray): Confidence scores of the samples, updated in place.
         """
         # Retrieve the column names for predictions
         class_col = self.get_column_name("Class", prediction=True)
@@ -447,95 +635,96 @@ class DataProcessor:
         end_time_col = self.get_column_name("End Time", prediction=True)
         confidence_col = self.get_column_name("Confidence", prediction=True)
 
-        # Iterate through each prediction row
-        for _, row in pred_df.iterrows():
-            class_name = row[class_col]
-            if class_name not in self.classes:
-                continue  # Skip predictions for classes not included in the predefined list
+        # Skip predictions for classes not included in the predefined list
+        class_indices = self._get_class_indices(pred_df[class_col])
+        pred_df = pred_df[class_indices >= 0]
+        class_indices = class_indices[class_indices >= 0]
+
+        if pred_df.empty:
+            return
 
-            # Extract start and end times, and confidence score
-            begin_time = row[start_time_col]
-            end_time = row[end_time_col]
-            confidence = row.get(confidence_col, 0.0)
+        confidences = (
+            pred_df[confidence_col].to_numpy(dtype=np.float64)
+            if confidence_col in pred_df.columns
+            else np.zeros(len(pred_df))
+        )
 
-            # Identify samples that overlap with the prediction based on min_overlap
-            sample_indices = samples_df[
-                (samples_df["start_time"] <= end_time - self.min_overlap)
-                & (samples_df["end_time"] >= begin_time + self.min_overlap)
-            ].index
+        # Identify samples that overlap with the predictions based on min_overlap
+        intervals, sample_positions = self._find_overlapping_samples(
+            samples_df,
+            pred_df[start_time_col].to_numpy(dtype=np.float64),
+            pred_df[end_time_col].to_numpy(dtype=np.float64),
+        )
 
-            # Update the confidence scores for the overlapping samples
-            for i in sample_indices:
-                current_confidence = samples_df.loc[i, f"{class_name}_confidence"]
-                samples_df.loc[i, f"{class_name}_confidence"] = max(current_confidence, confidence)
+        # Keep the maximum confidence of overlapping predictions, missing confidences are ignored
+        np.fmax.at(predictions, (sample_positions, class_indices[intervals]), confidences[intervals])
 
-    def update_samples_with_annotations(self, annot_df: pd.DataFrame, samples_df: pd.DataFrame) -> None:
+    def update_samples_with_annotations(
+        self, annot_df: pd.DataFrame, samples_df: pd.DataFrame, labels: np.ndarray
+    ) -> None:
         """
-        Updates the samples DataFrame with annotations.
+        Updates the annotations of the samples.
 
         For each annotation in the annotations DataFrame, this method identifies overlapping
         samples based on the specified `min_overlap`. It sets the annotation value to 1
-        for the overlapping samples.
+        for the overlapping samples. All annotations are assigned to samples at once.
 
         Args:
             annot_df (pd.DataFrame): DataFrame containing annotation information.
-            samples_df (pd.DataFrame): DataFrame of samples to be updated with annotations.
+            samples_df (pd.DataFrame): DataFrame of samples to match the annotations with.
+            labels (np.ndarray): Annotations of the samples, updated in place.
         """
         # Retrieve the column names for annotations
         class_col = self.get_column_name("Class", prediction=False)
         start_time_col = self.get_column_name("Start Time", prediction=False)
         end_time_col = self.get_column_name("End Time", prediction=False)
 
-        # Iterate through each annotation row
-        for _, row in annot_df.iterrows():
-            class_name = row[class_col]
-            if class_name not in self.classes:
-                continue  # Skip annotations for classes not included in the predefined list
+        # Skip annotations for classes not included in the predefined list
+        class_indices = self._get_class_indices(annot_df[class_col])
+        annot_df = annot_df[class_indices >= 0]
+        class_indices = class_indices[class_indices >= 0]
 
-            # Extract start and end times
-            begin_time = row[start_time_col]
-            end_time = row[end_time_col]
+        if annot_df.empty:
+            return
 
-            # Identify samples that overlap with the annotation based on min_overlap
-            sample_indices = samples_df[
-                (samples_df["start_time"] <= end_time - self.min_overlap)
-                & (samples_df["end_time"] >= begin_time + self.min_overlap)
-            ].index
+        # Identify samples that overlap with the annotations based on min_overlap
+        intervals, sample_positions = self._find_overlapping_samples(
+            samples_df,
+            annot_df[start_time_col].to_numpy(dtype=np.float64),
+            annot_df[end_time_col].to_numpy(dtype=np.float64),
+        )
 
-            # Set annotation value to 1 for the overlapping samples
-            for i in sample_indices:
-                samples_df.loc[i, f"{class_name}_annotation"] = 1
+        # Set annotation value to 1 for the overlapping samples
+        labels[sample_positions, class_indices[intervals]] = 1
 
     def create_tensors(self) -> None:
         """
-        Creates prediction and label tensors from the samples DataFrame.
+        Finalizes the prediction and label tensors built by `process_data`.
 
-        This method converts confidence scores and annotations for each class into
-        numpy arrays (tensors). It ensures that there are no NaN values in the DataFrame
-        before creating the tensors.
+        The tensors are stored as contiguous arrays of shape (samples, classes), with float32
+        confidence scores and uint8 annotations. This method ensures that they match the samples
+        DataFrame and contain no NaN values.
 
         Raises:
-            ValueError: If NaN values are found in confidence or annotation columns.
+            ValueError: If NaN values are found in the confidence scores, or the tensors do not match the samples.
         """
         if self.samples_df.empty:
             # Initialize empty tensors if samples DataFrame is empty
-            self.prediction_tensors = np.empty((0, len(self.classes)), dtype=np.float32)
-            self.label_tensors = np.empty((0, len(self.classes)), dtype=np.int64)
+            self.prediction_tensors, self.label_tensors = self.initialize_tensors(0)
             return
 
-        # Check for NaN values in annotation columns
-        annotation_columns = [f"{cls}_annotation" for cls in self.classes]
-        if self.samples_df[annotation_columns].isnull().values.any():
-            raise ValueError("NaN values found in annotation columns.")
+        if self.prediction_tensors.shape != (len(self.samples_df), len(self.classes)):
+            raise ValueError("Prediction tensors do not match the samples.")
+
+        if self.label_tensors.shape != self.prediction_tensors.shape:
+            raise ValueError("Label tensors do not match the samples.")
 
-        # Check for NaN values in confidence columns
-        confidence_columns = [f"{cls}_confidence" for cls in self.classes]
-        if self.samples_df[confidence_columns].isnull().values.any():
-            raise ValueError("NaN values found in confidence columns.")
+        # Check for NaN values in confidence scores, annotations are integers and cannot be NaN
+        if np.isnan(self.prediction_tensors).any():
+            raise ValueError("NaN values found in confidence scores.")
 
-        # Convert confidence scores and annotations into numpy arrays (tensors)
-        self.prediction_tensors = self.samples_df[confidence_columns].to_numpy(dtype=np.float32)
-        self.label_tensors = self.samples_df[annotation_columns].to_numpy(dtype=np.int64)
+        self.prediction_tensors = np.ascontiguousarray(self.prediction_tensors, dtype=np.float32)
+        self.label_tensors = np.ascontiguousarray(self.label_tensors, dtype=np.uint8)
 
     def get_column_name(self, field_name: str, prediction: bool = True) -> str:
         """
@@ -573,14 +762,41 @@ class DataProcessor:
         """
         Retrieves the DataFrame containing all sample intervals, prediction scores, and annotations.
 
-        This method provides a copy of the `samples_df` DataFrame, ensuring that the original
-        data is not modified when accessed externally.
+        This method combines a copy of the `samples_df` DataFrame with the prediction and label
+        tensors, adding a `{class}_confidence` and a `{class}_annotation` column for each class.
+
+        Returns:
+            pd.DataFrame: A DataFrame which contains the sampled data.
+        """
+        if self.samples_df.empty:
+            return self.samples_df.copy()
+
+        columns = {}
+
+        for i, label in enumerate(self.classes):
+            columns[f"{label}_confidence"] = self.prediction_tensors[:, i]
+            columns[f"{label}_annotation"] = self.label_tensors[:, i]
+
+        # Build all class columns at once instead of inserting them one by one
+        return pd.concat([self.samples_df, pd.DataFrame(columns, index=self.samples_df.index)], axis=1)
+
+    def get_filtered_recordings(self, selected_recordings: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Returns the recording of each sample, in the order of the tensors of `get_filtered_tensors`.
+
+        Args:
+            selected_recordings (List[str], optional): A list of recording filenames to filter by. If None,
+                all recordings are included.
 
         Returns:
-            pd.DataFrame: A copy of the `samples_df` DataFrame, which contains the sampled data.
+            np.ndarray: The recording filename of each selected sample.
         """
-        # Return a copy of the samples DataFrame to preserve data integrity
-        return self.samples_df.copy()
+        filenames = self.samples_df["filename"] if "filename" in self.samples_df.columns else pd.Series(dtype=object)
+
+        if selected_recordings is not None:
+            filenames = filenames[filenames.isin(selected_recordings)]
+
+        return filenames.to_numpy()
 
     def get_filtered_tensors(
         self,
@@ -608,7 +824,6 @@ class DataProcessor:
 
         Raises:
             ValueError: If the `samples_df` is empty or missing required columns.
-            KeyError: If required confidence or annotation columns are missing in the DataFrame.
         """
         if self.samples_df.empty:
             raise ValueError("samples_df is empty.")
@@ -624,31 +839,17 @@ class DataProcessor:
         if not classes:
             raise ValueError("No valid classes selected.")
 
-        # Create a mask for filtering samples
-        mask = pd.Series(True, index=self.samples_df.index)
+        # Select the tensor columns of the classes
+        class_indices = pd.Index(self.classes).get_indexer(classes)
 
-        # Apply recording-based filtering if specified
+        # Apply recording-based filtering if specified, an empty list selects no samples
         if selected_recordings is not None:
-            if selected_recordings:
-                mask &= self.samples_df["filename"].isin(selected_recordings)
-            else:
-                # If `selected_recordings` is an empty list, select no samples
-                mask = pd.Series(False, index=self.samples_df.index)
-
-        # Filter the samples DataFrame using the mask
-        filtered_samples = self.samples_df.loc[mask]
-
-        # Prepare column names for confidence and annotation data
-        confidence_columns = [f"{cls}_confidence" for cls in classes]
-        annotation_columns = [f"{cls}_annotation" for cls in classes]
-
-        # Ensure all required columns are present in the filtered DataFrame
-        if not all(col in filtered_samples.columns for col in confidence_columns + annotation_columns):
-            raise KeyError("Required confidence or annotation columns are missing.")
-
-        # Convert filtered data into numpy arrays
-        predictions = filtered_samples[confidence_columns].to_numpy(dtype=np.float32)
-        labels = filtered_samples[annotation_columns].to_numpy(dtype=np.int64)
+            sample_indices = np.flatnonzero(self.samples_df["filename"].isin(selected_recordings).to_numpy())
+            predictions = self.prediction_tensors[np.ix_(sample_indices, class_indices)]
+            labels = self.label_tensors[np.ix_(sample_indices, class_indices)]
+        else:
+            predictions = self.prediction_tensors[:, class_indices]
+            labels = self.label_tensors[:, class_indices]
 
         # Return the tensors and the list of filtered classes
         return predictions, labels, classes
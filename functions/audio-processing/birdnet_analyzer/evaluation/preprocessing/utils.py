@@ -3,15 +3,23 @@ Utility Functions for Data Processing Tasks
 
 This module provides helper functions to handle common data processing tasks, such as:
 - Extracting recording filenames from file paths or filenames.
-- Reading and concatenating text files from a specified directory.
+- Reading tab-separated text files and columnar files (Parquet, Arrow/Feather), optionally in chunks.
+- Reading and concatenating these files from a specified directory.
 
 It is designed to work seamlessly with pandas and file system operations.
 """
 
+import codecs
 import os
-from typing import List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
 import pandas as pd
 
+# File extensions of tab-separated text files and columnar files
+TEXT_EXTENSIONS = (".txt",)
+PARQUET_EXTENSIONS = (".parquet",)
+ARROW_EXTENSIONS = (".arrow", ".feather")
+
 
 def extract_recording_filename(path_column: pd.Series) -> pd.Series:
     """
@@ -47,19 +55,174 @@ def extract_recording_filename_from_filename(filename_series: pd.Series) -> pd.S
     return filename_series.apply(lambda x: x.split(".")[0] if isinstance(x, str) else x)
 
 
-def read_and_concatenate_files_in_directory(directory_path: str) -> pd.DataFrame:
+def _select_columns(columns: List[str], usecols: Optional[Callable[[str], bool]]) -> List[str]:
+    """
+    Returns the columns accepted by `usecols`, or all columns if `usecols` is None.
+    """
+    return list(columns) if usecols is None else [col for col in columns if usecols(col)]
+
+
+def _is_utf8(filepath: str, block_size: int = 1 << 20) -> bool:
+    """
+    Checks whether a file is valid UTF-8 without loading it into memory.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    try:
+        with open(filepath, "rb") as f:
+            while block := f.read(block_size):
+                decoder.decode(block)
+
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+
+    return True
+
+
+def iter_file_chunks(
+    filepath: str,
+    usecols: Optional[Callable[[str], bool]] = None,
+    dtype: Optional[Dict[str, Union[str, type]]] = None,
+    chunksize: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lazily read a tab-separated text file or a columnar file in chunks.
+
+    Text files are parsed with the given dtypes, falling back to 'latin-1' encoding if they are not
+    valid UTF-8. Parquet and Arrow/Feather files are read with pandas (which requires pyarrow) and
+    are always returned as a single chunk, only the selected columns are read from them.
+
+    Args:
+        filepath (str): Path to the file.
+        usecols (Optional[Callable[[str], bool]]): Returns whether a column should be read. Reads all columns if None.
+        dtype (Optional[Dict[str, Union[str, type]]]): Data types of text file columns, missing columns are ignored.
+        chunksize (Optional[int]): Number of rows per chunk of a text file. Reads the whole file at once if None.
+
+    Yields:
+        pd.DataFrame: The chunks of the file.
+
+    Raises:
+        ValueError: If the file type is not supported.
+    """
+    extension = os.path.splitext(filepath)[1].lower()
+
+    if extension in PARQUET_EXTENSIONS or extension in ARROW_EXTENSIONS:
+        import pyarrow.parquet as pq
+        from pyarrow import ipc
+
+        # Read the schema first, so only existing columns are requested
+        if extension in PARQUET_EXTENSIONS:
+            columns = _select_columns(pq.read_schema(filepath).names, usecols)
+            yield pd.read_parquet(filepath, columns=columns)
+        else:
+            with ipc.open_file(filepath) as reader:
+                columns = _select_columns(reader.schema.names, usecols)
+            yield pd.read_feather(filepath, columns=columns)
+
+        return
+
+    if extension not in TEXT_EXTENSIONS:
+        raise ValueError(f"Unsupported file type: {filepath}")
+
+    def read(encoding: str):
+        # Parse the header first, so dtypes are only given for existing columns
+        header = pd.read_csv(filepath, sep="\t", encoding=encoding, nrows=0).columns
+        columns = _select_columns(header, usecols)
+        dtypes = {col: t for col, t in (dtype or {}).items() if col in columns}
+
+        return pd.read_csv(filepath, sep="\t", encoding=encoding, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+    if chunksize is None:
+        try:
+            # Attempt to read the file with UTF-8 encoding
+            df = read("utf-8")
+        except UnicodeDecodeError:
+            # Fallback to 'latin-1' encoding if UTF-8 fails
+            df = read("latin-1")
+
+        yield df
+    else:
+        # Chunks cannot be read again after a decoding error, so the encoding is checked beforehand
+        with read("utf-8" if _is_utf8(filepath) else "latin-1") as reader:
+            yield from reader
+
+
+def iter_files_in_directory(
+    directory_path: str,
+    usecols: Optional[Callable[[str], bool]] = None,
+    dtype: Optional[Dict[str, Union[str, type]]] = None,
+    chunksize: Optional[int] = None,
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Lazily read all supported files in a directory in chunks.
+
+    Supported are tab-separated .txt files as well as Parquet (.parquet) and Arrow (.arrow, .feather) files.
+
+    Args:
+        directory_path (str): Path to the directory containing the files.
+        usecols (Optional[Callable[[str], bool]]): Returns whether a column should be read. Reads all columns if None.
+        dtype (Optional[Dict[str, Union[str, type]]]): Data types of text file columns.
+        chunksize (Optional[int]): Number of rows per chunk of a text file. Reads whole files if None.
+
+    Yields:
+        Tuple[str, pd.DataFrame]: The filename and a chunk of the file.
+    """
+    extensions = TEXT_EXTENSIONS + PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+    for filename in os.listdir(directory_path):
+        if filename.lower().endswith(extensions):
+            for chunk in iter_file_chunks(os.path.join(directory_path, filename), usecols, dtype, chunksize):
+                yield filename, chunk
+
+
+def read_file(
+    filepath: str,
+    usecols: Optional[Callable[[str], bool]] = None,
+    dtype: Optional[Dict[str, Union[str, type]]] = None,
+    chunksize: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Read a tab-separated text file or a columnar file into a single DataFrame.
+
+    Args:
+        filepath (str): Path to the file.
+        usecols (Optional[Callable[[str], bool]]): Returns whether a column should be read. Reads all columns if None.
+        dtype (Optional[Dict[str, Union[str, type]]]): Data types of text file columns.
+        chunksize (Optional[int]): Number of rows per chunk of a text file. Reads the whole file at once if None.
+
+    Returns:
+        pd.DataFrame: The data of the file.
     """
-    Read and concatenate all .txt files in a directory into a single DataFrame.
+    chunks = list(iter_file_chunks(filepath, usecols, dtype, chunksize))
 
-    This function scans the specified directory for all .txt files, reads each file into a DataFrame,
-    appends a 'source_file' column containing the filename, and concatenates all DataFrames into one.
-    If the files have inconsistent columns, a ValueError is raised.
+    if len(chunks) == 1:
+        return chunks[0]
+
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def read_and_concatenate_files_in_directory(
+    directory_path: str,
+    usecols: Optional[Callable[[str], bool]] = None,
+    dtype: Optional[Dict[str, Union[str, type]]] = None,
+    chunksize: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Read and concatenate all supported files in a directory into a single DataFrame.
+
+    This function scans the specified directory for .txt, Parquet and Arrow files, reads each file
+    (in chunks, if `chunksize` is given), appends a 'source_file' column containing the filename,
+    and concatenates all DataFrames into one. If the files have inconsistent columns, a ValueError is raised.
 
     Args:
-        directory_path (str): Path to the directory containing the .txt files.
+        directory_path (str): Path to the directory containing the files.
+        usecols (Optional[Callable[[str], bool]]): Returns whether a column should be read. Reads all columns if None.
+        dtype (Optional[Dict[str, Union[str, type]]]): Data types of text file columns.
+        chunksize (Optional[int]): Number of rows per chunk of a text file. Reads whole files if None.
 
     Returns:
-        pd.DataFrame: A concatenated DataFrame containing the data from all .txt files,
+        pd.DataFrame: A concatenated DataFrame containing the data from all files,
         or an empty DataFrame if no files are found.
 
     Raises:
@@ -68,31 +231,21 @@ def read_and_concatenate_files_in_directory(directory_path: str) -> pd.DataFrame
     df_list: List[pd.DataFrame] = []  # List to hold individual DataFrames
     columns_set = None  # To ensure consistency in column names
 
-    # Iterate through each file in the directory
-    for filename in os.listdir(directory_path):
-        if filename.endswith(".txt"):
-            filepath = os.path.join(directory_path, filename)  # Construct the full file path
-
-            try:
-                # Attempt to read the file as a tab-separated values file with UTF-8 encoding
-                df = pd.read_csv(filepath, sep="\t", encoding="utf-8")
-            except UnicodeDecodeError:
-                # Fallback to 'latin-1' encoding if UTF-8 fails
-                df = pd.read_csv(filepath, sep="\t", encoding="latin-1")
-
-            # Check for column consistency across files
-            if columns_set is None:
-                columns_set = set(df.columns)  # Initialize with the first file's columns
-            elif set(df.columns) != columns_set:
-                raise ValueError(f"File {filename} has different columns than the previous files.")
+    # Iterate through the chunks of each file in the directory
+    for filename, df in iter_files_in_directory(directory_path, usecols, dtype, chunksize):
+        # Check for column consistency across files
+        if columns_set is None:
+            columns_set = set(df.columns)  # Initialize with the first file's columns
+        elif set(df.columns) != columns_set:
+            raise ValueError(f"File {filename} has different columns than the previous files.")
 
-            # Add a column to indicate the source file for traceability
-            df["source_file"] = filename
+        # Add a column to indicate the source file for traceability
+        df["source_file"] = filename
 
-            # Append the DataFrame to the list
-            df_list.append(df)
+        # Append the DataFrame to the list
+        df_list.append(df)
 
     # Concatenate all DataFrames if any were processed, else return an empty DataFrame
     if df_list:
         return pd.concat(df_list, ignore_index=True)
-    return pd.DataFrame()  # Return an empty DataFrame if no .txt files were found
+    return pd.DataFrame()  # Return an empty DataFrame if no supported files were found
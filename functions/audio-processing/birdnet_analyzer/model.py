@@ -60,7 +60,7 @@ def get_empty_class_exception():
     return EMPTY_CLASS_EXCEPTION_REF
 
 
-def label_smoothing(y: np.ndarray, alpha=0.1):
+def label_smoothing(y: np.ndarray, alpha=0.1, size=None):
     """
     Applies label smoothing to the given labels.
     Label smoothing is a technique used to prevent the model from becoming overconfident by adjusting the target labels.
@@ -68,6 +68,8 @@ def label_smoothing(y: np.ndarray, alpha=0.1):
     Args:
         y (numpy.ndarray): Array of labels to be smoothed. The array should be of shape (num_labels,).
         alpha (float, optional): Smoothing parameter. Default is 0.1.
+        size (int, optional): Number of values alpha is distributed over, e.g. the size of the full data
+            when smoothing a batch. Defaults to y.shape[0].
     Returns:
         numpy.ndarray: The smoothed labels.
     """
@@ -75,29 +77,35 @@ def label_smoothing(y: np.ndarray, alpha=0.1):
     y[y > 0] -= alpha
 
     # Assigned alpha to all other labels
-    y[y == 0] = alpha / y.shape[0]
+    y[y == 0] = alpha / (size or y.shape[0])
 
     return y
 
 
-def mixup(x, y, augmentation_ratio=0.25, alpha=0.2):
+def mixup(x, y, augmentation_ratio=0.25, alpha=0.2, rng=None):
     """Apply mixup to the given data.
 
     Mixup is a data augmentation technique that generates new samples by
     mixing two samples and their labels.
 
+    Pairs and mixing coefficients are drawn for all samples at once.
+    Each augmented sample is mixed with a different positive sample.
+
     Args:
         x: Samples.
         y: One-hot labels.
         augmentation_ratio: The ratio of augmented samples.
         alpha: The beta distribution parameter.
+        rng: Random generator to use, e.g. to draw new pairs for every batch.
+            Defaults to numpy's global generator seeded with cfg.RANDOM_SEED.
 
     Returns:
         Augmented data.
     """
-
-    # Set numpy random seed
-    np.random.seed(cfg.RANDOM_SEED)
+    if rng is None:
+        # Set numpy random seed
+        np.random.seed(cfg.RANDOM_SEED)
+        rng = np.random
 
     # Get indices of all positive samples
     positive_indices = np.unique(np.where(y[:, :] == 1)[0])
@@ -105,51 +113,63 @@ def mixup(x, y, augmentation_ratio=0.25, alpha=0.2):
     # Calculate the number of samples to augment based on the ratio
     num_samples_to_augment = int(len(positive_indices) * augmentation_ratio)
 
-    # Indices of samples, that are already mixed up
-    mixed_up_indices = []
+    if num_samples_to_augment == 0 or len(positive_indices) < 2:
+        return x, y
 
-    for _ in range(num_samples_to_augment):
-        # Randomly choose one instance from the positive samples
-        index = np.random.choice(positive_indices)
+    # Choose distinct samples to replace with augmented samples
+    order = rng.permutation(len(positive_indices))[:num_samples_to_augment]
 
-        # Choose another one, when the chosen one was already mixed up
-        while index in mixed_up_indices:
-            index = np.random.choice(positive_indices)
+    # Choose a different positive sample for each of them
+    offsets = rng.randint(1, len(positive_indices), size=num_samples_to_augment)
+    indices = positive_indices[order]
+    second_indices = positive_indices[(order + offsets) % len(positive_indices)]
 
-        x1, y1 = x[index], y[index]
+    # Generate random mixing coefficients (lambda)
+    lambdas = rng.beta(alpha, alpha, size=(num_samples_to_augment, 1))
+
+    # Mix the embeddings and labels of the original samples
+    mixed_x = lambdas * x[indices] + (1 - lambdas) * x[second_indices]
+    mixed_y = lambdas * y[indices] + (1 - lambdas) * y[second_indices]
+
+    # Replace one of the original samples and labels with the augmented sample and labels
+    x[indices] = mixed_x
+    y[indices] = mixed_y
+
+    return x, y
 
-        # Randomly choose a different instance from the dataset
-        second_index = np.random.choice(positive_indices)
 
-        # Choose again, when the same or an already mixed up sample was selected
-        while second_index == index or second_index in mixed_up_indices:
-            second_index = np.random.choice(positive_indices)
-        x2, y2 = x[second_index], y[second_index]
+def _shuffled_ranks(groups):
+    """Assigns every member of a group a random rank within its group.
 
-        # Generate a random mixing coefficient (lambda)
-        lambda_ = np.random.beta(alpha, alpha)
+    Args:
+        groups: Group id of each member.
 
-        # Mix the embeddings and labels
-        mixed_x = lambda_ * x1 + (1 - lambda_) * x2
-        mixed_y = lambda_ * y1 + (1 - lambda_) * y2
+    Returns:
+        A tuple of (ranks, counts), where counts is the size of the group of each member.
+    """
+    # Random order within the groups, members of a group are contiguous
+    order = np.random.permutation(len(groups))
+    order = order[np.argsort(groups[order], kind="stable")]
 
-        # Replace one of the original samples and labels with the augmented sample and labels
-        x[index] = mixed_x
-        y[index] = mixed_y
+    _, starts, counts = np.unique(groups[order], return_index=True, return_counts=True)
+    ranks = np.empty(len(groups), dtype=int)
+    ranks[order] = np.arange(len(groups)) - np.repeat(starts, counts)
+    group_counts = np.empty(len(groups), dtype=int)
+    group_counts[order] = np.repeat(counts, counts)
 
-        # Mark the sample as already mixed up
-        mixed_up_indices.append(index)
+    return ranks, group_counts
 
-    del mixed_x
-    del mixed_y
 
-    return x, y
+def _num_train_samples(num_samples, val_ratio):
+    """Number of training samples of a group, at least one sample stays in the training set."""
+    return np.maximum(1, np.floor(np.multiply(num_samples, 1 - val_ratio)).astype(int))
 
 
 def random_split(x, y, val_ratio=0.2):
     """Splits the data into training and validation data.
 
     Makes sure that each class is represented in both sets.
+    The split is computed on indices, so x is only gathered once.
 
     Args:
         x: Samples.
@@ -163,77 +183,36 @@ def random_split(x, y, val_ratio=0.2):
     # Set numpy random seed
     np.random.seed(cfg.RANDOM_SEED)
 
-    # Get number of classes
-    num_classes = y.shape[1]
-
-    # Initialize training and validation data
-    x_train, y_train, x_val, y_val = [], [], [], []
-
-    # Split data
-    for i in range(num_classes):
-        # Get indices of positive samples of current class
-        positive_indices = np.where(y[:, i] == 1)[0]
-
-        # Get indices of negative samples of current class
-        negative_indices = np.where(y[:, i] == -1)[0]
-
-        # Get number of samples for each set
-        num_samples = len(positive_indices)
-        num_samples_train = max(1, int(num_samples * (1 - val_ratio)))
-        num_samples_val = max(0, num_samples - num_samples_train)
-
-        # Randomly choose samples for training and validation
-        np.random.shuffle(positive_indices)
-        train_indices = positive_indices[:num_samples_train]
-        val_indices = positive_indices[num_samples_train : num_samples_train + num_samples_val]
-
-        # Append samples to training and validation data
-        x_train.append(x[train_indices])
-        y_train.append(y[train_indices])
-        x_val.append(x[val_indices])
-        y_val.append(y[val_indices])
-
-        # Append negative samples to training data
-        x_train.append(x[negative_indices])
-        y_train.append(y[negative_indices])
-
-    # Add samples for non-event classes to training and validation data
-    non_event_indices = np.where(np.sum(y[:, :], axis=1) == 0)[0]
-    num_samples = len(non_event_indices)
-    num_samples_train = max(1, int(num_samples * (1 - val_ratio)))
-    num_samples_val = max(0, num_samples - num_samples_train)
-    np.random.shuffle(non_event_indices)
-    train_indices = non_event_indices[:num_samples_train]
-    val_indices = non_event_indices[num_samples_train : num_samples_train + num_samples_val]
-    x_train.append(x[train_indices])
-    y_train.append(y[train_indices])
-    x_val.append(x[val_indices])
-    y_val.append(y[val_indices])
-
-    # Concatenate data
-    x_train = np.concatenate(x_train)
-    y_train = np.concatenate(y_train)
-    x_val = np.concatenate(x_val)
-    y_val = np.concatenate(y_val)
+    # Positive samples of each class, non-event samples form an extra group
+    rows, classes = np.nonzero(y == 1)
+    non_event_indices = np.where(np.sum(y, axis=1) == 0)[0]
+    rows = np.concatenate((rows, non_event_indices))
+    classes = np.concatenate((classes, np.full(len(non_event_indices), y.shape[1])))
 
-    # Shuffle data
-    indices = np.arange(len(x_train))
-    np.random.shuffle(indices)
-    x_train = x_train[indices]
-    y_train = y_train[indices]
+    # Split each group randomly
+    ranks, counts = _shuffled_ranks(classes)
+    is_train = ranks < _num_train_samples(counts, val_ratio)
 
-    indices = np.arange(len(x_val))
-    np.random.shuffle(indices)
-    x_val = x_val[indices]
-    y_val = y_val[indices]
+    # Negative samples are only used for training
+    negative_indices = np.nonzero(y == -1)[0]
+    train_indices = np.concatenate((rows[is_train], negative_indices))
+    val_indices = rows[~is_train]
+
+    # Shuffle data
+    np.random.shuffle(train_indices)
+    np.random.shuffle(val_indices)
 
-    return x_train, y_train, x_val, y_val
+    return x[train_indices], y[train_indices], x[val_indices], y[val_indices]
 
 
 def random_multilabel_split(x, y, val_ratio=0.2):
     """Splits the data into training and validation data.
 
-    Makes sure that each combination of classes is represented in both sets.
+    Uses iterative stratification: labels are processed from the rarest to the most
+    common one, and the unassigned samples of each label fill up the validation set
+    until the label has its share of validation samples. This keeps the ratio of
+    every label close to val_ratio, while each label keeps at least one training sample.
+    Samples with negative labels are only used for training.
 
     Args:
         x: Samples.
@@ -248,55 +227,44 @@ def random_multilabel_split(x, y, val_ratio=0.2):
     # Set numpy random seed
     np.random.seed(cfg.RANDOM_SEED)
 
-    # Find all combinations of labels
-    class_combinations = np.unique(y, axis=0)
+    # 0: unassigned, 1: training, 2: validation
+    assignment = np.zeros(len(y), dtype=np.int8)
+    assignment[np.any(y == -1, axis=1)] = 1
 
-    # Initialize training and validation data
-    x_train, y_train, x_val, y_val = [], [], [], []
+    # Samples of each label in random order, grouped by label
+    labels, rows = np.nonzero(y.T == 1)
+    order = np.random.permutation(len(rows))
+    order = order[np.argsort(labels[order], kind="stable")]
+    labels, rows = labels[order], rows[order]
 
-    # Split the data for each combination of labels
-    for class_combination in class_combinations:
-        # find all indices
-        indices = np.where((y == class_combination).all(axis=1))[0]
+    _, starts, counts = np.unique(labels, return_index=True, return_counts=True)
+    num_val = counts - _num_train_samples(counts, val_ratio)
 
-        # When negative sample use only for training
-        if -1 in class_combination:
-            x_train.append(x[indices])
-            y_train.append(y[indices])
-        # Otherwise split according to the validation split
-        else:
-            # Get number of samples for each set
-            num_samples = len(indices)
-            num_samples_train = max(1, int(num_samples * (1 - val_ratio)))
-            num_samples_val = max(0, num_samples - num_samples_train)
-            # Randomly choose samples for training and validation
-            np.random.shuffle(indices)
-            train_indices = indices[:num_samples_train]
-            val_indices = indices[num_samples_train : num_samples_train + num_samples_val]
-            # Append samples to training and validation data
-            x_train.append(x[train_indices])
-            y_train.append(y[train_indices])
-            x_val.append(x[val_indices])
-            y_val.append(y[val_indices])
-
-    # Concatenate data
-    x_train = np.concatenate(x_train)
-    y_train = np.concatenate(y_train)
-    x_val = np.concatenate(x_val)
-    y_val = np.concatenate(y_val)
+    # Rarest labels first
+    for i in np.argsort(counts, kind="stable"):
+        members = rows[starts[i] : starts[i] + counts[i]]
+        member_assignment = assignment[members]
+        unassigned = members[member_assignment == 0]
+        missing = num_val[i] - np.count_nonzero(member_assignment == 2)
+        # Leave at least one training sample for the label
+        missing = min(missing, len(unassigned) - (0 if np.any(member_assignment == 1) else 1))
 
-    # Shuffle data
-    indices = np.arange(len(x_train))
-    np.random.shuffle(indices)
-    x_train = x_train[indices]
-    y_train = y_train[indices]
+        if missing > 0:
+            assignment[unassigned[:missing]] = 2
 
-    indices = np.arange(len(x_val))
-    np.random.shuffle(indices)
-    x_val = x_val[indices]
-    y_val = y_val[indices]
+        assignment[unassigned[max(missing, 0) :]] = 1
+
+    # Split samples without labels randomly
+    unlabeled_indices = np.random.permutation(np.where(assignment == 0)[0])
+    num_train = _num_train_samples(len(unlabeled_indices), val_ratio)
+    assignment[unlabeled_indices[:num_train]] = 1
+    assignment[unlabeled_indices[num_train:]] = 2
+
+    # Shuffle data
+    train_indices = np.random.permutation(np.where(assignment == 1)[0])
+    val_indices = np.random.permutation(np.where(assignment == 2)[0])
 
-    return x_train, y_train, x_val, y_val
+    return x[train_indices], y[train_indices], x[val_indices], y[val_indices]
 
 
 def upsample_core(x: np.ndarray, y: np.ndarray, min_samples: int, apply: callable, size=2):
@@ -346,6 +314,141 @@ def upsample_core(x: np.ndarray, y: np.ndarray, min_samples: int, apply: callabl
     return x_temp, y_temp
 
 
+def nearest_neighbors(x: np.ndarray, k=5, block_size=1024):
+    """Finds the k nearest neighbors of every sample.
+
+    Distances are computed as blocks of a distance matrix, so memory stays bounded for large sets.
+
+    Args:
+        x: Samples.
+        k: Number of neighbors.
+        block_size: Number of samples whose distances are computed at a time.
+
+    Returns:
+        Array of shape (len(x), min(k, len(x) - 1)) with the indices of the neighbors of each sample.
+    """
+    k = min(k, len(x) - 1)
+
+    if k < 1:
+        return np.zeros((len(x), 0), dtype=int)
+
+    x = x.astype("float32", copy=False)
+    sq_norms = np.einsum("ij,ij->i", x, x)
+    neighbors = np.empty((len(x), k), dtype=int)
+
+    for start in range(0, len(x), block_size):
+        block = x[start : start + block_size]
+        # Squared euclidean distances of the block to all samples
+        distances = sq_norms[start : start + block_size, None] - 2 * block @ x.T + sq_norms[None, :]
+        # Exclude the samples themselves
+        distances[np.arange(len(block)), np.arange(start, start + len(block))] = np.inf
+        neighbors[start : start + len(block)] = np.argpartition(distances, k - 1, axis=1)[:, :k]
+
+    return neighbors
+
+
+def _upsampling_min_samples(y: np.ndarray, ratio: float):
+    """Returns the minimum number of samples of each class after upsampling."""
+    if cfg.BINARY_CLASSIFICATION:
+        return int(max(y.sum(axis=0), len(y) - y.sum(axis=0)) * ratio)
+
+    return int(np.max(y.sum(axis=0)) * ratio)
+
+
+def _upsampling_targets(y: np.ndarray, min_samples: int):
+    """Yields the samples of each class that needs upsampling.
+
+    The number of new samples per class is the same as in upsample_core.
+
+    Args:
+        y: The target labels.
+        min_samples: The minimum number of samples required for the minority class.
+
+    Yields:
+        Tuples of (indices of the samples of the class, number of new samples).
+    """
+    num_generated = 0
+
+    if cfg.BINARY_CLASSIFICATION:
+        # Determine if 1 or 0 is the minority class
+        minority_label = 1 if y.sum(axis=0) < len(y) - y.sum(axis=0) else 0
+        classes = [np.where(y == minority_label)[0]]
+    else:
+        classes = [np.where(y[:, i] == 1)[0] for i in range(y.shape[1])]
+
+    for i, members in enumerate(classes):
+        num_samples = min_samples - len(members) - num_generated
+
+        if num_samples <= 0:
+            continue
+
+        if len(members) == 0:
+            raise get_empty_class_exception()(index=i)
+
+        yield members, num_samples
+        num_generated += num_samples
+
+
+def upsampling_indices(y: np.ndarray, ratio=0.5, rng=None):
+    """Draws the samples that repeat upsampling adds to the data.
+
+    Args:
+        y: One-hot labels.
+        ratio: The minimum ratio of minority to majority samples.
+        rng: Random generator to use, e.g. to draw new samples for every epoch. Defaults to numpy's global generator.
+
+    Returns:
+        The indices of the samples to repeat.
+    """
+    rng = rng or np.random
+    indices = [
+        members[rng.randint(0, len(members), size=num_samples)]
+        for members, num_samples in _upsampling_targets(y, _upsampling_min_samples(y, ratio))
+    ]
+
+    return np.concatenate(indices) if indices else np.array([], dtype=int)
+
+
+def upsample_smote(x: np.ndarray, y: np.ndarray, min_samples: int, k=5):
+    """
+    Upsamples the minority classes in the dataset with SMOTE.
+
+    The nearest neighbors are computed once per class and all synthetic samples of a class are generated at once.
+    Each new sample lies between a random sample of the class and one of its k nearest neighbors within the class.
+    Parameters:
+        x (np.ndarray): The feature matrix.
+        y (np.ndarray): The target labels.
+        min_samples (int): The minimum number of samples required for the minority class.
+        k (int, optional): The number of nearest neighbors to choose from. Default is 5.
+    Returns:
+        tuple: A tuple containing the new samples and their labels.
+    """
+    x_temp = []
+    y_temp = []
+
+    for members, num_samples in _upsampling_targets(y, min_samples):
+        neighbors = nearest_neighbors(x[members], k)
+
+        # Randomly choose samples of the class and one of their neighbors
+        anchors = np.random.randint(0, len(members), size=num_samples)
+
+        if neighbors.shape[1] > 0:
+            partners = neighbors[anchors, np.random.randint(0, neighbors.shape[1], size=num_samples)]
+        else:
+            partners = anchors
+
+        # Move each sample a random distance towards its neighbor
+        weights = np.random.uniform(0, 1, size=(num_samples, 1))
+        x_anchors = x[members[anchors]]
+        x_temp.append(x_anchors + weights * (x[members[partners]] - x_anchors))
+        y_temp.append(y[members[anchors]])
+
+    if not x_temp:
+        return [], []
+
+    return np.concatenate(x_temp), np.concatenate(y_temp)
+
+
 def upsampling(x: np.ndarray, y: np.ndarray, ratio=0.5, mode="repeat"):
     """Balance data through upsampling.
 
@@ -365,10 +468,7 @@ def upsampling(x: np.ndarray, y: np.ndarray, ratio=0.5, mode="repeat"):
     np.random.seed(cfg.RANDOM_SEED)
 
     # Determine min number of samples
-    if cfg.BINARY_CLASSIFICATION:
-        min_samples = int(max(y.sum(axis=0), len(y) - y.sum(axis=0)) * ratio)
-    else:
-        min_samples = int(np.max(y.sum(axis=0)) * ratio)
+    min_samples = _upsampling_min_samples(y, ratio)
 
     x_temp = []
     y_temp = []
@@ -407,27 +507,7 @@ def upsampling(x: np.ndarray, y: np.ndarray, ratio=0.5, mode="repeat"):
 
     elif mode == "smote":
         # For each class with less than min_samples apply SMOTE
-        def applySmote(x, y, random_index, k=5):
-            # Get the k nearest neighbors
-            distances = np.sqrt(np.sum((x - x[random_index[0]]) ** 2, axis=1))
-            indices = np.argsort(distances)[1 : k + 1]
-
-            # Randomly choose one of the neighbors
-            random_neighbor = np.random.choice(indices)
-
-            # Calculate the difference vector
-            diff = x[random_neighbor] - x[random_index[0]]
-
-            # Randomly choose a weight between 0 and 1
-            weight = np.random.uniform(0, 1)
-
-            # Calculate the new sample
-            new_sample = x[random_index[0]] + weight * diff
-
-            # Append the new sample and label to a temp list
-            return new_sample, y[random_index[0]]
-
-        x_temp, y_temp = upsample_core(x, y, min_samples, applySmote, size=1)
+        x_temp, y_temp = upsample_smote(x, y, min_samples)
 
     # Append the temp list to the original data
     if len(x_temp) > 0:
@@ -706,6 +786,7 @@ def train_linear_classifier(
         (classifier, history)
     """
     # import keras
+    import tensorflow as tf
     from tensorflow import keras
 
     class FunctionCallback(keras.callbacks.Callback):
@@ -717,9 +798,72 @@ def train_linear_classifier(
             if self.on_epoch_end_fn:
                 self.on_epoch_end_fn(epoch, logs)
 
+    def make_dataset(data, indices, labels, shuffle=False, apply_mixup=False, smoothing=False, upsampling_ratio=0.0):
+        """Streams batches of samples from an array or a memory-mapped file.
+
+        Batches are gathered by index in parallel and prefetched. Training batches are shuffled,
+        repeat-upsampled and augmented anew in every epoch. Each batch is augmented with its own
+        generator, seeded by the epoch and batch number, so results don't depend on the order
+        in which the parallel calls run.
+        """
+        rng = np.random.RandomState(cfg.RANDOM_SEED)
+        epochs_started = [0]
+
+        def epoch_batches():
+            epoch = epochs_started[0]
+            epochs_started[0] += 1
+            positions = np.arange(len(indices))
+
+            if upsampling_ratio > 0:
+                positions = np.concatenate((positions, upsampling_indices(labels, upsampling_ratio, rng)))
+
+            if shuffle:
+                rng.shuffle(positions)
+
+            for i in range(0, len(positions), batch_size):
+                yield positions[i : i + batch_size], np.array([cfg.RANDOM_SEED, epoch, i // batch_size])
+
+        def load_batch(positions, seed):
+            # Read rows in file order
+            positions = positions[np.argsort(indices[positions])]
+            x_batch = np.asarray(data[indices[positions]], dtype="float32")
+            y_batch = labels[positions].astype("float32")
+
+            if apply_mixup:
+                x_batch, y_batch = mixup(x_batch, y_batch, rng=np.random.RandomState(seed))
+
+            if smoothing:
+                y_batch = label_smoothing(y_batch, size=len(labels))
+
+            return x_batch, y_batch
+
+        def set_shapes(x_batch, y_batch):
+            x_batch.set_shape((None, data.shape[1]))
+            y_batch.set_shape((None, labels.shape[1]))
+
+            return x_batch, y_batch
+
+        dataset = tf.data.Dataset.from_generator(
+            epoch_batches,
+            output_signature=(tf.TensorSpec(shape=(None,), dtype=tf.int64), tf.TensorSpec(shape=(3,), dtype=tf.int64)),
+        )
+        dataset = dataset.map(
+            lambda positions, seed: tf.numpy_function(load_batch, [positions, seed], (tf.float32, tf.float32)),
+            num_parallel_calls=tf.data.AUTOTUNE,
+        )
+
+        return dataset.map(set_shapes).prefetch(tf.data.AUTOTUNE)
+
     # Set random seed
     np.random.seed(cfg.RANDOM_SEED)
 
+    # Streamed samples are shuffled and split by their indices
+    x_data = x_train if isinstance(x_train, np.memmap) or cfg.TRAIN_DATA_PIPELINE else None
+
+    if x_data is not None:
+        x_train = np.arange(len(x_data))
+        y_train = np.asarray(y_train)
+
     # Shuffle data
     idx = np.arange(x_train.shape[0])
     np.random.shuffle(idx)
@@ -735,23 +879,41 @@ def train_linear_classifier(
     else:        
         x_val = x_test
         y_val = y_test
-        
+
+    if x_data is not None and val_split > 0:
+        validation_data = make_dataset(x_data, x_val, y_val)
+    elif isinstance(x_val, np.memmap):
+        validation_data = make_dataset(x_val, np.arange(len(x_val)), np.asarray(y_val))
+    else:
+        validation_data = (x_val, y_val)
+
     print(
-        f"Training on {x_train.shape[0]} samples, validating on {x_val.shape[0]} samples.",
+        f"Training on {len(x_train)} samples, validating on {len(y_val)} samples.",
         flush=True,
     )
 
+    # Streamed samples are repeat-upsampled per epoch, other upsampling modes need the samples in memory
+    if x_data is not None and upsampling_ratio > 0 and upsampling_mode != "repeat":
+        x_train = x_data[x_train]
+        x_data = None
+
     # Upsample training data
-    if upsampling_ratio > 0:
+    if upsampling_ratio > 0 and x_data is None:
         x_train, y_train = upsampling(x_train, y_train, upsampling_ratio, upsampling_mode)
         print(f"Upsampled training data to {x_train.shape[0]} samples.", flush=True)
+    elif upsampling_ratio > 0:
+        # Streamed samples are upsampled inside the dataset, where an empty class would only surface
+        # as a runtime error during fit, so check for it before training like the in-memory path
+        list(_upsampling_targets(y_train, _upsampling_min_samples(y_train, upsampling_ratio)))
+
+    # Apply mixup and label smoothing to training data, streamed samples are augmented per batch
+    apply_mixup = train_with_mixup and not cfg.BINARY_CLASSIFICATION
+    apply_label_smoothing = train_with_label_smoothing and not cfg.BINARY_CLASSIFICATION
 
-    # Apply mixup to training data
-    if train_with_mixup and not cfg.BINARY_CLASSIFICATION:
+    if apply_mixup and x_data is None:
         x_train, y_train = mixup(x_train, y_train)
 
-    # Apply label smoothing
-    if train_with_label_smoothing and not cfg.BINARY_CLASSIFICATION:
+    if apply_label_smoothing and x_data is None:
         y_train = label_smoothing(y_train)
 
     # Early stopping with patience depending on dataset size
@@ -774,8 +936,8 @@ def train_linear_classifier(
 
     # Learning rate schedule - use cosine decay with warmup
     warmup_epochs = min(5, int(epochs * 0.1))
-    total_steps = epochs * x_train.shape[0] / batch_size
-    warmup_steps = warmup_epochs * x_train.shape[0] / batch_size
+    total_steps = epochs * len(y_train) / batch_size
+    warmup_steps = warmup_epochs * len(y_train) / batch_size
     
     def lr_schedule(epoch, lr):
         if epoch < warmup_epochs:
@@ -821,9 +983,26 @@ def train_linear_classifier(
     )
 
     # Train model
-    history = classifier.fit(
-        x_train, y_train, epochs=epochs, batch_size=batch_size, validation_data=(x_val, y_val), callbacks=callbacks
-    )
+    if x_data is not None:
+        train_data = make_dataset(
+            x_data,
+            x_train,
+            y_train,
+            shuffle=True,
+            apply_mixup=apply_mixup,
+            smoothing=apply_label_smoothing,
+            upsampling_ratio=upsampling_ratio,
+        )
+        history = classifier.fit(
+            train_data,
+            epochs=epochs,
+            validation_data=validation_data,
+            callbacks=callbacks,
+        )
+    else:
+        history = classifier.fit(
+            x_train, y_train, epochs=epochs, batch_size=batch_size, validation_data=validation_data, callbacks=callbacks
+        )
 
     return classifier, history
 
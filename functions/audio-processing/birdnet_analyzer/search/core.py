@@ -4,25 +4,44 @@ from typing import Literal
 def search(
     output: str,
     database: str,
-    queryfile: str,
+    queryfile: str | list[str],
     *,
     n_results: int = 10,
     score_function: Literal["cosine", "euclidean", "dot"] = "cosine",
     crop_mode: Literal["center", "first", "segments"] = "center",
     overlap: float = 0.0,
+    rerank: bool = False,
+    exact: bool = False,
+    expansion_search: int = 128,
+    fusion: Literal["mean", "max", "topk_mean"] = "mean",
+    fusion_top_k: int = 3,
+    audio_format: Literal["wav", "flac"] = "wav",
+    threads: int = 8,
 ):
     """
     Executes a search query on a given database and saves the results as audio files.
     Args:
         output (str): Path to the output directory where the results will be saved.
         database (str): Path to the database file to search in.
-        queryfile (str): Path to the query file containing the search input.
+        queryfile (str | list[str]): Path to the query file containing the search input, or a list of query files.
+            The embeddings of all query files are searched together.
         n_results (int, optional): Number of top results to return. Defaults to 10.
         score_function (Literal["cosine", "euclidean", "dot"], optional):
             Scoring function to use for similarity calculation. Defaults to "cosine".
         crop_mode (Literal["center", "first", "segments"], optional):
             Mode for cropping audio segments. Defaults to "center".
         overlap (float, optional): Overlap ratio for audio segments. Defaults to 0.0.
+        rerank (bool, optional): Re-rank the results with the full precision embeddings stored
+            in the database, if the database has them. Defaults to False.
+        exact (bool, optional): Score every embedding in the database instead of using the
+            approximate nearest neighbour index. Defaults to False.
+        expansion_search (int, optional): Size of the candidate list of the nearest neighbour index.
+            Higher values are more accurate, but slower. Defaults to 128.
+        fusion (Literal["mean", "max", "topk_mean"], optional): How the scores of multiple query embeddings
+            are combined. Defaults to "mean".
+        fusion_top_k (int, optional): Number of best query scores averaged by the "topk_mean" fusion. Defaults to 3.
+        audio_format (Literal["wav", "flac"], optional): Format of the saved audio files. Defaults to "wav".
+        threads (int, optional): Number of processes used to save the audio files. Defaults to 8.
     Raises:
         ValueError: If the database does not contain the required settings metadata.
     Notes:
@@ -31,19 +50,23 @@ def search(
           bandpass filter settings and audio speed.
         - The results are saved as audio files in the specified output directory, with
           filenames containing the score, source file name, and time offsets.
+        - Results are grouped by source file, so that each file is decoded only once.
     Returns:
         None
     """
     import os
+    from multiprocessing import Pool
 
-    import birdnet_analyzer.audio as audio
     import birdnet_analyzer.config as cfg
-    from birdnet_analyzer.search.utils import get_search_results
+    from birdnet_analyzer.search.utils import export_results, get_search_results
 
     # Create output folder
     if not os.path.exists(output):
         os.makedirs(output)
 
+    # Set search accuracy
+    cfg.EMBEDDINGS_SEARCH_EXPANSION = max(1, int(expansion_search))
+
     # Load the database
     db = get_database(database)
 
@@ -57,22 +80,54 @@ def search(
     audio_speed = settings["AUDIO_SPEED"]
 
     # Execute the search
-    results = get_search_results(queryfile, db, n_results, audio_speed, fmin, fmax, score_function, crop_mode, overlap)
+    results = get_search_results(
+        queryfile,
+        db,
+        n_results,
+        audio_speed,
+        fmin,
+        fmax,
+        score_function,
+        crop_mode,
+        overlap,
+        rerank,
+        exact,
+        fusion,
+        fusion_top_k,
+    )
 
-    # Save the results
-    for i, r in enumerate(results):
+    # Group the results by source file
+    hits_by_file = {}
+
+    for r in results:
         embedding_source = db.get_embedding_source(r.embedding_id)
-        file = embedding_source.source_id
-        filebasename = os.path.basename(file)
-        filebasename = os.path.splitext(filebasename)[0]
-        offset = embedding_source.offsets[0] * audio_speed
-        duration = cfg.SIG_LENGTH * audio_speed
-        sig, rate = audio.open_audio_file(file, offset=offset, duration=duration, sample_rate=None)
-        result_path = os.path.join(output, f"{file[4]:.5f}_{filebasename}_{offset}_{offset + duration}.wav")
-        audio.save_signal(sig, result_path, rate)
+        hits_by_file.setdefault(embedding_source.source_id, []).append(
+            {"score": r.sort_score, "start": float(embedding_source.offsets[0]) * audio_speed}
+        )
+
+    # Set number of threads
+    cfg.CPU_THREADS = max(1, min(int(threads), len(hits_by_file)))
+
+    # Add config items to each file list entry.
+    # We have to do this for Windows which does not
+    # support fork() and thus each process has to
+    # have its own config. USE LINUX!
+    flist = [(entry, output, audio_format, cfg.get_config()) for entry in hits_by_file.items()]
+
+    # Save the results
+    if cfg.CPU_THREADS < 2:
+        for entry in flist:
+            export_results(entry)
+    else:
+        with Pool(cfg.CPU_THREADS) as p:
+            p.map(export_results, flist)
 
 
 def get_database(database_path):
     from perch_hoplite.db import sqlite_usearch_impl
 
+    from birdnet_analyzer.embeddings.core import register_index_precisions
+
+    register_index_precisions()
+
     return sqlite_usearch_impl.SQLiteUsearchDB.create(database_path).thread_split()
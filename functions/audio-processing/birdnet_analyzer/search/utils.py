@@ -1,29 +1,81 @@
+import os
+
 import numpy as np
-from perch_hoplite.db import brutalism
 from perch_hoplite.db.search_results import SearchResult
-from scipy.spatial.distance import euclidean
 
 import birdnet_analyzer.audio as audio
 import birdnet_analyzer.config as cfg
 import birdnet_analyzer.model as model
+import birdnet_analyzer.utils as utils
 
 
 def cosine_sim(a, b):
-    if a.ndim == 2:
-        return np.array([cosine_sim(a[i], b) for i in range(a.shape[0])])
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+    # Works on a single embedding or on all rows of a matrix at once
+    return np.dot(a, b) / (np.linalg.norm(a, axis=-1) * np.linalg.norm(b))
 
 
 def euclidean_scoring(a, b):
-    if a.ndim == 2:
-        return np.array([euclidean_scoring(a[i], b) for i in range(a.shape[0])])
-    return euclidean(a, b)
+    return np.linalg.norm(a - b, axis=-1)
 
 
 def euclidean_scoring_inverse(a, b):
     return -euclidean_scoring(a, b)
 
 
+def score_matrix(embeddings, query_embeddings, score_function: str):
+    """Scores all embeddings against all query embeddings with one matrix multiplication.
+
+    Args:
+        embeddings: Array of shape (n, dim).
+        query_embeddings: Array of shape (q, dim).
+        score_function: 'cosine', 'dot' or 'euclidean'.
+
+    Returns:
+        Array of shape (n, q). Higher scores are better, so euclidean distances are negated.
+    """
+    embeddings = np.asarray(embeddings, dtype="float32")
+    query_embeddings = np.asarray(query_embeddings, dtype="float32")
+    dot = embeddings @ query_embeddings.T
+
+    if score_function == "dot":
+        return dot
+
+    e_norm = np.linalg.norm(embeddings, axis=1)[:, None]
+    q_norm = np.linalg.norm(query_embeddings, axis=1)[None, :]
+
+    if score_function == "cosine":
+        return dot / (e_norm * q_norm)
+
+    if score_function == "euclidean":
+        return -np.sqrt(np.maximum(e_norm**2 + q_norm**2 - 2 * dot, 0))
+
+    raise ValueError("Invalid score function. Choose 'cosine', 'euclidean' or 'dot'.")
+
+
+def fuse_scores(scores, fusion: str = "mean", top_k: int = 3):
+    """Combines the scores of all query embeddings into one score per embedding.
+
+    Args:
+        scores: Array of shape (n, q) as returned by score_matrix.
+        fusion: 'mean', 'max' or 'topk_mean' (mean of the top_k best query scores).
+        top_k: Number of query scores used by 'topk_mean'.
+
+    Returns:
+        Array of shape (n,).
+    """
+    if fusion == "mean":
+        return scores.mean(axis=1)
+
+    if fusion == "max":
+        return scores.max(axis=1)
+
+    if fusion == "topk_mean":
+        k = max(1, min(int(top_k), scores.shape[1]))
+        return np.sort(scores, axis=1)[:, -k:].mean(axis=1)
+
+    raise ValueError("Invalid fusion strategy. Choose 'mean', 'max' or 'topk_mean'.")
+
+
 def get_query_embedding(queryfile_path):
     """
     Extracts the embedding for a query file. Reads only the first 3 seconds
@@ -56,8 +108,169 @@ def get_query_embedding(queryfile_path):
     return query
 
 
+def get_query_embeddings(queryfile_paths):
+    """
+    Extracts the embeddings for one or more query files.
+    Args:
+        queryfile_paths: The path to the query file or a list of paths.
+    Returns:
+        The embeddings of all query files, stacked into one array.
+    """
+    if isinstance(queryfile_paths, str):
+        queryfile_paths = [queryfile_paths]
+
+    return np.concatenate([get_query_embedding(path) for path in queryfile_paths])
+
+
+def _top_results(embedding_ids, scores, n):
+    best = np.argsort(-scores)[:n]
+
+    return embedding_ids[best], scores[best]
+
+
+def brute_force_search(db, query_embeddings, n, score_function, fusion, top_k, batch_size=16384):
+    """Scores every embedding in the database against all query embeddings.
+
+    Args:
+        db: The database.
+        query_embeddings: The query embeddings.
+        n: Number of results to return.
+        score_function: 'cosine', 'dot' or 'euclidean'.
+        fusion: How the scores of all query embeddings are combined.
+        top_k: Number of query scores used by the 'topk_mean' fusion.
+        batch_size: Number of database embeddings scored at a time.
+
+    Returns:
+        A tuple of (embedding ids, fused scores), best first.
+    """
+    from birdnet_analyzer.embeddings.utils import dequantize_embeddings
+
+    all_ids = db.get_embedding_ids()
+    best_ids = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+
+    for i in range(0, len(all_ids), batch_size):
+        embedding_ids, embeddings = db.get_embeddings(all_ids[i : i + batch_size])
+        scores = score_matrix(dequantize_embeddings(embeddings), query_embeddings, score_function)
+        scores = fuse_scores(scores, fusion, top_k)
+
+        best_ids, best_scores = _top_results(
+            np.concatenate([best_ids, np.asarray(embedding_ids, dtype=np.int64)]),
+            np.concatenate([best_scores, scores]),
+            n,
+        )
+
+    return best_ids, best_scores
+
+
+def _match_keys(matches):
+    """Returns the keys of all actual hits of a usearch search.
+
+    Batch searches pad the keys of queries with fewer hits than requested,
+    only the first counts[i] keys of each query are valid.
+    """
+    keys = np.asarray(matches.keys, dtype=np.int64)
+
+    # A single query returns trimmed matches without counts
+    if not hasattr(matches, "counts"):
+        return keys.ravel()
+
+    keys = np.atleast_2d(keys)
+    counts = np.asarray(matches.counts)
+
+    return keys[np.arange(keys.shape[1]) < counts[:, None]]
+
+
+def ann_search(db, query_embeddings, n, score_function, fusion, top_k, n_candidates=None):
+    """Searches the usearch index of the database instead of scoring every embedding.
+
+    All query embeddings are searched in one batch. The index ranks by inner product,
+    so it only proposes candidates, which are then scored and fused like in
+    brute_force_search.
+
+    Args:
+        db: The database.
+        query_embeddings: The query embeddings.
+        n: Number of results to return.
+        score_function: 'cosine' or 'dot'.
+        fusion: How the scores of all query embeddings are combined.
+        top_k: Number of query scores used by the 'topk_mean' fusion.
+        n_candidates: Number of candidates proposed by the index per query embedding.
+            Defaults to n * cfg.EMBEDDINGS_RERANK_FACTOR, pass n if the caller has already widened n.
+
+    Returns:
+        A tuple of (embedding ids, fused scores), best first.
+    """
+    from birdnet_analyzer.embeddings.utils import dequantize_embeddings, quantize_embeddings
+
+    if n_candidates is None:
+        n_candidates = n * cfg.EMBEDDINGS_RERANK_FACTOR
+
+    n_candidates = min(db.count_embeddings(), n_candidates)
+
+    # The candidate list has to be at least as large as the number of requested neighbours
+    expansion_search = db.ui.expansion_search
+    db.ui.expansion_search = max(cfg.EMBEDDINGS_SEARCH_EXPANSION, n_candidates)
+
+    try:
+        matches = db.ui.search(quantize_embeddings(query_embeddings), n_candidates)
+    finally:
+        db.ui.expansion_search = expansion_search
+
+    candidates = np.unique(_match_keys(matches))
+    embedding_ids, embeddings = db.get_embeddings(candidates)
+    scores = score_matrix(dequantize_embeddings(embeddings), query_embeddings, score_function)
+    scores = fuse_scores(scores, fusion, top_k)
+
+    return _top_results(np.asarray(embedding_ids, dtype=np.int64), scores, n)
+
+
+def rerank_results(db, embedding_ids, scores, query_embeddings, score_function, fusion, top_k):
+    """Re-scores search results with the stored full precision copies of the embeddings.
+
+    Results without a stored copy keep their approximate score.
+
+    Args:
+        db: The database.
+        embedding_ids: The ids of the results.
+        scores: The approximate scores of the results.
+        query_embeddings: The query embeddings.
+        score_function: 'cosine', 'dot' or 'euclidean'.
+        fusion: How the scores of all query embeddings are combined.
+        top_k: Number of query scores used by the 'topk_mean' fusion.
+
+    Returns:
+        A tuple of (embedding ids, scores), best first.
+    """
+    from birdnet_analyzer.embeddings.utils import get_payload_embeddings
+
+    payload = get_payload_embeddings(db, embedding_ids)
+
+    if payload:
+        index = {embedding_id: i for i, embedding_id in enumerate(embedding_ids)}
+        ids = list(payload.keys())
+        exact = score_matrix(np.stack([payload[i] for i in ids]), query_embeddings, score_function)
+        exact = fuse_scores(exact, fusion, top_k)
+        scores = scores.copy()
+        scores[[index[i] for i in ids]] = exact
+
+    return _top_results(embedding_ids, scores, len(embedding_ids))
+
+
 def get_search_results(
-    queryfile_path, db, n_results, audio_speed, fmin, fmax, score_function: str, crop_mode, crop_overlap
+    queryfile_path,
+    db,
+    n_results,
+    audio_speed,
+    fmin,
+    fmax,
+    score_function: str,
+    crop_mode,
+    crop_overlap,
+    rerank: bool = False,
+    exact: bool = False,
+    fusion: str = "mean",
+    fusion_top_k: int = 3,
 ):
     # Set bandpass frequency range
     cfg.BANDPASS_FMIN = max(0, min(cfg.SIG_FMAX, int(fmin)))
@@ -66,46 +279,117 @@ def get_search_results(
     cfg.SAMPLE_CROP_MODE = crop_mode
     cfg.SIG_OVERLAP = max(0.0, min(2.9, float(crop_overlap)))
 
-    # Get query embedding
-    query_embeddings = get_query_embedding(queryfile_path)
-
-    # Set score function
-    if score_function == "cosine":
-        score_fn = cosine_sim
-    elif score_function == "dot":
-        score_fn = np.dot
-    elif score_function == "euclidean":
-        score_fn = euclidean_scoring_inverse  # TODO: this is a bit hacky since the search function expects the score to be high for similar embeddings
-    else:
+    if score_function not in ("cosine", "euclidean", "dot"):
         raise ValueError("Invalid score function. Choose 'cosine', 'euclidean' or 'dot'.")
 
+    from birdnet_analyzer.embeddings.utils import load_storage_settings
+
+    load_storage_settings(db)
+
+    # Get query embeddings, queryfile_path can also be a list of files
+    query_embeddings = get_query_embeddings(queryfile_path)
+
     db_embeddings_count = db.count_embeddings()
 
     if n_results > db_embeddings_count - 1:
         n_results = db_embeddings_count - 1
 
-    scores_by_embedding_id = {}
+    # Collect more candidates, the final order is decided by the exact scores
+    rerank = rerank and bool(cfg.EMBEDDINGS_PAYLOAD_PRECISION)
+    n_candidates = min(n_results * cfg.EMBEDDINGS_RERANK_FACTOR, db_embeddings_count - 1) if rerank else n_results
 
-    for embedding in query_embeddings:
-        results, scores = brutalism.threaded_brute_search(db, embedding, n_results, score_fn)
-        sorted_results = results.search_results
+    # The index is built for inner products, so euclidean distances are always computed exactly
+    if exact or score_function == "euclidean":
+        embedding_ids, scores = brute_force_search(
+            db, query_embeddings, n_candidates, score_function, fusion, fusion_top_k
+        )
+    else:
+        # With re-ranking n_candidates is already widened, so the index must not widen it again
+        embedding_ids, scores = ann_search(
+            db,
+            query_embeddings,
+            n_candidates,
+            score_function,
+            fusion,
+            fusion_top_k,
+            n_candidates=n_candidates if rerank else None,
+        )
 
-        if score_function == "euclidean":
-            for result in sorted_results:
-                result.sort_score *= -1
+    if rerank:
+        embedding_ids, scores = rerank_results(
+            db, embedding_ids, scores, query_embeddings, score_function, fusion, fusion_top_k
+        )
 
-        for result in sorted_results:
-            if result.embedding_id not in scores_by_embedding_id:
-                scores_by_embedding_id[result.embedding_id] = []
-            scores_by_embedding_id[result.embedding_id].append(result.sort_score)
+    # Report euclidean distances instead of the negated scores
+    if score_function == "euclidean":
+        scores = -scores
+
+    return [SearchResult(int(i), float(score)) for i, score in zip(embedding_ids[:n_results], scores[:n_results])]
+
+
+def get_read_ranges(hits: list[dict], duration: float):
+    """Groups the search results of one file into ranges that are read at once.
+
+    Neighbouring results are merged as long as the range is not longer than
+    cfg.FILE_SPLITTING_DURATION, so that the file is decoded only once in most cases.
+
+    Args:
+        hits: List of dicts with the keys "score" and "start".
+        duration: Duration of each result in seconds.
+
+    Returns:
+        A list of (start, end, hits) tuples.
+    """
+    ranges = []
+
+    for hit in sorted(hits, key=lambda h: h["start"]):
+        if ranges and hit["start"] + duration - ranges[-1][0] <= cfg.FILE_SPLITTING_DURATION:
+            ranges[-1][1] = max(ranges[-1][1], hit["start"] + duration)
+            ranges[-1][2].append(hit)
+        else:
+            ranges.append([hit["start"], hit["start"] + duration, [hit]])
+
+    return [tuple(r) for r in ranges]
+
+
+def export_results(item: tuple[tuple[str, list[dict]], str, str, dict]):
+    """Saves the audio of all search results from one source file.
+
+    Args:
+        item (tuple): A tuple containing:
+            - A tuple with the path to the source file and a list of dicts with the keys "score" and "start".
+            - The output folder.
+            - The audio format, "wav" or "flac".
+            - A dictionary containing configuration settings.
+
+    Returns:
+        The number of saved files.
+    """
+    afile, hits = item[0]
+    output = item[1]
+    audio_format = item[2]
+    cfg.set_config(item[3])
 
-    results = []
+    duration = cfg.SIG_LENGTH * cfg.AUDIO_SPEED
+    filebasename = os.path.splitext(os.path.basename(afile))[0]
+    saved = 0
 
-    for embedding_id, scores in scores_by_embedding_id.items():
-        results.append(SearchResult(embedding_id, np.sum(scores) / len(query_embeddings)))
+    for start, end, range_hits in get_read_ranges(hits, duration):
+        try:
+            sig, rate = audio.open_audio_file(afile, offset=start, duration=end - start, sample_rate=None)
+        except Exception as ex:
+            print(f"Error: Cannot open audio file {afile}", flush=True)
+            utils.write_error_log(ex)
 
-    reverse = score_function != "euclidean"
+            return saved
 
-    results.sort(key=lambda x: x.sort_score, reverse=reverse)
+        for hit in range_hits:
+            clip_start = int((hit["start"] - start) * rate)
+            clip = sig[clip_start : clip_start + int(duration * rate)]
+            result_path = os.path.join(
+                output, f"{hit['score']:.5f}_{filebasename}_{hit['start']}_{hit['start'] + duration}.{audio_format}"
+            )
+            audio.save_signal(clip, result_path, rate)
+            saved += 1
 
-    return results[0:n_results]
+    return saved
@@ -4,6 +4,7 @@ Can be used to save the segments of the audio files for each detection.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
@@ -15,6 +16,12 @@ import birdnet_analyzer.utils as utils
 np.random.seed(cfg.RANDOM_SEED)
 SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
 
+# Number of threads that write the segments of an audio file
+WRITER_THREADS = 4
+
+# Share of a file above which it is decoded once as a whole instead of range by range
+MAX_RANGE_COVERAGE = 0.5
+
 
 def detect_rtype(line: str):
     """Detects the type of result file.
@@ -321,9 +328,116 @@ def find_segments(afile: str, rfile: str):
     return segments
 
 
+def get_segment_ranges(segments: list[dict], seg_length: float, rate: int) -> list[tuple[int, int]]:
+    """
+    Computes the sample range of each segment in the signal, padded to the segment length.
+
+    Args:
+        segments (list[dict]): Segments with "start" and "end" times in seconds.
+        seg_length (float): Minimum length of a segment in seconds, shorter segments are padded on both sides.
+        rate (int): Sample rate of the signal.
+
+    Returns:
+        list[tuple[int, int]]: Start and end sample of each segment, the end may exceed the signal length.
+    """
+    ranges = []
+
+    for seg in segments:
+        start = int((seg["start"] * rate) / cfg.AUDIO_SPEED)
+        end = int((seg["end"] * rate) / cfg.AUDIO_SPEED)
+
+        offset = max(0, ((seg_length * rate) - (end - start)) // 2)
+        ranges.append((int(max(0, start - offset)), int(end + offset)))
+
+    return ranges
+
+
+def merge_segment_ranges(ranges: list[tuple[int, int]], max_length: int) -> list[tuple[int, int, list[int]]]:
+    """
+    Merges overlapping sample ranges, so every part of the signal is only decoded once.
+
+    Ranges are not merged if the merged range would be longer than `max_length`, which limits the memory
+    used for decoding.
+
+    Args:
+        ranges (list[tuple[int, int]]): Start and end sample of each segment.
+        max_length (int): Maximum length of a merged range in samples.
+
+    Returns:
+        list[tuple[int, int, list[int]]]: Start and end sample of each merged range, with the indices of its segments.
+    """
+    merged = []
+
+    for i in sorted(range(len(ranges)), key=lambda i: ranges[i]):
+        start, end = ranges[i]
+
+        if merged and start <= merged[-1][1] and max(end, merged[-1][1]) - merged[-1][0] <= max_length:
+            merged[-1][1] = max(end, merged[-1][1])
+            merged[-1][2].append(i)
+        else:
+            merged.append([start, end, [i]])
+
+    return [tuple(r) for r in merged]
+
+
+def decode_ranges_separately(afile: str, merged: list[tuple[int, int, list[int]]], rate: int) -> bool:
+    """
+    Checks whether decoding the merged ranges one by one is cheaper than decoding the whole file once.
+
+    Args:
+        afile (str): Path to the audio file.
+        merged (list[tuple[int, int, list[int]]]): The merged sample ranges.
+        rate (int): Sample rate of the signal.
+
+    Returns:
+        bool: True if the file can be read with seeking and the ranges cover only a small part of it.
+    """
+    duration = audio.get_seekable_duration(afile)
+
+    # Without seeking every range would be decoded from the start of the file
+    if duration is None:
+        return False
+
+    covered = sum(end - start for start, end, _ in merged)
+
+    return covered < MAX_RANGE_COVERAGE * duration / cfg.AUDIO_SPEED * rate
+
+
+def save_segment(seg_sig: np.ndarray, seg: dict, seg_cnt: int, rate: int):
+    """
+    Saves the signal of a segment to the folder of its species.
+
+    Args:
+        seg_sig (np.ndarray): The signal of the segment.
+        seg (dict): Segment information with "start", "end", "species", "confidence" and "audio".
+        seg_cnt (int): Number of the segment in its audio file, starting at 1.
+        rate (int): Sample rate of the signal.
+    """
+    # Make output path
+    outpath = os.path.join(cfg.OUTPUT_PATH, seg["species"])
+    os.makedirs(outpath, exist_ok=True)
+
+    # Save segment
+    seg_name = "{:.3f}_{}_{}_{:.1f}s_{:.1f}s.wav".format(
+        seg["confidence"],
+        seg_cnt,
+        seg["audio"].rsplit(os.sep, 1)[-1].rsplit(".", 1)[0],
+        seg["start"],
+        seg["end"],
+    )
+    seg_path = os.path.join(outpath, seg_name)
+    audio.save_signal(seg_sig, seg_path, rate)
+
+
 def extract_segments(item: tuple[tuple[str, list[dict]], float, dict[str]]):
     """
     Extracts audio segments from a given audio file based on provided segment information.
+
+    Only the parts of the file that contain segments are decoded: overlapping segments are merged into
+    ranges (at most cfg.FILE_SPLITTING_DURATION long), each range is read from the file with an offset
+    and duration, and the segments are written by a small pool of threads. Files that cannot be read with
+    seeking, or whose ranges cover most of the file, are decoded once as a whole instead.
+
     Args:
         item (tuple): A tuple containing:
             - A tuple with:
@@ -345,50 +459,52 @@ def extract_segments(item: tuple[tuple[str, list[dict]], float, dict[str]]):
     # Status
     print(f"Extracting segments from {afile}")
 
-    try:
-        # Open audio file
-        sig, rate = audio.open_audio_file(afile, cfg.SAMPLE_RATE, speed=cfg.AUDIO_SPEED)
-    except Exception as ex:
-        print(f"Error: Cannot open audio file {afile}", flush=True)
-        utils.write_error_log(ex)
-
-        return
-
-    # Extract segments
-    for seg_cnt, seg in enumerate(segments, 1):
-        try:
-            # Get start and end times
-            start = int((seg["start"] * rate) / cfg.AUDIO_SPEED)
-            end = int((seg["end"] * rate) / cfg.AUDIO_SPEED)
-
-            offset = max(0, ((seg_length * rate) - (end - start)) // 2)
-            start = max(0, start - offset)
-            end = min(len(sig), end + offset)
-
-            # Make sure segment is long enough
-            if end > start:
-                # Get segment raw audio from signal
-                seg_sig = sig[int(start) : int(end)]
-
-                # Make output path
-                outpath = os.path.join(cfg.OUTPUT_PATH, seg["species"])
-                os.makedirs(outpath, exist_ok=True)
-
-                # Save segment
-                seg_name = "{:.3f}_{}_{}_{:.1f}s_{:.1f}s.wav".format(
-                    seg["confidence"],
-                    seg_cnt,
-                    seg["audio"].rsplit(os.sep, 1)[-1].rsplit(".", 1)[0],
-                    seg["start"],
-                    seg["end"],
+    # Sample ranges of the segments and the merged ranges that are decoded
+    rate = cfg.SAMPLE_RATE
+    ranges = get_segment_ranges(segments, seg_length, rate)
+    max_length = max(1, int(cfg.FILE_SPLITTING_DURATION * rate))
+
+    merged = merge_segment_ranges(ranges, max_length)
+
+    # A single range without an end decodes the whole file
+    if not decode_ranges_separately(afile, merged, rate):
+        merged = [(0, None, list(range(len(ranges))))]
+
+    with ThreadPoolExecutor(WRITER_THREADS) as executor:
+        futures = []
+
+        for range_start, range_end, indices in merged:
+            # Times in the file are scaled by the audio speed
+            offset = range_start / cfg.SAMPLE_RATE * cfg.AUDIO_SPEED
+            duration = None if range_end is None else (range_end - range_start) / cfg.SAMPLE_RATE * cfg.AUDIO_SPEED
+
+            try:
+                # Open the part of the audio file
+                sig, rate = audio.open_audio_file(
+                    afile, cfg.SAMPLE_RATE, offset=offset, duration=duration, speed=cfg.AUDIO_SPEED
                 )
-                seg_path = os.path.join(outpath, seg_name)
-                audio.save_signal(seg_sig, seg_path, rate)
-
-        except Exception as ex:
-            # Write error log
-            print(f"Error: Cannot extract segments from {afile}.", flush=True)
-            utils.write_error_log(ex)
-            return False
+            except Exception as ex:
+                print(f"Error: Cannot open audio file {afile}", flush=True)
+                utils.write_error_log(ex)
+
+                return
+
+            # Extract segments, the decoded part ends early at the end of the file
+            for i in indices:
+                start, end = ranges[i]
+                seg_sig = sig[start - range_start : end - range_start]
+
+                # Make sure segment is long enough
+                if len(seg_sig) > 0:
+                    futures.append(executor.submit(save_segment, seg_sig, segments[i], i + 1, rate))
+
+        for future in futures:
+            try:
+                future.result()
+            except Exception as ex:
+                # Write error log
+                print(f"Error: Cannot extract segments from {afile}.", flush=True)
+                utils.write_error_log(ex)
+                return False
 
     return True
@@ -25,6 +25,10 @@ def train(
     model_save_mode: Literal["replace", "append"] = "replace",
     cache_mode: Literal["load", "save"] | None = None,
     cache_file: str = "train_cache.npz",
+    embeddings_db: str | None = None,
+    embeddings_cache: str | None = None,
+    memmap_dir: str | None = None,
+    data_pipeline: bool = False,
     threads: int = 1,
     fmin: float = 0.0,
     fmax: float = 15000.0,
@@ -32,6 +36,8 @@ def train(
     autotune: bool = False,
     autotune_trials: int = 50,
     autotune_executions_per_trial: int = 1,
+    autotune_parallel_trials: int = 1,
+    autotune_pruning_epochs: int = 0,
 ):
     """
     Trains a custom classifier model using the BirdNET-Analyzer framework.
@@ -58,6 +64,16 @@ def train(
         model_save_mode (Literal["replace", "append"], optional): Save mode for the model. Defaults to "replace".
         cache_mode (Literal["load", "save"] | None, optional): Cache mode for training data. Defaults to None.
         cache_file (str, optional): Path to the cache file. Defaults to "train_cache.npz".
+        embeddings_db (str | None, optional): Path to an embeddings database. Stored embeddings of training files
+            are reused if the database was created with the same bandpass and speed settings. Defaults to None.
+        embeddings_cache (str | None, optional): Path to a folder caching the embeddings of every training file.
+            Only new or changed files are processed, unlike cache_mode which caches the whole training set.
+            Defaults to None.
+        memmap_dir (str | None, optional): Path to a folder for memory-mapped training data. Embeddings are
+            streamed to disk and read in batches during training, so the training set can exceed RAM.
+            Defaults to None.
+        data_pipeline (bool, optional): Whether to stream the training data in batches, which are shuffled,
+            upsampled and augmented anew in every epoch. Defaults to False.
         threads (int, optional): Number of CPU threads to use. Defaults to 1.
         fmin (float, optional): Minimum frequency for bandpass filtering. Defaults to 0.0.
         fmax (float, optional): Maximum frequency for bandpass filtering. Defaults to 15000.0.
@@ -65,6 +81,10 @@ def train(
         autotune (bool, optional): Whether to use hyperparameter autotuning. Defaults to False.
         autotune_trials (int, optional): Number of trials for autotuning. Defaults to 50.
         autotune_executions_per_trial (int, optional): Number of executions per autotuning trial. Defaults to 1.
+        autotune_parallel_trials (int, optional): Number of autotuning trials that run at the same time in
+            separate processes, the threads are split between them. Defaults to 1.
+        autotune_pruning_epochs (int, optional): Epoch after which autotuning trials below the median validation
+            AUPRC of earlier trials are stopped, 0 disables pruning. Defaults to 0.
     Returns:
         None
     """
@@ -97,6 +117,10 @@ def train(
     cfg.TRAINED_MODEL_SAVE_MODE = model_save_mode
     cfg.TRAIN_CACHE_MODE = cache_mode
     cfg.TRAIN_CACHE_FILE = cache_file
+    cfg.TRAIN_EMBEDDINGS_DATABASE = embeddings_db
+    cfg.TRAIN_EMBEDDINGS_CACHE = embeddings_cache
+    cfg.TRAIN_MEMMAP_DIR = memmap_dir
+    cfg.TRAIN_DATA_PIPELINE = data_pipeline
     cfg.TFLITE_THREADS = 1
     cfg.CPU_THREADS = threads
 
@@ -108,6 +132,8 @@ def train(
     cfg.AUTOTUNE = autotune
     cfg.AUTOTUNE_TRIALS = autotune_trials
     cfg.AUTOTUNE_EXECUTIONS_PER_TRIAL = autotune_executions_per_trial
+    cfg.AUTOTUNE_PARALLEL_TRIALS = autotune_parallel_trials
+    cfg.AUTOTUNE_PRUNING_EPOCHS = autotune_pruning_epochs
 
     # Train model
     train_model()
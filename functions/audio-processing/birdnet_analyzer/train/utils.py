@@ -45,11 +45,142 @@ def save_sample_counts(labels, y_train):
             writer.writerow([label, count])
 
 
-def _load_audio_file(f, label_vector, config):
+class _ArrayAppender:
+    """Collects the rows of a 2D float32 array as they arrive.
+
+    Rows are kept as one block per file instead of one object per row, or are
+    written to a file that is memory-mapped once all rows are known.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.file = open(path, "wb") if path else None
+        self.blocks = []
+        self.rows = 0
+        self.width = 0
+
+    def append(self, rows):
+        rows = np.asarray(rows, dtype="float32")
+
+        if rows.ndim != 2 or len(rows) == 0:
+            return
+
+        self.rows += len(rows)
+        self.width = rows.shape[1]
+
+        if self.file:
+            self.file.write(np.ascontiguousarray(rows).tobytes())
+        else:
+            self.blocks.append(rows)
+
+    def finish(self):
+        """Returns all rows as one array, memory-mapped if a path was given."""
+        if self.file:
+            self.file.close()
+
+            if self.rows:
+                return np.memmap(self.path, dtype="float32", mode="r+", shape=(self.rows, self.width))
+
+        if not self.blocks:
+            return np.array([], dtype="float32")
+
+        return np.concatenate(self.blocks)
+
+
+def _read_stored_embeddings(db, source_id):
+    """Reads the stored embeddings of a training file.
+
+    Args:
+        db: The embeddings database.
+        source_id: The source id of the file in the database.
+
+    Returns:
+        The stored embeddings, or None if they cannot be read and have to be computed.
+    """
+    from birdnet_analyzer.embeddings.utils import get_stored_embeddings
+
+    try:
+        return get_stored_embeddings(db, source_id)
+    except Exception as ex:
+        print(f"\t...cannot read stored embeddings, computing them: {source_id}", flush=True)
+        utils.write_error_log(ex)
+
+        return None
+
+
+def _open_embeddings_database(db_path):
+    """Opens an embeddings database to reuse its embeddings for training.
+
+    Args:
+        db_path: Path to the database.
+
+    Returns:
+        The database, or None if it does not exist or was created with different settings.
+    """
+    from birdnet_analyzer.embeddings.core import get_database
+    from birdnet_analyzer.embeddings.utils import load_storage_settings
+
+    if not os.path.exists(db_path):
+        print(f"\t...embeddings database not found: {db_path}", flush=True)
+        return None
+
+    db = get_database(db_path)
+
+    try:
+        settings = db.get_metadata("birdnet_analyzer_settings")
+    except KeyError:
+        print(f"\t...no settings present in embeddings database: {db_path}", flush=True)
+        return None
+
+    if (
+        settings["BANDPASS_FMIN"] != cfg.BANDPASS_FMIN
+        or settings["BANDPASS_FMAX"] != cfg.BANDPASS_FMAX
+        or settings["AUDIO_SPEED"] != cfg.AUDIO_SPEED
+    ):
+        print(f"\t...settings of embeddings database do not match, computing all embeddings: {db_path}", flush=True)
+        return None
+
+    load_storage_settings(db)
+
+    print(f"\t...reusing embeddings from database: {db_path}", flush=True)
+
+    return db
+
+
+def _get_crop_offsets(sig, rate, num_splits):
+    """Returns the start of every training crop in seconds.
+
+    Args:
+        sig: The signal the crops were taken from.
+        rate: The sampling rate.
+        num_splits: The number of crops.
+
+    Returns:
+        A list of start times, or None if the crops do not line up with fixed windows.
+    """
+    if cfg.SAMPLE_CROP_MODE == "first":
+        return [0.0]
+
+    if cfg.SAMPLE_CROP_MODE == "center":
+        chunksize = int(cfg.SIG_LENGTH * rate)
+
+        # Shorter signals are padded at the end
+        return [int((len(sig) - chunksize) / 2) / rate if len(sig) > chunksize else 0.0]
+
+    if cfg.SAMPLE_CROP_MODE == "segments":
+        stepsize = int(rate * (cfg.SIG_LENGTH - cfg.SIG_OVERLAP))
+
+        return [i * stepsize / rate for i in range(num_splits)]
+
+    return None
+
+
+def _load_audio_file(f, label_vector, config, stored=None):
     """Load an audio file and extract features.
     Args:
         f: Path to the audio file.
         label_vector: The label vector for the file.
+        stored: Dict of rounded (start, end) offsets to embeddings of this file that are already known.
     Returns:
         A tuple of (x_train, y_train).
     """
@@ -60,6 +191,20 @@ def _load_audio_file(f, label_vector, config):
     # restore config in case we're on Windows to be thread save
     cfg.set_config(config)
 
+    # Use the cached embeddings if the file did not change
+    cache_path = None
+
+    if cfg.TRAIN_EMBEDDINGS_CACHE:
+        try:
+            cache_path = utils.get_file_cache_path(cfg.TRAIN_EMBEDDINGS_CACHE, f)
+            cached = utils.load_file_from_cache(cache_path)
+
+            if cached is not None:
+                return list(cached), [label_vector] * len(cached)
+        except Exception as e:
+            print(f"\t Error when reading cache for file {f}", flush=True)
+            print(f"\t {e}", flush=True)
+
     # Try to load the audio file
     try:
         # Load audio
@@ -89,17 +234,36 @@ def _load_audio_file(f, label_vector, config):
     else:
         sig_splits = audio.split_signal(sig, rate, cfg.SIG_LENGTH, cfg.SIG_OVERLAP, cfg.SIG_MINLEN)
 
+    # Look up known embeddings, only the missing ones are computed
+    reused = [None] * len(sig_splits)
+    offsets = _get_crop_offsets(sig, rate, len(sig_splits)) if stored else None
+
+    if offsets is not None:
+        reused = [stored.get((round(o, 3), round(o + cfg.SIG_LENGTH, 3))) for o in offsets]
+
     # Get feature embeddings
     batch_size = 1  # turns out that batch size 1 is the fastest, probably because of having to resize the model input when the number of samples in a batch changes
     for i in range(0, len(sig_splits), batch_size):
         batch_sig = sig_splits[i : i + batch_size]
         batch_label = [label_vector] * len(batch_sig)
-        embeddings = model.embeddings(batch_sig)
+        batch_reused = reused[i : i + batch_size]
+
+        if all(e is not None for e in batch_reused):
+            embeddings = batch_reused
+        else:
+            embeddings = model.embeddings(batch_sig)
 
         # Add to training data
         x_train.extend(embeddings)
         y_train.extend(batch_label)
 
+    if cache_path and x_train:
+        try:
+            utils.save_file_to_cache(cache_path, x_train)
+        except Exception as e:
+            print(f"\t Error when writing cache for file {f}", flush=True)
+            print(f"\t {e}", flush=True)
+
     return x_train, y_train
 
 def _load_training_data(cache_mode=None, cache_file="", progress_callback=None):
@@ -188,9 +352,32 @@ def _load_training_data(cache_mode=None, cache_file="", progress_callback=None):
     x_test = []
     y_test = []
 
-    def load_data(data_path, allowed_folders):
-        x = []
-        y = []
+    # Embeddings database to reuse embeddings from
+    db = _open_embeddings_database(cfg.TRAIN_EMBEDDINGS_DATABASE) if cfg.TRAIN_EMBEDDINGS_DATABASE else None
+
+    if db:
+        from birdnet_analyzer.embeddings.utils import get_source_ids
+
+        try:
+            source_ids = get_source_ids(db)
+        except Exception as ex:
+            print(
+                f"\t...cannot read embeddings database, computing all embeddings: {cfg.TRAIN_EMBEDDINGS_DATABASE}",
+                flush=True,
+            )
+            utils.write_error_log(ex)
+            db = None
+
+    def load_data(data_path, allowed_folders, name):
+        # Stream results to disk if configured, otherwise collect them in memory
+        if cfg.TRAIN_MEMMAP_DIR:
+            os.makedirs(cfg.TRAIN_MEMMAP_DIR, exist_ok=True)
+            x = _ArrayAppender(os.path.join(cfg.TRAIN_MEMMAP_DIR, f"x_{name}.f32"))
+            y = _ArrayAppender(os.path.join(cfg.TRAIN_MEMMAP_DIR, f"y_{name}.f32"))
+        else:
+            x = _ArrayAppender()
+            y = _ArrayAppender()
+
         folders = list(sorted(utils.list_subdirectories(data_path)))
 
         for folder in folders:
@@ -226,8 +413,12 @@ def _load_training_data(cache_mode=None, cache_file="", progress_callback=None):
                 tasks = []
 
                 for f in files:
+                    source_id = source_ids.get(os.path.abspath(f)) if db else None
+                    stored = _read_stored_embeddings(db, source_id) if source_id else None
                     task = p.apply_async(
-                        partial(_load_audio_file, f=f, label_vector=label_vector, config=cfg.get_config())
+                        partial(
+                            _load_audio_file, f=f, label_vector=label_vector, config=cfg.get_config(), stored=stored
+                        )
                     )
                     tasks.append(task)
 
@@ -241,24 +432,25 @@ def _load_training_data(cache_mode=None, cache_file="", progress_callback=None):
                         # Empty results might be caused by errors when loading the audio file
                         # TODO: We should check for embeddings size in result, otherwise we can't add them to the training data
                         if len(result[0]) > 0:
-                            x += result[0]
-                            y += result[1]
+                            x.append(result[0])
+                            y.append(result[1])
 
                         num_files_processed += 1
                         progress_bar.update(1)
 
                         if progress_callback:
                             progress_callback(num_files_processed, len(tasks), folder)
-        return np.array(x, dtype="float32"), np.array(y, dtype="float32")
 
-    x_train, y_train = load_data(cfg.TRAIN_DATA_PATH, train_folders)
+        return x.finish(), y.finish()
+
+    x_train, y_train = load_data(cfg.TRAIN_DATA_PATH, train_folders, "train")
 
     if cfg.TEST_DATA_PATH and cfg.TEST_DATA_PATH != cfg.TRAIN_DATA_PATH:
         test_folders = list(sorted(utils.list_subdirectories(cfg.TEST_DATA_PATH)))
         allowed_test_folders = [
             folder for folder in test_folders if folder in train_folders and not folder.startswith("-")
         ]
-        x_test, y_test = load_data(cfg.TEST_DATA_PATH, allowed_test_folders)
+        x_test, y_test = load_data(cfg.TEST_DATA_PATH, allowed_test_folders, "test")
     else:
         x_test = np.array([])
         y_test = np.array([])
@@ -276,27 +468,405 @@ def _load_training_data(cache_mode=None, cache_file="", progress_callback=None):
     return x_train, y_train, x_test, y_test, valid_labels
 
 
-def normalize_embeddings(embeddings):
+def normalize_embeddings(embeddings, chunk_size=65536):
     """
     Normalize embeddings to improve training stability and performance.
     
     This applies L2 normalization to each embedding vector, which can help
     with convergence and model performance, especially when training on 
     embeddings from different sources or domains.
+
+    The embeddings are normalized in place and in chunks, so memory-mapped
+    data is never loaded at once.
     
     Args:
         embeddings: numpy array of embedding vectors
+        chunk_size: Number of embeddings normalized at a time
         
     Returns:
         Normalized embeddings array
     """
-    # Calculate L2 norm of each embedding vector
-    norms = np.sqrt(np.sum(embeddings**2, axis=1, keepdims=True))
-    # Avoid division by zero
-    norms[norms == 0] = 1.0
-    # Normalize each embedding vector
-    normalized = embeddings / norms
-    return normalized
+    for i in range(0, len(embeddings), chunk_size):
+        chunk = embeddings[i : i + chunk_size]
+        # Calculate L2 norm of each embedding vector
+        norms = np.sqrt(np.sum(chunk**2, axis=1, keepdims=True))
+        # Avoid division by zero
+        norms[norms == 0] = 1.0
+        # Normalize each embedding vector
+        chunk /= norms
+
+    return embeddings
+
+
+class _TrialPruned(Exception):
+    """Raised to stop a tuner trial that is worse than most earlier trials."""
+
+
+def _get_trial_params(hp):
+    """Defines the hyperparameters of a tuner trial.
+
+    Args:
+        hp: The keras_tuner.HyperParameters of the trial.
+
+    Returns:
+        A dict with the hyperparameter values of the trial.
+    """
+    # Only allow repeat upsampling in multi-label setting
+    upsampling_choices = ["repeat", "mean", "linear"]  # SMOTE is too slow
+
+    if cfg.MULTI_LABEL:
+        upsampling_choices = ["repeat"]
+
+    params = {
+        "hidden_units": hp.Choice("hidden_units", [0, 128, 256, 512, 1024, 2048], default=cfg.TRAIN_HIDDEN_UNITS),
+        "dropout": hp.Choice("dropout", [0.0, 0.25, 0.33, 0.5, 0.75, 0.9], default=cfg.TRAIN_DROPOUT),
+        "batch_size": hp.Choice("batch_size", [8, 16, 32, 64, 128], default=cfg.TRAIN_BATCH_SIZE),
+    }
+
+    if params["batch_size"] == 8:
+        params["learning_rate"] = hp.Choice(
+            "learning_rate_8",
+            [0.0005, 0.0002, 0.0001],
+            default=0.0001,
+            parent_name="batch_size",
+            parent_values=[8],
+        )
+    elif params["batch_size"] == 16:
+        params["learning_rate"] = hp.Choice(
+            "learning_rate_16",
+            [0.005, 0.002, 0.001, 0.0005, 0.0002],
+            default=0.0005,
+            parent_name="batch_size",
+            parent_values=[16],
+        )
+    elif params["batch_size"] == 32:
+        params["learning_rate"] = hp.Choice(
+            "learning_rate_32",
+            [0.01, 0.005, 0.001, 0.0005, 0.0001],
+            default=0.0001,
+            parent_name="batch_size",
+            parent_values=[32],
+        )
+    elif params["batch_size"] == 64:
+        params["learning_rate"] = hp.Choice(
+            "learning_rate_64",
+            [0.01, 0.005, 0.002, 0.001],
+            default=0.001,
+            parent_name="batch_size",
+            parent_values=[64],
+        )
+    elif params["batch_size"] == 128:
+        params["learning_rate"] = hp.Choice(
+            "learning_rate_128",
+            [0.1, 0.01, 0.005],
+            default=0.005,
+            parent_name="batch_size",
+            parent_values=[128],
+        )
+
+    params["upsampling_ratio"] = hp.Choice(
+        "upsampling_ratio", [0.0, 0.25, 0.33, 0.5, 0.75, 1.0], default=cfg.UPSAMPLING_RATIO
+    )
+    params["upsampling_mode"] = hp.Choice(
+        "upsampling_mode",
+        upsampling_choices,
+        default=cfg.UPSAMPLING_MODE,
+        parent_name="upsampling_ratio",
+        parent_values=[0.25, 0.33, 0.5, 0.75, 1.0],
+    )
+    params["mixup"] = hp.Boolean("mixup", default=cfg.TRAIN_WITH_MIXUP)
+    params["label_smoothing"] = hp.Boolean("label_smoothing", default=cfg.TRAIN_WITH_LABEL_SMOOTHING)
+    params["focal_loss"] = hp.Boolean("focal_loss", default=cfg.TRAIN_WITH_FOCAL_LOSS)
+    params["focal_loss_gamma"] = hp.Choice(
+        "focal_loss_gamma",
+        [0.5, 1.0, 2.0, 3.0, 4.0],
+        default=cfg.FOCAL_LOSS_GAMMA,
+        parent_name="focal_loss",
+        parent_values=[True],
+    )
+    params["focal_loss_alpha"] = hp.Choice(
+        "focal_loss_alpha",
+        [0.1, 0.25, 0.5, 0.75, 0.9],
+        default=cfg.FOCAL_LOSS_ALPHA,
+        parent_name="focal_loss",
+        parent_values=[True],
+    )
+
+    return params
+
+
+def _get_prune_threshold(early_scores):
+    """Returns the validation AUPRC a trial has to reach at the pruning epoch, or None if trials are not pruned.
+
+    Trials are pruned if they are worse than the median of the earlier trials, once there are at least three.
+    """
+    if cfg.AUTOTUNE_PRUNING_EPOCHS <= 0 or len(early_scores) < 3:
+        return None
+
+    return float(np.median(early_scores))
+
+
+def _run_trial(params, x_train, y_train, x_test, y_test, executions, prune_threshold=None, trial_number=0):
+    """Trains the classifiers of a tuner trial.
+
+    Args:
+        params: The hyperparameter values of the trial.
+        x_train: Samples.
+        y_train: Labels.
+        x_test: Test samples.
+        y_test: Test labels.
+        executions: Number of classifiers to train.
+        prune_threshold: Minimum validation AUPRC at the pruning epoch, the trial is stopped below it.
+        trial_number: Number of the trial.
+
+    Returns:
+        A dict with the best validation AUPRC of each execution ("scores"), the validation AUPRC
+        at the pruning epoch ("early_scores") and whether the trial was pruned ("pruned").
+    """
+    import gc
+
+    import keras
+
+    scores = []
+    early_scores = []
+    pruned = False
+
+    for execution in range(int(executions)):
+        print(f"Running Trial #{trial_number} execution #{execution + 1}", flush=True)
+        val_auprc = []
+
+        def on_epoch_end(epoch, logs):
+            val_auprc.append(logs["val_AUPRC"])
+
+            if epoch + 1 == cfg.AUTOTUNE_PRUNING_EPOCHS:
+                early_scores.append(logs["val_AUPRC"])
+
+                if prune_threshold is not None and logs["val_AUPRC"] < prune_threshold:
+                    raise _TrialPruned()
+
+        # Build model
+        print("Building model...", flush=True)
+        classifier = model.build_linear_classifier(
+            y_train.shape[1], x_train.shape[1], hidden_units=params["hidden_units"], dropout=params["dropout"]
+        )
+        print("...Done.", flush=True)
+
+        # Train model
+        print("Training model...", flush=True)
+
+        try:
+            model.train_linear_classifier(
+                classifier,
+                x_train,
+                y_train,
+                x_test,
+                y_test,
+                epochs=cfg.TRAIN_EPOCHS,
+                batch_size=params["batch_size"],
+                learning_rate=params["learning_rate"],
+                val_split=0.0 if len(x_test) > 0 else cfg.TRAIN_VAL_SPLIT,
+                upsampling_ratio=params["upsampling_ratio"],
+                upsampling_mode=params["upsampling_mode"],
+                train_with_mixup=params["mixup"],
+                train_with_label_smoothing=params["label_smoothing"],
+                train_with_focal_loss=params["focal_loss"],
+                focal_loss_gamma=params["focal_loss_gamma"],
+                focal_loss_alpha=params["focal_loss_alpha"],
+                on_epoch_end=on_epoch_end,
+            )
+        except _TrialPruned:
+            pruned = True
+
+        # Get the best validation AUPRC instead of loss
+        best_val_auprc = max(val_auprc)
+        scores.append(best_val_auprc)
+
+        print(
+            f"Finished Trial #{trial_number} execution #{execution + 1}. Best validation AUPRC: {best_val_auprc}",
+            flush=True,
+        )
+
+        if pruned:
+            print(f"Pruned Trial #{trial_number} after {cfg.AUTOTUNE_PRUNING_EPOCHS} epochs.", flush=True)
+            break
+
+    keras.backend.clear_session()
+    del classifier
+    gc.collect()
+
+    return {"scores": scores, "early_scores": early_scores, "pruned": pruned}
+
+
+def _share_arrays(arrays):
+    """Makes arrays available to worker processes.
+
+    Arrays are copied to shared memory once, memory-mapped arrays are shared through their file.
+
+    Args:
+        arrays: The arrays to share.
+
+    Returns:
+        A tuple of (shared memory blocks, picklable array specs), the blocks have to be released by the caller.
+    """
+    from multiprocessing import shared_memory
+
+    blocks = []
+    specs = []
+
+    for array in arrays:
+        if isinstance(array, np.memmap):
+            specs.append(("memmap", array.filename, array.shape, array.dtype.str))
+            continue
+
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        specs.append(("shm", block.name, array.shape, array.dtype.str))
+
+    return blocks, specs
+
+
+def _attach_arrays(specs):
+    """Opens arrays shared by _share_arrays.
+
+    Returns:
+        A tuple of (shared memory blocks, arrays), the blocks have to be kept alive while the arrays are used.
+    """
+    from multiprocessing import shared_memory
+
+    blocks = []
+    arrays = []
+
+    for kind, name, shape, dtype in specs:
+        if kind == "memmap":
+            arrays.append(np.memmap(name, dtype=dtype, mode="r", shape=shape))
+        else:
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            arrays.append(np.ndarray(shape, dtype=dtype, buffer=block.buf))
+
+    return blocks, arrays
+
+
+# Training data of a tuner worker process
+_TUNER_DATA = None
+
+
+def _init_tuner_worker(threads, specs):
+    """Limits the threads of a tuner worker process and opens the shared training data."""
+    global _TUNER_DATA
+
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    _TUNER_DATA = _attach_arrays(specs)
+
+
+def _run_trial_worker(item):
+    """Runs a tuner trial in a worker process.
+
+    Args:
+        item: A tuple of (params, executions, prune_threshold, trial_number, config).
+
+    Returns:
+        The result of _run_trial, or a dict with the index of an empty class ("empty_class").
+    """
+    params, executions, prune_threshold, trial_number, config = item
+    cfg.set_config(config)
+
+    try:
+        return _run_trial(params, *_TUNER_DATA[1], executions, prune_threshold, trial_number)
+    except model.get_empty_class_exception() as e:
+        return {"empty_class": e.index}
+
+
+def _search_parallel(tuner, arrays, on_trial_result=None):
+    """Runs the trials of a tuner concurrently in worker processes.
+
+    Trials are requested from the tuner's oracle as soon as a worker is free, and their results are
+    reported back to it, so the search still uses the results of all finished trials.
+    Each worker gets an equal share of cfg.CPU_THREADS.
+
+    Args:
+        tuner: The keras_tuner tuner.
+        arrays: A tuple of (x_train, y_train, x_test, y_test).
+        on_trial_result: A callback function that takes the number of finished trials.
+    """
+    import multiprocessing
+    import time
+
+    num_workers = max(1, cfg.AUTOTUNE_PARALLEL_TRIALS)
+    threads = max(1, cfg.CPU_THREADS // num_workers)
+    blocks, specs = _share_arrays(arrays)
+    early_scores = []
+    running = {}
+    num_finished = 0
+    stopped = False
+
+    try:
+        # Workers must not inherit the TensorFlow state of this process
+        with multiprocessing.get_context("spawn").Pool(
+            num_workers, initializer=_init_tuner_worker, initargs=(threads, specs)
+        ) as p:
+            while running or not stopped:
+                # Start trials on free workers
+                for worker in range(num_workers):
+                    if stopped or worker in running:
+                        continue
+
+                    trial = tuner.oracle.create_trial(f"worker{worker}")
+
+                    if trial.status == "STOPPED":
+                        stopped = True
+                        break
+
+                    if trial.status == "IDLE":
+                        break
+
+                    params = _get_trial_params(trial.hyperparameters)
+                    tuner.oracle.update_space(trial.hyperparameters)
+                    trial_number = len(tuner.oracle.trials)
+                    item = (
+                        params,
+                        tuner.executions_per_trial,
+                        _get_prune_threshold(early_scores),
+                        trial_number,
+                        cfg.get_config(),
+                    )
+                    running[worker] = (trial, p.apply_async(_run_trial_worker, (item,)))
+
+                # Report finished trials
+                for worker, (trial, task) in list(running.items()):
+                    if not task.ready():
+                        continue
+
+                    del running[worker]
+                    result = task.get()
+
+                    if "empty_class" in result:
+                        raise model.get_empty_class_exception()(index=result["empty_class"])
+
+                    early_scores.extend(result["early_scores"])
+
+                    # Report the negative AUPRC for minimization (keras-tuner minimizes by default)
+                    tuner.oracle.update_trial(
+                        trial.trial_id, {tuner.oracle.objective.name: -float(np.mean(result["scores"]))}
+                    )
+                    trial.status = "COMPLETED"
+                    tuner.oracle.end_trial(trial)
+                    num_finished += 1
+
+                    if on_trial_result:
+                        on_trial_result(num_finished)
+
+                time.sleep(0.1)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
 
 
 def train_model(on_epoch_end=None, on_trial_result=None, on_data_load_end=None, autotune_directory="autotune"):
@@ -326,9 +896,6 @@ def train_model(on_epoch_end=None, on_trial_result=None, on_data_load_end=None,
         x_test = normalize_embeddings(x_test)
 
     if cfg.AUTOTUNE:
-        import gc
-
-        import keras
         import keras_tuner
 
         # Call callback to initialize progress bar
@@ -349,140 +916,29 @@ def train_model(on_epoch_end=None, on_trial_result=None, on_data_load_end=None,
                 self.x_test = x_test
                 self.y_test = y_test
                 self.on_trial_result = on_trial_result
+                self.early_scores = []
 
             def run_trial(self, trial, *args, **kwargs):
-                histories = []
-                hp: keras_tuner.HyperParameters = trial.hyperparameters
                 trial_number = len(self.oracle.trials)
-
-                for execution in range(int(self.executions_per_trial)):
-                    print(f"Running Trial #{trial_number} execution #{execution + 1}", flush=True)
-
-                    # Build model
-                    print("Building model...", flush=True)
-                    classifier = model.build_linear_classifier(
-                        self.y_train.shape[1],
-                        self.x_train.shape[1],
-                        hidden_units=hp.Choice(
-                            "hidden_units", [0, 128, 256, 512, 1024, 2048], default=cfg.TRAIN_HIDDEN_UNITS
-                        ),
-                        dropout=hp.Choice("dropout", [0.0, 0.25, 0.33, 0.5, 0.75, 0.9], default=cfg.TRAIN_DROPOUT),
-                    )
-                    print("...Done.", flush=True)
-
-                    # Only allow repeat upsampling in multi-label setting
-                    upsampling_choices = ["repeat", "mean", "linear"]  # SMOTE is too slow
-
-                    if cfg.MULTI_LABEL:
-                        upsampling_choices = ["repeat"]
-
-                    batch_size = hp.Choice("batch_size", [8, 16, 32, 64, 128], default=cfg.TRAIN_BATCH_SIZE)
-
-                    if batch_size == 8:
-                        learning_rate = hp.Choice(
-                            "learning_rate_8",
-                            [0.0005, 0.0002, 0.0001],
-                            default=0.0001,
-                            parent_name="batch_size",
-                            parent_values=[8],
-                        )
-                    elif batch_size == 16:
-                        learning_rate = hp.Choice(
-                            "learning_rate_16",
-                            [0.005, 0.002, 0.001, 0.0005, 0.0002],
-                            default=0.0005,
-                            parent_name="batch_size",
-                            parent_values=[16],
-                        )
-                    elif batch_size == 32:
-                        learning_rate = hp.Choice(
-                            "learning_rate_32",
-                            [0.01, 0.005, 0.001, 0.0005, 0.0001],
-                            default=0.0001,
-                            parent_name="batch_size",
-                            parent_values=[32],
-                        )
-                    elif batch_size == 64:
-                        learning_rate = hp.Choice(
-                            "learning_rate_64",
-                            [0.01, 0.005, 0.002, 0.001],
-                            default=0.001,
-                            parent_name="batch_size",
-                            parent_values=[64],
-                        )
-                    elif batch_size == 128:
-                        learning_rate = hp.Choice(
-                            "learning_rate_128",
-                            [0.1, 0.01, 0.005],
-                            default=0.005,
-                            parent_name="batch_size",
-                            parent_values=[128],
-                        )
-
-                    # Train model
-                    print("Training model...", flush=True)
-                    classifier, history = model.train_linear_classifier(
-                        classifier,
-                        self.x_train,
-                        self.y_train,
-                        self.x_test,
-                        self.y_test,
-                        epochs=cfg.TRAIN_EPOCHS,
-                        batch_size=batch_size,
-                        learning_rate=learning_rate,
-                        val_split=0.0 if len(self.x_test) > 0 else cfg.TRAIN_VAL_SPLIT,
-                        upsampling_ratio=hp.Choice(
-                            "upsampling_ratio", [0.0, 0.25, 0.33, 0.5, 0.75, 1.0], default=cfg.UPSAMPLING_RATIO
-                        ),
-                        upsampling_mode=hp.Choice(
-                            "upsampling_mode",
-                            upsampling_choices,
-                            default=cfg.UPSAMPLING_MODE,
-                            parent_name="upsampling_ratio",
-                            parent_values=[0.25, 0.33, 0.5, 0.75, 1.0],
-                        ),
-                        train_with_mixup=hp.Boolean("mixup", default=cfg.TRAIN_WITH_MIXUP),
-                        train_with_label_smoothing=hp.Boolean(
-                            "label_smoothing", default=cfg.TRAIN_WITH_LABEL_SMOOTHING
-                        ),
-                        train_with_focal_loss=hp.Boolean("focal_loss", default=cfg.TRAIN_WITH_FOCAL_LOSS),
-                        focal_loss_gamma=hp.Choice(
-                            "focal_loss_gamma", 
-                            [0.5, 1.0, 2.0, 3.0, 4.0], 
-                            default=cfg.FOCAL_LOSS_GAMMA,
-                            parent_name="focal_loss",
-                            parent_values=[True]
-                        ),
-                        focal_loss_alpha=hp.Choice(
-                            "focal_loss_alpha", 
-                            [0.1, 0.25, 0.5, 0.75, 0.9], 
-                            default=cfg.FOCAL_LOSS_ALPHA,
-                            parent_name="focal_loss",
-                            parent_values=[True]
-                        ),
-                    )
-
-                    # Get the best validation AUPRC instead of loss
-                    best_val_auprc = history.history["val_AUPRC"][np.argmax(history.history["val_AUPRC"])]
-                    histories.append(best_val_auprc)
-
-                    print(
-                        f"Finished Trial #{trial_number} execution #{execution + 1}. Best validation AUPRC: {best_val_auprc}",
-                        flush=True,
-                    )
-
-                keras.backend.clear_session()
-                del classifier
-                del history
-                gc.collect()
+                result = _run_trial(
+                    _get_trial_params(trial.hyperparameters),
+                    self.x_train,
+                    self.y_train,
+                    self.x_test,
+                    self.y_test,
+                    self.executions_per_trial,
+                    _get_prune_threshold(self.early_scores),
+                    trial_number,
+                )
+                self.early_scores.extend(result["early_scores"])
 
                 # Call the on_trial_result callback
                 if self.on_trial_result:
                     self.on_trial_result(trial_number)
 
                 # Return the negative AUPRC for minimization (keras-tuner minimizes by default)
-                return [-h for h in histories]
-                
+                return [-h for h in result["scores"]]
+
         # Create the tuner instance
         tuner = BirdNetTuner(
             x_train=x_train,
@@ -494,7 +950,10 @@ def train_model(on_epoch_end=None, on_trial_result=None, on_data_load_end=None,
             on_trial_result=on_trial_result,
         )
         try:
-            tuner.search()
+            if cfg.AUTOTUNE_PARALLEL_TRIALS > 1:
+                _search_parallel(tuner, (x_train, y_train, x_test, y_test), on_trial_result)
+            else:
+                tuner.search()
         except model.get_empty_class_exception() as e:
             e.message = f"Class with label {labels[e.index]} is empty. Please remove it from the training data."
             e.args = (e.message,)
@@ -650,40 +1109,143 @@ def train_model(on_epoch_end=None, on_trial_result=None, on_data_load_end=None,
 
     return history, metrics
 
+# Candidate thresholds for the optimized threshold of each class
+THRESHOLD_CANDIDATES = np.arange(0.1, 0.9, 0.05)
+
+
+def _sort_scores(y_true, y_pred_prob):
+    """Sorts the scores of every class in descending order.
+
+    Args:
+        y_true: Ground truth labels of shape (samples, classes).
+        y_pred_prob: Predicted probabilities of shape (samples, classes).
+
+    Returns:
+        A tuple of (sorted scores, cumulative true positives, cumulative false positives),
+        the cumulative counts include the sample at each position.
+    """
+    order = np.argsort(-y_pred_prob, axis=0, kind="stable")
+    scores = np.take_along_axis(y_pred_prob, order, axis=0)
+    positives = np.take_along_axis(y_true == 1, order, axis=0)
+    cum_tp = np.cumsum(positives, axis=0)
+    cum_fp = np.arange(1, len(scores) + 1)[:, None] - cum_tp
+
+    return scores, cum_tp, cum_fp
+
+
+def _threshold_counts(scores, cum_tp, thresholds):
+    """Counts the true and false positives of every class at every threshold.
+
+    Args:
+        scores: Scores of every class, sorted in descending order.
+        cum_tp: Cumulative true positives of the sorted scores.
+        thresholds: Thresholds, samples with a score >= threshold are positive.
+
+    Returns:
+        A tuple of (tp, fp), each of shape (thresholds, classes).
+    """
+    # Number of samples above each threshold, which is the rank in the sorted scores
+    num_predicted = np.stack([np.count_nonzero(scores >= t, axis=0) for t in thresholds])
+    cum_tp = np.concatenate((np.zeros((1, cum_tp.shape[1]), dtype=cum_tp.dtype), cum_tp))
+    tp = np.take_along_axis(cum_tp, num_predicted, axis=0)
+
+    return tp, num_predicted - tp
+
+
+def _precision_recall_f1(tp, fp, num_positives):
+    """Computes precision, recall and F1 score from counts, undefined values are 0."""
+    fn = num_positives - tp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(num_positives > 0, tp / num_positives, 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+
+    return precision, recall, f1
+
+
+def _ranking_scores(scores, cum_tp, cum_fp):
+    """Computes the average precision and the area under the ROC curve of every class.
+
+    Tied scores are handled like in scikit-learn, they form a single point on the curves.
+
+    Args:
+        scores: Scores of every class, sorted in descending order.
+        cum_tp: Cumulative true positives of the sorted scores.
+        cum_fp: Cumulative false positives of the sorted scores.
+
+    Returns:
+        A tuple of (auprc, auroc), undefined for classes without positive or negative samples.
+    """
+    n = len(scores)
+    positions = np.arange(n)[:, None]
+    num_positives = cum_tp[-1]
+    num_negatives = cum_fp[-1]
+    is_positive = np.diff(cum_tp, axis=0, prepend=0) == 1
+
+    # Last and first position of the group of tied scores of each sample
+    is_last = np.ones(scores.shape, dtype=bool)
+    is_last[:-1] = scores[:-1] != scores[1:]
+    is_first = np.ones(scores.shape, dtype=bool)
+    is_first[1:] = is_last[:-1]
+    last = np.minimum.accumulate(np.where(is_last, positions, n)[::-1], axis=0)[::-1]
+    first = np.maximum.accumulate(np.where(is_first, positions, 0), axis=0)
+
+    tp_last = np.take_along_axis(cum_tp, last, axis=0)
+    fp_last = np.take_along_axis(cum_fp, last, axis=0)
+    fp_before = np.take_along_axis(cum_fp - ~is_positive, first, axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Every positive adds the precision at the lowest threshold that still includes it
+        auprc = np.sum(is_positive * tp_last / (tp_last + fp_last), axis=0) / num_positives
+
+        # Negatives below each positive, tied negatives count half
+        below = num_negatives - fp_last + 0.5 * (fp_last - fp_before)
+        auroc = np.sum(is_positive * below, axis=0) / (num_positives * num_negatives)
+
+    return auprc, auroc
+
+
 def find_optimal_threshold(y_true, y_pred_prob):
     """
     Find the optimal classification threshold using the F1 score.
     
     For imbalanced datasets, the default threshold of 0.5 may not be optimal.
     This function finds the threshold that maximizes the F1 score for each class.
+    All candidate thresholds are evaluated at once from the sorted scores.
     
     Args:
-        y_true: Ground truth labels
-        y_pred_prob: Predicted probabilities
+        y_true: Ground truth labels, of one class or of shape (samples, classes)
+        y_pred_prob: Predicted probabilities, of the same shape
         
     Returns:
-        The optimal threshold value
+        The optimal threshold value, or an array with the threshold of each class
     """
-    from sklearn.metrics import f1_score
-    
-    # Try different thresholds and find the one that gives the best F1 score
-    best_threshold = 0.5
-    best_f1 = 0.0
-    
-    for threshold in np.arange(0.1, 0.9, 0.05):
-        y_pred = (y_pred_prob >= threshold).astype(int)
-        f1 = f1_score(y_true, y_pred)
-        
-        if f1 > best_f1:
-            best_f1 = f1
-            best_threshold = threshold
-    
-    return best_threshold
+    y_true = np.asarray(y_true)
+    y_pred_prob = np.asarray(y_pred_prob)
+    single_class = y_true.ndim == 1
+
+    if single_class:
+        y_true = y_true[:, None]
+        y_pred_prob = y_pred_prob[:, None]
+
+    scores, cum_tp, _ = _sort_scores(y_true, y_pred_prob)
+    tp, fp = _threshold_counts(scores, cum_tp, THRESHOLD_CANDIDATES)
+    _, _, f1 = _precision_recall_f1(tp, fp, cum_tp[-1])
+
+    # First threshold with the best F1 score, 0.5 if no threshold has a positive F1 score
+    best = np.argmax(f1, axis=0)
+    thresholds = np.where(f1.max(axis=0) > 0, THRESHOLD_CANDIDATES[best], 0.5)
+
+    return thresholds[0] if single_class else thresholds
 
 
 def evaluate_model(classifier, x_test, y_test, labels, threshold=None):
     """
     Evaluates the trained model on test data and prints detailed metrics.
+
+    The scores of each class are sorted once, and the metrics of all classes
+    and thresholds are computed from cumulative counts.
     
     Args:
         classifier: The trained model
@@ -695,12 +1257,6 @@ def evaluate_model(classifier, x_test, y_test, labels, threshold=None):
     Returns:
         Dictionary with evaluation metrics
     """
-    from sklearn.metrics import (
-        precision_score, recall_score, f1_score, 
-        confusion_matrix, classification_report,
-        average_precision_score, roc_auc_score
-    )
-    
     # Skip evaluation if test set is empty
     if len(x_test) == 0:
         print("No test data available for evaluation.")
@@ -708,6 +1264,7 @@ def evaluate_model(classifier, x_test, y_test, labels, threshold=None):
     
     # Make predictions
     y_pred_prob = classifier.predict(x_test)
+    y_test = np.asarray(y_test)
     
     # Calculate metrics for each class
     metrics = {}
@@ -731,81 +1288,88 @@ def evaluate_model(classifier, x_test, y_test, labels, threshold=None):
     print("\nNote: The AUPRC and AUROC metrics calculated during post-training evaluation may differ")
     print("from training history values due to different calculation methods:")
     print("  - Training history uses Keras metrics calculated over batches")
-    print("  - Evaluation uses scikit-learn metrics calculated over the entire dataset")
+    print("  - Evaluation uses metrics calculated over the entire dataset")
+
+    # Metrics of all classes at the default and the optimized thresholds
+    scores, cum_tp, cum_fp = _sort_scores(y_test, y_pred_prob)
+    num_positives = cum_tp[-1]
+    num_negatives = len(y_test) - num_positives
+
+    if threshold is None:
+        class_thresholds = find_optimal_threshold(y_test, y_pred_prob)
+    else:
+        class_thresholds = np.full(y_test.shape[1], threshold)
+
+    tp, fp = _threshold_counts(scores, cum_tp, np.concatenate(([0.5], np.unique(class_thresholds))))
+    rows = 1 + np.searchsorted(np.unique(class_thresholds), class_thresholds)
+    tp = np.stack((tp[0], tp[rows, np.arange(len(rows))]))
+    fp = np.stack((fp[0], fp[rows, np.arange(len(rows))]))
+    precision, recall, f1 = _precision_recall_f1(tp, fp, num_positives)
+    auprc, auroc = _ranking_scores(scores, cum_tp, cum_fp)
+
+    # Binary metrics need 0/1 labels, ranking metrics also need both classes
+    is_binary = np.all((y_test == 0) | (y_test == 1), axis=0)
     
     for i in range(y_test.shape[1]):
-        try:
-            # Calculate metrics with default threshold (0.5)
-            y_pred_default = (y_pred_prob[:, i] >= 0.5).astype(int)
-            
-            class_precision_default = precision_score(y_test[:, i], y_pred_default)
-            class_recall_default = recall_score(y_test[:, i], y_pred_default)
-            class_f1_default = f1_score(y_test[:, i], y_pred_default)
-            
-            precisions_default.append(class_precision_default)
-            recalls_default.append(class_recall_default)
-            f1s_default.append(class_f1_default)
-            
-            # Find optimal threshold for this class if needed
-            if threshold is None:
-                class_threshold = find_optimal_threshold(y_test[:, i], y_pred_prob[:, i])
-                optimal_thresholds[labels[i]] = class_threshold
-            else:
-                class_threshold = threshold
-            
-            # Calculate metrics with optimized threshold
-            y_pred_opt = (y_pred_prob[:, i] >= class_threshold).astype(int)
-            
-            class_precision_opt = precision_score(y_test[:, i], y_pred_opt)
-            class_recall_opt = recall_score(y_test[:, i], y_pred_opt)
-            class_f1_opt = f1_score(y_test[:, i], y_pred_opt)
-            class_auprc = average_precision_score(y_test[:, i], y_pred_prob[:, i])
-            class_auroc = roc_auc_score(y_test[:, i], y_pred_prob[:, i])
-            
-            precisions_opt.append(class_precision_opt)
-            recalls_opt.append(class_recall_opt)
-            f1s_opt.append(class_f1_opt)
-            auprcs.append(class_auprc)
-            aurocs.append(class_auroc)
-            
-            # Confusion matrix with optimized threshold
-            tn, fp, fn, tp = confusion_matrix(y_test[:, i], y_pred_opt).ravel()
-            
-            class_metrics[labels[i]] = {
-                'precision_default': class_precision_default,
-                'recall_default': class_recall_default,
-                'f1_default': class_f1_default,
-                'precision_opt': class_precision_opt,
-                'recall_opt': class_recall_opt,
-                'f1_opt': class_f1_opt,
-                'auprc': class_auprc,
-                'auroc': class_auroc,
-                'tp': tp,
-                'fp': fp,
-                'tn': tn,
-                'fn': fn,
-                'threshold': class_threshold
-            }
-            
-            print(f"\nClass: {labels[i]}")
-            print(f"  Default threshold (0.5):")
-            print(f"    Precision: {class_precision_default:.4f}")
-            print(f"    Recall:    {class_recall_default:.4f}")
-            print(f"    F1 Score:  {class_f1_default:.4f}")
-            print(f"  Optimized threshold ({class_threshold:.2f}):")
-            print(f"    Precision: {class_precision_opt:.4f}")
-            print(f"    Recall:    {class_recall_opt:.4f}")
-            print(f"    F1 Score:  {class_f1_opt:.4f}")
-            print(f"  AUPRC:     {class_auprc:.4f}")
-            print(f"  AUROC:     {class_auroc:.4f}")
-            print(f"  Confusion matrix (optimized threshold):")
-            print(f"    True Positives:  {tp}")
-            print(f"    False Positives: {fp}")
-            print(f"    True Negatives:  {tn}")
-            print(f"    False Negatives: {fn}")
-            
-        except Exception as e:
-            print(f"Error calculating metrics for class {labels[i]}: {e}")
+        if not is_binary[i]:
+            print(f"Error calculating metrics for class {labels[i]}: labels must be 0 or 1")
+            continue
+
+        precisions_default.append(precision[0, i])
+        recalls_default.append(recall[0, i])
+        f1s_default.append(f1[0, i])
+
+        if threshold is None:
+            optimal_thresholds[labels[i]] = class_thresholds[i]
+
+        if num_positives[i] == 0 or num_negatives[i] == 0:
+            print(f"Error calculating metrics for class {labels[i]}: only one class present in the test labels")
+            continue
+
+        precisions_opt.append(precision[1, i])
+        recalls_opt.append(recall[1, i])
+        f1s_opt.append(f1[1, i])
+        auprcs.append(auprc[i])
+        aurocs.append(auroc[i])
+
+        # Confusion matrix with optimized threshold
+        class_tp = tp[1, i]
+        class_fp = fp[1, i]
+        class_tn = num_negatives[i] - class_fp
+        class_fn = num_positives[i] - class_tp
+
+        class_metrics[labels[i]] = {
+            'precision_default': precision[0, i],
+            'recall_default': recall[0, i],
+            'f1_default': f1[0, i],
+            'precision_opt': precision[1, i],
+            'recall_opt': recall[1, i],
+            'f1_opt': f1[1, i],
+            'auprc': auprc[i],
+            'auroc': auroc[i],
+            'tp': class_tp,
+            'fp': class_fp,
+            'tn': class_tn,
+            'fn': class_fn,
+            'threshold': class_thresholds[i]
+        }
+
+        print(f"\nClass: {labels[i]}")
+        print(f"  Default threshold (0.5):")
+        print(f"    Precision: {precision[0, i]:.4f}")
+        print(f"    Recall:    {recall[0, i]:.4f}")
+        print(f"    F1 Score:  {f1[0, i]:.4f}")
+        print(f"  Optimized threshold ({class_thresholds[i]:.2f}):")
+        print(f"    Precision: {precision[1, i]:.4f}")
+        print(f"    Recall:    {recall[1, i]:.4f}")
+        print(f"    F1 Score:  {f1[1, i]:.4f}")
+        print(f"  AUPRC:     {auprc[i]:.4f}")
+        print(f"  AUROC:     {auroc[i]:.4f}")
+        print(f"  Confusion matrix (optimized threshold):")
+        print(f"    True Positives:  {class_tp}")
+        print(f"    False Positives: {class_fp}")
+        print(f"    True Negatives:  {class_tn}")
+        print(f"    False Negatives: {class_fn}")
     
     # Calculate macro-averaged metrics for both default and optimized thresholds
     metrics['macro_precision_default'] = np.mean(precisions_default)
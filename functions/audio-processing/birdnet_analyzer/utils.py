@@ -259,6 +259,83 @@ def load_from_cache(path):
     return x_train, y_train, x_test, y_test, labels, binary_classification, multi_label
 
 
+def get_file_cache_path(cache_dir, fpath):
+    """Returns the path of the cached embeddings of a training file.
+
+    The path is derived from the file content and all settings that change its
+    embeddings, so modified files and changed settings result in a cache miss.
+    Entries are spread over 256 shard folders.
+
+    Args:
+        cache_dir: Path to the cache folder.
+        fpath: Path to the training file.
+
+    Returns:
+        The path of the cache entry.
+    """
+    import hashlib
+    import json
+
+    h = hashlib.sha1()
+
+    with open(fpath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    settings = {
+        "model": os.path.basename(cfg.MODEL_PATH),
+        "crop_mode": cfg.SAMPLE_CROP_MODE,
+        "sig_length": cfg.SIG_LENGTH,
+        "overlap": cfg.SIG_OVERLAP,
+        "minlen": cfg.SIG_MINLEN,
+        "fmin": cfg.BANDPASS_FMIN,
+        "fmax": cfg.BANDPASS_FMAX,
+        "audio_speed": cfg.AUDIO_SPEED,
+        "use_noise": cfg.USE_NOISE,
+    }
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    key = h.hexdigest()
+
+    return os.path.join(cache_dir, key[:2], key + ".npy")
+
+
+def load_file_from_cache(cache_path):
+    """Loads the cached embeddings of a training file.
+
+    Args:
+        cache_path: Path of the cache entry.
+
+    Returns:
+        The embeddings as read-only memory-mapped array, or None if the entry does not exist.
+    """
+    import numpy as np
+
+    if not os.path.isfile(cache_path):
+        return None
+
+    return np.load(cache_path, mmap_mode="r", allow_pickle=False)
+
+
+def save_file_to_cache(cache_path, embeddings):
+    """Saves the embeddings of a training file to the cache.
+
+    Args:
+        cache_path: Path of the cache entry.
+        embeddings: The embeddings of all crops of the file.
+    """
+    import numpy as np
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+    # Write to a temporary file first, so that concurrent readers never see partial entries
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.asarray(embeddings, dtype="float32"), allow_pickle=False)
+
+    os.replace(tmp_path, cache_path)
+
+
 def clear_error_log():
     """Clears the error log file.
 
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("perch_hoplite")
+
+from perch_hoplite.db import interface, sqlite_usearch_impl
+
+from birdnet_analyzer.embeddings import hoplite_compat
+
+DATASET_NAME = "test_dataset"
+
+
+def create_database(db_path, embedding_dim=8):
+    usearch_cfg = sqlite_usearch_impl.get_default_usearch_config(embedding_dim=embedding_dim)
+
+    return sqlite_usearch_impl.SQLiteUsearchDB.create(db_path=db_path, usearch_cfg=usearch_cfg)
+
+
+def insert_source(db, source_id, offsets):
+    rng = np.random.default_rng(0)
+
+    for start, end in offsets:
+        source = interface.EmbeddingSource(DATASET_NAME, source_id, np.array([start, end]))
+        db.insert_embedding(rng.normal(size=db.embedding_dimension()).astype("float32"), source)
+
+    db.commit()
+
+
+def test_get_source_offsets_after_reopening(tmp_path):
+    db_path = os.path.join(tmp_path, "db", "hoplite.sqlite")
+    offsets = [(0.0, 3.0), (1.5, 4.5), (123.7, 126.7)]
+
+    db = create_database(db_path)
+    insert_source(db, "a.wav", offsets)
+    insert_source(db, "b.wav", [(0.0, 3.0)])
+    db.db.close()
+
+    db = sqlite_usearch_impl.SQLiteUsearchDB.create(db_path=db_path)
+    stored = hoplite_compat.get_source_offsets(db, DATASET_NAME, "a.wav")
+
+    assert len(stored) == len(offsets)
+
+    for embedding_id, stored_offsets in stored.items():
+        np.testing.assert_array_equal(stored_offsets, db.get_embedding_source(embedding_id).offsets)
+
+    np.testing.assert_allclose(sorted(tuple(o) for o in stored.values()), offsets, rtol=1e-6)
+    assert hoplite_compat.get_source_offsets(db, DATASET_NAME, "missing.wav") == {}
+    assert sorted(hoplite_compat.get_sources(db, DATASET_NAME)) == ["a.wav", "b.wav"]
+
+
+def test_remove_embeddings_and_source(tmp_path):
+    db_path = os.path.join(tmp_path, "db", "hoplite.sqlite")
+
+    db = create_database(db_path)
+    insert_source(db, "a.wav", [(0.0, 3.0), (3.0, 6.0)])
+    insert_source(db, "b.wav", [(0.0, 3.0)])
+
+    embedding_ids = [int(i) for i in db.get_embeddings_by_source(DATASET_NAME, "a.wav")]
+    hoplite_compat.remove_embeddings(db, embedding_ids)
+    hoplite_compat.remove_source(db, DATASET_NAME, "a.wav")
+    db.commit()
+    db.db.close()
+
+    db = sqlite_usearch_impl.SQLiteUsearchDB.create(db_path=db_path)
+
+    assert db.count_embeddings() == 1
+    assert hoplite_compat.get_sources(db, DATASET_NAME) == ["b.wav"]
+    assert hoplite_compat.get_source_offsets(db, DATASET_NAME, "a.wav") == {}